@@ -0,0 +1,22 @@
+"""Run the Zoho MCP Server with uvicorn: ``python -m server``."""
+
+import os
+
+import uvicorn
+
+
+def main() -> None:
+    """Start uvicorn with uvloop, httptools and one worker per CPU by default."""
+    uvicorn.run(
+        "server.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
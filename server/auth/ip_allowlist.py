@@ -2,36 +2,52 @@
 
 import ipaddress
 import logging
+from collections.abc import Iterable
 from typing import List, Optional, Union
 
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import Scope
 
 logger = logging.getLogger(__name__)
 
 
-class IPAllowlistMiddleware(BaseHTTPMiddleware):
-    """Middleware to restrict access based on IP allowlist."""
+class IPAllowlist:
+    """IP allowlist check shared by every middleware that restricts clients."""
 
     def __init__(
         self,
-        app,
-        allowed_ips: List[str],
+        allowed_ips: Iterable[str],
         bypass_paths: Optional[List[str]] = None,
         trusted_proxies: Optional[List[str]] = None
     ) -> None:
-        """Initialize IP allowlist middleware.
+        """Initialize IP allowlist.
 
         Args:
-            app: FastAPI application
             allowed_ips: List of allowed IP addresses or CIDR blocks
             bypass_paths: List of paths that bypass IP filtering
             trusted_proxies: List of trusted proxy IP addresses that can set X-Forwarded-For
         """
-        super().__init__(app)
         self.allowed_networks = self._parse_ip_list(allowed_ips)
+        # Single addresses are matched by integer value with a set lookup before
+        # scanning networks, so any spelling of an address compares equal.
+        # IPv4 and IPv6 get separate sets since their integers can coincide.
+        self._allowed_v4_addresses, self._allowed_v6_addresses = (
+            frozenset(
+                int(network.network_address)
+                for network in self.allowed_networks
+                if network.num_addresses == 1 and network.version == version
+            )
+            for version in (4, 6)
+        )
+        # CIDR blocks as (prefix, shift) integer pairs per IP version, so matching
+        # needs only a shift and compare instead of ipaddress containment checks
+        self._allowed_v4, self._allowed_v6 = self._compile_networks(
+            network for network in self.allowed_networks if network.num_addresses > 1
+        )
         self.trusted_proxy_networks = self._parse_ip_list(trusted_proxies or [])
+        self._trusted_v4, self._trusted_v6 = self._compile_networks(self.trusted_proxy_networks)
         self.bypass_paths = bypass_paths or ["/health", "/docs", "/openapi.json"]
 
         logger.info(f"IP allowlist initialized with {len(self.allowed_networks)} networks")
@@ -43,7 +59,7 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
 
     def _parse_ip_list(
         self,
-        ip_list: List[str]
+        ip_list: Iterable[str]
     ) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
         """Parse list of IP addresses and CIDR blocks.
 
@@ -76,6 +92,44 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
 
         return networks
 
+    @staticmethod
+    def _compile_networks(
+        networks: Iterable[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]
+    ) -> tuple[tuple[tuple[int, int], ...], tuple[tuple[int, int], ...]]:
+        """Compile networks into integer prefixes for fast matching.
+
+        Args:
+            networks: IP network objects
+
+        Returns:
+            Tuple of (IPv4, IPv6) sequences of (network prefix, shift) pairs
+        """
+        compiled: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            shift = network.max_prefixlen - network.prefixlen
+            compiled[network.version].append((int(network.network_address) >> shift, shift))
+        return tuple(compiled[4]), tuple(compiled[6])
+
+    @staticmethod
+    def _matches_networks(
+        address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address],
+        ipv4_networks: tuple[tuple[int, int], ...],
+        ipv6_networks: tuple[tuple[int, int], ...]
+    ) -> bool:
+        """Check whether an address falls inside any compiled network.
+
+        Args:
+            address: Parsed IP address
+            ipv4_networks: Compiled IPv4 networks
+            ipv6_networks: Compiled IPv6 networks
+
+        Returns:
+            True if the address is inside one of the networks
+        """
+        address_int = int(address)
+        networks = ipv4_networks if address.version == 4 else ipv6_networks
+        return any(address_int >> shift == prefix for prefix, shift in networks)
+
     def _is_trusted_proxy(self, proxy_ip: str) -> bool:
         """Check if IP is a trusted proxy.
 
@@ -87,39 +141,42 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
         """
         try:
             proxy_addr = ipaddress.ip_address(proxy_ip)
-            for network in self.trusted_proxy_networks:
-                if proxy_addr in network:
-                    return True
-            return False
+            return self._matches_networks(proxy_addr, self._trusted_v4, self._trusted_v6)
         except ValueError:
             return False
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address from request.
+    def get_client_ip(self, scope: Scope) -> str:
+        """Get client IP address from an ASGI scope.
 
         Args:
-            request: FastAPI request object
+            scope: ASGI HTTP scope
 
         Returns:
             Client IP address
         """
         # Get the immediate client IP (could be proxy or real client)
-        immediate_client = request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        immediate_client = client[0] if client else "unknown"
 
         # Only trust forwarded headers if they come from trusted proxies
         if self.trusted_proxy_networks and self._is_trusted_proxy(immediate_client):
+            forwarded_for = real_ip = None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for" and forwarded_for is None:
+                    forwarded_for = value
+                elif name == b"x-real-ip" and real_ip is None:
+                    real_ip = value
+
             # Check for forwarded headers from trusted proxy
-            forwarded_for = request.headers.get("X-Forwarded-For")
             if forwarded_for:
                 # X-Forwarded-For can contain multiple IPs, get the first one (original client)
-                client_ip = forwarded_for.split(",")[0].strip()
+                client_ip = forwarded_for.decode("latin-1").split(",")[0].strip()
                 logger.debug(f"Using X-Forwarded-For IP {client_ip} from trusted proxy {immediate_client}")
                 return client_ip
 
             # Check for real IP header from trusted proxy
-            real_ip = request.headers.get("X-Real-IP")
             if real_ip:
-                client_ip = real_ip.strip()
+                client_ip = real_ip.decode("latin-1").strip()
                 logger.debug(f"Using X-Real-IP {client_ip} from trusted proxy {immediate_client}")
                 return client_ip
 
@@ -127,7 +184,7 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
         logger.debug(f"Using immediate client IP: {immediate_client}")
         return immediate_client
 
-    def _is_ip_allowed(self, client_ip: str) -> bool:
+    def is_allowed(self, client_ip: str) -> bool:
         """Check if client IP is in allowlist.
 
         Args:
@@ -138,12 +195,12 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
         """
         try:
             client_addr = ipaddress.ip_address(client_ip)
-
-            for network in self.allowed_networks:
-                if client_addr in network:
-                    return True
-
-            return False
+            addresses = (
+                self._allowed_v4_addresses if client_addr.version == 4 else self._allowed_v6_addresses
+            )
+            if int(client_addr) in addresses:
+                return True
+            return self._matches_networks(client_addr, self._allowed_v4, self._allowed_v6)
 
         except ValueError as e:
             logger.warning(f"Invalid client IP address '{client_ip}': {e}")
@@ -157,7 +214,7 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
         import os
         return os.getenv("ENVIRONMENT", "").lower() in ["test", "security_test"]
 
-    def _should_bypass_check(self, path: str) -> bool:
+    def should_bypass(self, path: str) -> bool:
         """Check if path should bypass IP filtering.
 
         Args:
@@ -168,38 +225,81 @@ class IPAllowlistMiddleware(BaseHTTPMiddleware):
         """
         return any(path.startswith(bypass_path) for bypass_path in self.bypass_paths)
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        """Process request and check IP allowlist.
+    def access_denied_response(self) -> JSONResponse:
+        """Build the 403 response for a client outside the allowlist.
+
+        Returns:
+            Access denied error response
+        """
+        return JSONResponse(
+            status_code=403,
+            content={
+                "error": "Forbidden",
+                "message": "Access denied: IP address not in allowlist"
+            }
+        )
+
+    def check(self, scope: Scope) -> Optional[JSONResponse]:
+        """Apply the allowlist to a request.
 
         Args:
-            request: Incoming request
-            call_next: Next middleware in chain
+            scope: ASGI HTTP scope
 
         Returns:
-            Response or error if IP not allowed
+            Access denied response if the client is not allowed, else None
         """
+        path = scope["path"]
         # Skip IP check for bypass paths
-        if self._should_bypass_check(request.url.path):
-            return await call_next(request)
+        if self.should_bypass(path):
+            return None
 
         # Get client IP
-        client_ip = self._get_client_ip(request)
+        client_ip = self.get_client_ip(scope)
 
         # Check if IP is allowed
-        if not self._is_ip_allowed(client_ip):
-            logger.warning(
-                f"Access denied for IP {client_ip} to {request.url.path}"
-            )
-            return JSONResponse(
-                status_code=403,
-                content={
-                    "error": "Forbidden",
-                    "message": "Access denied: IP address not in allowlist"
-                }
-            )
+        if not self.is_allowed(client_ip):
+            logger.warning(f"Access denied for IP {client_ip} to {path}")
+            return self.access_denied_response()
 
         # Log successful access
-        logger.debug(f"Access granted for IP {client_ip} to {request.url.path}")
+        logger.debug(f"Access granted for IP {client_ip} to {path}")
+        return None
+
+
+class IPAllowlistMiddleware(BaseHTTPMiddleware):
+    """Middleware to restrict access based on IP allowlist."""
+
+    def __init__(
+        self,
+        app,
+        allowed_ips: Iterable[str],
+        bypass_paths: Optional[List[str]] = None,
+        trusted_proxies: Optional[List[str]] = None
+    ) -> None:
+        """Initialize IP allowlist middleware.
+
+        Args:
+            app: FastAPI application
+            allowed_ips: List of allowed IP addresses or CIDR blocks
+            bypass_paths: List of paths that bypass IP filtering
+            trusted_proxies: List of trusted proxy IP addresses that can set X-Forwarded-For
+        """
+        super().__init__(app)
+        self.allowlist = IPAllowlist(allowed_ips, bypass_paths, trusted_proxies)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        """Process request and check IP allowlist.
+
+        Args:
+            request: Incoming request
+            call_next: Next middleware in chain
+
+        Returns:
+            Response or error if IP not allowed
+        """
+        denied_response = self.allowlist.check(request.scope)
+        if denied_response is not None:
+            return denied_response
 
         # Continue to next middleware
         return await call_next(request)
@@ -1,12 +1,16 @@
 """JWT authentication handler for Zoho MCP Server."""
 
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import jwt
 from fastapi import HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from server.core.config import settings
 
@@ -16,6 +20,9 @@ logger = logging.getLogger(__name__)
 class TokenData(BaseModel):
     """Token data model."""
 
+    # Frozen so verified instances can be shared between requests
+    model_config = ConfigDict(frozen=True)
+
     sub: str  # Subject (user ID)
     exp: datetime  # Expiration time
     iat: datetime  # Issued at
@@ -31,6 +38,12 @@ class JWTHandler:
         self.algorithm = settings.jwt_algorithm
         self.expire_hours = settings.jwt_expire_hours
 
+        # Bounded LRU of verified tokens keyed by token hash: (expires_at, token_data)
+        self.cache_maxsize = 10000
+        self.cache_ttl = 30.0
+        self._verified_cache: OrderedDict[str, tuple[float, TokenData]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
     def create_access_token(
         self,
         subject: str,
@@ -136,6 +149,43 @@ class JWTHandler:
                 detail="Could not validate credentials"
             )
 
+    def verify_token_cached(self, token: str) -> TokenData:
+        """Verify a JWT token, reusing the result for tokens seen before.
+
+        Args:
+            token: JWT token to verify
+
+        Returns:
+            Decoded token data
+
+        Raises:
+            HTTPException: If token is invalid or expired
+        """
+        cache_key = hashlib.sha256(token.encode()).hexdigest()[:32]
+        now = time.time()
+
+        with self._cache_lock:
+            cached = self._verified_cache.get(cache_key)
+            if cached is not None:
+                expires_at, token_data = cached
+                if now < expires_at:
+                    self._verified_cache.move_to_end(cache_key)
+                    return token_data
+                del self._verified_cache[cache_key]
+
+        # Failures raise here and are never cached
+        token_data = self.verify_token(token)
+
+        # Never serve a token from cache past its own expiry
+        expires_at = min(now + self.cache_ttl, token_data.exp.timestamp())
+        with self._cache_lock:
+            self._verified_cache[cache_key] = (expires_at, token_data)
+            self._verified_cache.move_to_end(cache_key)
+            while len(self._verified_cache) > self.cache_maxsize:
+                self._verified_cache.popitem(last=False)
+
+        return token_data
+
     def get_token_expiry(self, token: str) -> datetime:
         """Get token expiration time.
 
@@ -2,6 +2,8 @@
 
 import os
 import secrets
+from functools import cached_property
+
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -62,6 +64,11 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://localhost:6379/0", description="Redis URL")
     redis_password: str = Field(default="", description="Redis Password")
     redis_ssl: bool = Field(default=False, description="Redis SSL Enabled")
+    redis_max_connections: int = Field(
+        default=50,
+        ge=1,
+        description="Redis connection pool size per worker"
+    )
 
     # Security Configuration
     allowed_ips: str = Field(
@@ -95,6 +102,11 @@ class Settings(BaseSettings):
     environment: str = Field(default="development", description="Environment")
     log_level: str = Field(default="INFO", description="Log Level")
     debug: bool = Field(default=False, description="Debug Mode")
+    thread_pool_size: int = Field(
+        default=200,
+        ge=1,
+        description="anyio worker threads available to sync endpoints"
+    )
 
     # API Configuration
     api_base_url: str = Field(
@@ -105,6 +117,16 @@ class Settings(BaseSettings):
         default="https://workdrive.zoho.com/api/v1",
         description="Zoho WorkDrive API URL"
     )
+    zoho_max_conn: int = Field(
+        default=20,
+        ge=1,
+        description="Zoho API connection pool size per worker"
+    )
+    zoho_keepalive: float = Field(
+        default=90.0,
+        gt=0,
+        description="Seconds an idle Zoho API connection is kept open"
+    )
 
     # Monitoring Configuration
     enable_metrics: bool = Field(default=True, description="Enable Metrics")
@@ -158,6 +180,16 @@ class Settings(BaseSettings):
 
         return v
 
+    @cached_property
+    def allowed_ip_set(self) -> frozenset[str]:
+        """Allowed IP addresses/CIDR blocks parsed from ALLOWED_IPS."""
+        return frozenset(ip.strip() for ip in self.allowed_ips.split(",") if ip.strip())
+
+    @cached_property
+    def cors_origins_list(self) -> tuple[str, ...]:
+        """CORS origins parsed from CORS_ORIGINS."""
+        return tuple(origin.strip() for origin in self.cors_origins.split(",") if origin.strip())
+
     @property
     def is_production(self) -> bool:
         """Check if running in production environment."""
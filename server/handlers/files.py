@@ -8,7 +8,7 @@ import asyncio
 
 from pydantic import BaseModel
 
-from server.zoho.api_client import ZohoAPIClient
+from server.zoho.api_client import ZohoAPIClient, get_zoho_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +30,20 @@ class FileHandler:
 
     def __init__(self) -> None:
         """Initialize file handler."""
-        self.api_client = ZohoAPIClient()
+        self._api_client: Optional[ZohoAPIClient] = None
         logger.info("File handler initialized")
 
+    @property
+    def api_client(self) -> ZohoAPIClient:
+        """Zoho API client, shared per event loop unless one was assigned."""
+        if self._api_client is not None:
+            return self._api_client
+        return get_zoho_client()
+
+    @api_client.setter
+    def api_client(self, client: ZohoAPIClient) -> None:
+        self._api_client = client
+
     async def download_file(self, file_id: str) -> dict[str, Any]:
         """Download a file from WorkDrive.
 
@@ -101,9 +112,9 @@ class FileHandler:
         try:
             logger.info(f"Uploading review sheet '{name}' to folder {folder_id}")
 
-            # Validate base64 content
+            # Validate base64 content; decoding up to 1GB is CPU-bound, so keep it off the event loop
             try:
-                file_content = base64.b64decode(content_base64)
+                file_content = await asyncio.to_thread(base64.b64decode, content_base64)
             except Exception as e:
                 raise ValueError(f"Invalid base64 content: {e}")
 
@@ -6,7 +6,7 @@ from typing import Any, Optional, Union
 
 from pydantic import BaseModel, ValidationError
 
-from server.zoho.api_client import ZohoAPIClient
+from server.zoho.api_client import ZohoAPIClient, get_zoho_client
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +40,20 @@ class TaskHandler:
 
     def __init__(self) -> None:
         """Initialize task handler."""
-        self.api_client = ZohoAPIClient()
+        self._api_client: Optional[ZohoAPIClient] = None
         logger.info("Task handler initialized")
 
+    @property
+    def api_client(self) -> ZohoAPIClient:
+        """Zoho API client, shared per event loop unless one was assigned."""
+        if self._api_client is not None:
+            return self._api_client
+        return get_zoho_client()
+
+    @api_client.setter
+    def api_client(self, client: ZohoAPIClient) -> None:
+        self._api_client = client
+
     async def list_projects(self) -> dict[str, Any]:
         """List all available Zoho projects.
 
@@ -59,8 +70,8 @@ class TaskHandler:
                 raise ValueError("ZOHO_PORTAL_ID environment variable is not set")
             endpoint = f"/portal/{portal_id}/projects/"
 
-            # Make API request
-            response = await self.api_client.get(endpoint)
+            # Make API request; the project list changes rarely
+            response = await self.api_client.get(endpoint, cache_ttl=30.0)
 
             # Parse projects
             projects_data = response.get("projects", [])
@@ -448,17 +459,21 @@ class TaskHandler:
             from server.core.config import settings
             portal_id = settings.portal_id
             endpoint = f"/portal/{portal_id}/tasks/{task_id}/"
-            response = await self.api_client.get(endpoint)
+            # Comments are fetched alongside the task rather than after it
+            comments_endpoint = f"/portal/{portal_id}/tasks/{task_id}/comments/"
+            response, comments_response = await self.api_client.get_many(
+                [(endpoint, None), (comments_endpoint, None)]
+            )
+            if isinstance(response, BaseException):
+                raise response
 
             task_data = response.get("task", {})
 
-            # Get additional details like comments and history
-            comments_endpoint = f"/portal/{portal_id}/tasks/{task_id}/comments/"
-            try:
-                comments_response = await self.api_client.get(comments_endpoint)
-                comments = comments_response.get("comments", [])
-            except Exception:
+            # Comments are optional; a failed fetch leaves them empty
+            if isinstance(comments_response, BaseException):
                 comments = []
+            else:
+                comments = comments_response.get("comments", [])
 
             result = {
                 "id": task_data.get("id"),
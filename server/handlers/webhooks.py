@@ -3,9 +3,9 @@
 import hashlib
 import hmac
 import logging
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 
 from server.core.config import settings
 
@@ -84,62 +84,49 @@ class WebhookHandler:
             logger.error(f"Signature verification failed: {e}")
             return False
 
-    async def handle_task_updated(self, event_data: dict[str, Any]) -> dict[str, Any]:
+    async def handle_task_updated(self, event_data: dict[str, Any]) -> None:
         """Handle task updated webhook event.
 
+        Zoho only needs a 2xx acknowledgement, so nothing is returned.
+
         Args:
             event_data: Webhook event data
-
-        Returns:
-            Processing result
         """
         try:
             task_id = event_data.get("task_id")
             project_id = event_data.get("project_id")
             changes = event_data.get("changes", {})
 
-            logger.info(f"Task updated webhook: {task_id} in project {project_id}")
+            logger.info(
+                f"Task updated webhook: {task_id} in project {project_id}, "
+                f"changes: {list(changes.keys()) if changes else []}"
+            )
 
             # Process the webhook event
             # This could trigger GitHub sync, notifications, etc.
 
-            result = {
-                "status": "processed",
-                "task_id": task_id,
-                "project_id": project_id,
-                "changes_processed": list(changes.keys()) if changes else []
-            }
-
-            return result
-
         except Exception as e:
             logger.error(f"Failed to process task updated webhook: {e}")
             raise
 
     async def process_webhook(
         self,
-        request: Request,
         event_type: str,
         event_data: dict[str, Any]
-    ) -> dict[str, Any]:
-        """Process incoming webhook.
+    ) -> Optional[dict[str, Any]]:
+        """Process an incoming webhook whose signature has been verified.
+
+        Callers must check the raw payload with verify_signature before
+        parsing it and passing the result here.
 
         Args:
-            request: FastAPI request
             event_type: Type of webhook event
             event_data: Event payload
 
         Returns:
-            Processing result
+            Processing result, or None when the event only needs an acknowledgement
         """
         try:
-            # Verify signature if configured
-            signature = request.headers.get("X-Zoho-Signature", "")
-            payload = await request.body()
-
-            if not self.verify_signature(payload, signature):
-                raise HTTPException(status_code=401, detail="Invalid signature")
-
             # Route to appropriate handler
             if event_type == "task.updated":
                 return await self.handle_task_updated(event_data)
@@ -1,109 +1,518 @@
 """FastAPI application for Zoho MCP Server."""
 
+import hashlib
+import html
 import logging
-from collections.abc import AsyncGenerator
+import string
+from collections.abc import AsyncGenerator, Iterable, Mapping
 from contextlib import asynccontextmanager
-from typing import Optional
+from types import MappingProxyType
+from typing import Final, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+import orjson
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from server.auth.ip_allowlist import IPAllowlistMiddleware
+from server.auth.ip_allowlist import IPAllowlist
 from server.auth.jwt_handler import TokenData, jwt_handler
 from server.auth.oauth_handler import oauth_handler
 from server.core.config import settings
 from server.core.mcp_handler import MCPHandler
 from server.handlers.files import FileHandler
 from server.handlers.webhooks import WebhookHandler
-from server.middleware.rate_limit import RateLimitMiddleware
+from server.middleware.rate_limit import RateLimiter
+from server.zoho.api_client import close_zoho_client
+from server.zoho.oauth_client import oauth_client
+
+# Resolve the configured log level once, falling back to INFO on bad values
+_log_level = logging.getLevelName(settings.log_level.upper())
+LOG_LEVEL = _log_level if isinstance(_log_level, int) else logging.INFO
 
 # Configure logging
 logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
+    level=LOG_LEVEL,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-# Initialize security scheme
-security = HTTPBearer()
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers to all responses."""
-
-    async def dispatch(self, request: Request, call_next):
-        """Add security headers to response."""
-        response = await call_next(request)
-
-        # Security headers to prevent various attacks
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        # Content Security Policy (adjust as needed for your frontend)
-        if settings.is_production:
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline'; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data: https:; "
-                "connect-src 'self' https://projectsapi.zoho.com https://workdrive.zoho.com"
-            )
-        else:
-            # More relaxed CSP for development
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-                "connect-src 'self' https://projectsapi.zoho.com https://workdrive.zoho.com"
+# MCP manifest, serialized once since it never changes at runtime
+_MANIFEST: dict[str, object] = {
+    "name": "zoho-mcp-server",
+    "version": "0.1.0",
+    "description": "Zoho MCP Server for project and file management",
+    "tools": [
+        {
+            "name": "listTasks",
+            "description": "List tasks from a Zoho project",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string"},
+                    "status": {
+                        "type": "string",
+                        "enum": ["open", "closed", "overdue"]
+                    }
+                },
+                "required": ["project_id"]
+            }
+        },
+        {
+            "name": "createTask",
+            "description": "Create a new task in Zoho project",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string"},
+                    "name": {"type": "string"},
+                    "owner": {"type": "string"},
+                    "due_date": {"type": "string", "format": "date"}
+                },
+                "required": ["project_id", "name"]
+            }
+        },
+        {
+            "name": "updateTask",
+            "description": "Update an existing task",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "task_id": {"type": "string"},
+                    "status": {"type": "string"},
+                    "due_date": {"type": "string", "format": "date"},
+                    "owner": {"type": "string"}
+                },
+                "required": ["task_id"]
+            }
+        },
+        {
+            "name": "getTaskDetail",
+            "description": "Get detailed information about a task",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "task_id": {"type": "string"}
+                },
+                "required": ["task_id"]
+            }
+        },
+        {
+            "name": "getProjectSummary",
+            "description": "Get project summary with completion rate",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string"},
+                    "period": {
+                        "type": "string",
+                        "enum": ["week", "month"]
+                    }
+                },
+                "required": ["project_id"]
+            }
+        },
+        {
+            "name": "downloadFile",
+            "description": "Download a file from WorkDrive",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_id": {"type": "string"}
+                },
+                "required": ["file_id"]
+            }
+        },
+        {
+            "name": "uploadReviewSheet",
+            "description": "Upload a review sheet to WorkDrive",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "project_id": {"type": "string"},
+                    "folder_id": {"type": "string"},
+                    "name": {"type": "string"},
+                    "content_base64": {"type": "string"}
+                },
+                "required": ["project_id", "folder_id", "name", "content_base64"]
+            }
+        },
+        {
+            "name": "searchFiles",
+            "description": "Search files in WorkDrive",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "folder_id": {"type": "string"}
+                },
+                "required": ["query"]
+            }
+        }
+    ]
+}
+
+# Read-only view shared by all callers so the manifest cannot drift from its bytes
+MANIFEST: Final[Mapping[str, object]] = MappingProxyType(_MANIFEST)
+
+
+def _etag(body: bytes) -> str:
+    """Build a strong ETag for a fixed response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+_MANIFEST_BYTES = orjson.dumps(_MANIFEST)
+_MANIFEST_ETAG = _etag(_MANIFEST_BYTES)
+_MANIFEST_HEADERS = {
+    "ETag": _MANIFEST_ETAG,
+    "Cache-Control": "public, max-age=3600",
+}
+
+
+# OAuth callback pages, built once at import and filled per response
+_PAGE_STYLE = """\
+        body { font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }
+        .container { max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        .icon { font-size: 48px; margin-bottom: 20px; }"""
+
+_OAUTH_ERROR_TEMPLATE = string.Template(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>認証エラー - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .error {{ color: #d32f2f; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">❌</div>
+        <h1 class="error">認証エラー</h1>
+        <p>OAuth認証中にエラーが発生しました:</p>
+        <p><strong>$error</strong></p>
+        <p>もう一度お試しください。</p>
+    </div>
+</body>
+</html>
+""")
+
+_MISSING_CODE_HTML = f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>認証エラー - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .error {{ color: #d32f2f; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">❌</div>
+        <h1 class="error">認証コードが見つかりません</h1>
+        <p>認証コードが提供されませんでした。</p>
+        <p>もう一度認証フローを開始してください。</p>
+    </div>
+</body>
+</html>
+"""
+
+_AUTH_SUCCESS_TEMPLATE = string.Template(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>認証成功 - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .success {{ color: #2e7d32; }}
+        .info {{ background-color: #e3f2fd; padding: 15px; border-radius: 4px; margin: 15px 0; }}
+        .token {{ font-family: monospace; background-color: #f5f5f5; padding: 10px; border-radius: 4px; word-break: break-all; }}
+        .next-steps {{ background-color: #fff3e0; padding: 15px; border-radius: 4px; margin: 15px 0; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">✅</div>
+        <h1 class="success">認証成功！</h1>
+        <p>Zoho OAuth認証が正常に完了しました。</p>
+
+        <div class="info">
+            <h3>取得した情報:</h3>
+            <ul>
+                <li><strong>Access Token:</strong> 取得済み（有効期限: $expires_in秒）</li>
+                <li><strong>Refresh Token:</strong> 取得済み・保存済み</li>
+                <li><strong>スコープ:</strong> $scope</li>
+                <li><strong>API Domain:</strong> $api_domain</li>
+            </ul>
+        </div>
+
+        <div class="next-steps">
+            <h3>🎯 次のステップ:</h3>
+            <ol>
+                <li>この画面を閉じてください</li>
+                <li>MCPサーバーが自動的に新しいトークンを使用します</li>
+                <li>Zoho Projects APIの機能が利用可能になりました</li>
+            </ol>
+        </div>
+
+        <p><small>このウィンドウは安全に閉じることができます。</small></p>
+    </div>
+</body>
+</html>
+""")
+
+_ENV_UPDATE_ERROR_TEMPLATE = string.Template(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>設定エラー - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .warning {{ color: #f57c00; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">⚠️</div>
+        <h1 class="warning">設定更新エラー</h1>
+        <p>認証は成功しましたが、設定ファイルの更新に失敗しました。</p>
+        <p>手動で以下のRefresh Tokenを.envファイルに設定してください:</p>
+        <p><code>$refresh_token</code></p>
+    </div>
+</body>
+</html>
+""")
+
+_TOKEN_EXCHANGE_ERROR_TEMPLATE = string.Template(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>トークン交換エラー - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .error {{ color: #d32f2f; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">❌</div>
+        <h1 class="error">トークン交換エラー</h1>
+        <p>認証コードをトークンに変換する際にエラーが発生しました:</p>
+        <p><strong>$error</strong></p>
+        <p>もう一度認証フローを開始してください。</p>
+    </div>
+</body>
+</html>
+""")
+
+_CALLBACK_ERROR_TEMPLATE = string.Template(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>処理エラー - Zoho MCP Server</title>
+    <meta charset="UTF-8">
+    <style>
+{_PAGE_STYLE}
+        .error {{ color: #d32f2f; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="icon">❌</div>
+        <h1 class="error">処理エラー</h1>
+        <p>認証処理中に予期しないエラーが発生しました:</p>
+        <p><strong>$error</strong></p>
+        <p>もう一度認証フローを開始してください。</p>
+    </div>
+</body>
+</html>
+""")
+
+
+# Security headers added to every response, prebuilt in Starlette's raw format
+_BASE_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+}
+
+_PROD_SECURITY_HEADERS = {
+    **_BASE_SECURITY_HEADERS,
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    # Content Security Policy (adjust as needed for your frontend)
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: https:; "
+        "connect-src 'self' https://projectsapi.zoho.com https://workdrive.zoho.com"
+    ),
+}
+
+_DEV_SECURITY_HEADERS = {
+    **_BASE_SECURITY_HEADERS,
+    # More relaxed CSP for development
+    "Content-Security-Policy": (
+        "default-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+        "connect-src 'self' https://projectsapi.zoho.com https://workdrive.zoho.com"
+    ),
+}
+
+
+def _encode_headers(headers: dict[str, str]) -> list[tuple[bytes, bytes]]:
+    """Encode headers into Starlette's raw (lowercase name, value) byte pairs."""
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+
+_PROD_SECURITY_HEADERS_RAW = _encode_headers(_PROD_SECURITY_HEADERS)
+_DEV_SECURITY_HEADERS_RAW = _encode_headers(_DEV_SECURITY_HEADERS)
+
+
+# JSON-RPC error returned when an MCP request body is not valid JSON
+_PARSE_ERROR_CONTENT = {
+    "jsonrpc": "2.0",
+    "error": {
+        "code": -32700,
+        "message": "Parse error"
+    },
+    "id": None
+}
+
+
+# Methods whose requests carry no body worth size-checking
+_BODYLESS_METHODS = frozenset({"GET", "HEAD", "DELETE"})
+
+
+def _request_too_large_response(size: int, max_size: int) -> ORJSONResponse:
+    """Build the 413 response for a request body over the size limit."""
+    return ORJSONResponse(
+        status_code=413,
+        content={
+            "error": "Request Entity Too Large",
+            "message": f"Request size {size} bytes exceeds limit of {max_size} bytes"
+        }
+    )
+
+
+def _check_content_length(scope: Scope, max_size: int) -> Optional[Response]:
+    """Validate the Content-Length header of a request scope.
+
+    Args:
+        scope: ASGI HTTP scope
+        max_size: Maximum request size in bytes
+
+    Returns:
+        Error response if the header is invalid or over the limit, else None
+    """
+    if scope["method"] in _BODYLESS_METHODS:
+        return None
+
+    # Read Content-Length straight from the raw ASGI headers
+    content_length = None
+    for key, value in scope["headers"]:
+        if key == b"content-length":
+            content_length = value
+            break
+
+    if content_length:
+        try:
+            size = int(content_length)
+        except ValueError:
+            # Invalid Content-Length header
+            return ORJSONResponse(
+                status_code=400,
+                content={
+                    "error": "Bad Request",
+                    "message": "Invalid Content-Length header"
+                }
             )
+        if size > max_size:
+            return _request_too_large_response(size, max_size)
+
+    return None
 
-        return response
 
+# Public read-only paths exempt from IP, size and rate limit checks
+_PUBLIC_PATHS = frozenset({"/health", "/manifest.json"})
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware to limit request body size."""
 
-    def __init__(self, app, max_size: int = 1024 * 1024):  # 1MB default
-        """Initialize request size limit middleware.
-        
+class UnifiedMiddleware:
+    """Pure ASGI middleware applying all request guards and security headers.
+
+    IP allowlisting, request size limiting, rate limiting and security header
+    injection run in a single layer, avoiding the per-request task group that
+    each BaseHTTPMiddleware in a stack would add.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        allowed_ips: Iterable[str],
+        max_size: int = 1024 * 1024,  # 1MB default
+        rate_limit: int = 100,
+        public_paths: Iterable[str] = _PUBLIC_PATHS
+    ) -> None:
+        """Initialize unified middleware.
+
         Args:
-            app: FastAPI application
+            app: ASGI application
+            allowed_ips: Allowed IP addresses or CIDR blocks
             max_size: Maximum request size in bytes
+            rate_limit: Token bucket size per client, refilled over one minute
+            public_paths: Exact paths that only receive security headers
         """
-        super().__init__(app)
+        self.app = app
         self.max_size = max_size
-
-    async def dispatch(self, request: Request, call_next):
-        """Check request size before processing."""
-        # Check Content-Length header
-        content_length = request.headers.get("Content-Length")
-        if content_length:
-            try:
-                size = int(content_length)
-                if size > self.max_size:
-                    return JSONResponse(
-                        status_code=413,
-                        content={
-                            "error": "Request Entity Too Large",
-                            "message": f"Request size {size} bytes exceeds limit of {self.max_size} bytes"
-                        }
-                    )
-            except ValueError:
-                # Invalid Content-Length header
-                return JSONResponse(
-                    status_code=400,
-                    content={
-                        "error": "Bad Request",
-                        "message": "Invalid Content-Length header"
-                    }
-                )
-
-        return await call_next(request)
+        self.public_paths = frozenset(public_paths)
+        self.ip_allowlist = IPAllowlist(allowed_ips)
+        self.rate_limiter = RateLimiter(capacity=rate_limit, refill_per_sec=rate_limit / 60)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Guard an HTTP request and add security headers to its response."""
+        if scope["type"] == "lifespan":
+            await self.app(scope, receive, self.rate_limiter.lifespan_send(send))
+            return
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Security headers to prevent various attacks, shared read-only across
+        # requests; rate limit headers are joined in when the response starts
+        security_headers = (
+            _PROD_SECURITY_HEADERS_RAW if settings.is_production else _DEV_SECURITY_HEADERS_RAW
+        )
+        rate_limit_headers: tuple[tuple[bytes, bytes], ...] = ()
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()), *security_headers, *rate_limit_headers
+                ]
+            await send(message)
+
+        # Public read-only paths (e.g. health probes) skip the guards entirely
+        if scope["path"] in self.public_paths:
+            await self.app(scope, receive, send_with_headers)
+            return
+
+        error_response = self.ip_allowlist.check(scope)
+        if error_response is None:
+            error_response = _check_content_length(scope, self.max_size)
+        if error_response is None:
+            error_response, rate_limit_headers = await self.rate_limiter.check(scope)
+
+        if error_response is not None:
+            await error_response(scope, receive, send_with_headers)
+            return
+
+        await self.app(scope, receive, send_with_headers)
 
 
 @asynccontextmanager
@@ -111,13 +520,44 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan events."""
     # Startup
     logger.info("Starting Zoho MCP Server...")
-    logger.info(f"Environment: {settings.environment}")
-    logger.info(f"Debug mode: {settings.debug}")
+    logger.info("Environment: %s", settings.environment)
+    logger.info("Debug mode: %s", settings.debug)
+
+    # Create request handlers once per process so their API clients and
+    # token caches are shared by every request
+    app.state.mcp_handler = MCPHandler()
+    app.state.webhook_handler = WebhookHandler()
+    app.state.file_handler = FileHandler()
+
+    # Raise anyio's default 40-thread ceiling for threadpool-dispatched work
+    to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+
+    # Prime the OpenAPI schema so the first /openapi.json or /docs hit doesn't pay for it
+    if settings.debug:
+        _get_openapi_bytes(app)
 
     yield
 
     # Shutdown
     logger.info("Shutting down Zoho MCP Server...")
+    await close_zoho_client()
+    await oauth_client.aclose()
+
+
+def _get_openapi_bytes(app: FastAPI) -> bytes:
+    """Get the serialized OpenAPI schema, building it on first use.
+
+    Args:
+        app: FastAPI application
+
+    Returns:
+        OpenAPI schema as JSON bytes
+    """
+    openapi_bytes = getattr(app.state, "openapi_bytes", None)
+    if openapi_bytes is None:
+        openapi_bytes = orjson.dumps(app.openapi())
+        app.state.openapi_bytes = openapi_bytes
+    return openapi_bytes
 
 
 def create_app() -> FastAPI:
@@ -126,119 +566,115 @@ def create_app() -> FastAPI:
         title="Zoho MCP Server",
         description="Model Context Protocol integration for Zoho APIs",
         version="0.1.0",
-        docs_url="/docs" if settings.debug else None,
-        redoc_url="/redoc" if settings.debug else None,
+        # Docs routes are registered below so they can serve prebuilt content
+        docs_url=None,
+        redoc_url=None,
+        openapi_url=None,
+        default_response_class=ORJSONResponse,
         lifespan=lifespan,
     )
 
+    # The schema and docs are only exposed in debug mode; production skips building them
+    if settings.debug:
+        @app.get("/openapi.json", include_in_schema=False)
+        async def openapi_json() -> Response:
+            """Serve the cached OpenAPI schema."""
+            return Response(content=_get_openapi_bytes(app), media_type="application/json")
+
+        # Docs pages are static apart from the schema URL, so render them once
+        swagger_html = get_swagger_ui_html(
+            openapi_url="/openapi.json",
+            title=f"{app.title} - Swagger UI"
+        ).body
+        redoc_html = get_redoc_html(
+            openapi_url="/openapi.json",
+            title=f"{app.title} - ReDoc"
+        ).body
+
+        @app.get("/docs", include_in_schema=False)
+        async def swagger_ui() -> HTMLResponse:
+            """Serve prebuilt Swagger UI page."""
+            return HTMLResponse(content=swagger_html)
+
+        @app.get("/redoc", include_in_schema=False)
+        async def redoc() -> HTMLResponse:
+            """Serve prebuilt ReDoc page."""
+            return HTMLResponse(content=redoc_html)
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.cors_origins.split(","),
+        allow_origins=settings.cors_origins_list,
         allow_credentials=settings.cors_credentials,
         allow_methods=["GET", "POST", "PUT", "DELETE"],
         allow_headers=["*"],
     )
 
-    # Add custom middleware (order matters - security headers first)
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RequestSizeLimitMiddleware, max_size=settings.max_request_size)
-    app.add_middleware(IPAllowlistMiddleware, allowed_ips=settings.allowed_ips.split(","))
+    # Compress larger JSON payloads (MCP results, manifest); small ones like /health are skipped
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+    # IP allowlist, size limit, rate limit and security headers in one ASGI layer
     app.add_middleware(
-        RateLimitMiddleware,
-        calls=settings.rate_limit_per_minute,
-        period=60
+        UnifiedMiddleware,
+        allowed_ips=settings.allowed_ip_set,
+        max_size=settings.max_request_size,
+        rate_limit=settings.rate_limit_per_minute
     )
 
-    # Initialize handlers
-    mcp_handler = MCPHandler()
-    webhook_handler = WebhookHandler()
-    file_handler = FileHandler()
+    def get_current_user(request: Request) -> TokenData:
+        """Get current authenticated user from the request's bearer token."""
+        authorization = request.headers.get("authorization")
+        if not authorization or not authorization.startswith("Bearer "):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
 
-    async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
-        """Get current authenticated user from JWT token."""
         try:
-            token_data = jwt_handler.verify_token(credentials.credentials)
-            return token_data
+            return jwt_handler.verify_token_cached(authorization[7:])
         except HTTPException:
             raise
-        except Exception as e:
-            logger.error(f"Authentication failed: {e}")
+        except Exception:
+            logger.exception("Authentication failed")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+    # The health payload only depends on settings, so serialize it once per app
+    health_bytes = orjson.dumps({
+        "status": "healthy",
+        "version": "0.1.0",
+        "environment": settings.environment
+    })
+    health_etag = _etag(health_bytes)
+    health_headers = {"ETag": health_etag, "Cache-Control": "no-cache"}
+
     @app.get("/health")
-    async def health_check() -> dict[str, str]:
+    async def health_check(request: Request) -> Response:
         """Health check endpoint."""
-        return {
-            "status": "healthy",
-            "version": "0.1.0",
-            "environment": settings.environment
-        }
+        if request.headers.get("if-none-match") == health_etag:
+            return Response(status_code=304, headers=health_headers)
+        return Response(
+            content=health_bytes,
+            media_type="application/json",
+            headers=health_headers
+        )
 
     @app.get("/auth/callback")
     async def oauth_callback(code: Optional[str] = None, error: Optional[str] = None) -> HTMLResponse:
         """Handle OAuth callback from Zoho."""
         if error:
-            logger.error(f"OAuth error: {error}")
+            logger.error("OAuth error: %s", error)
             return HTMLResponse(
-                content=f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>認証エラー - Zoho MCP Server</title>
-                    <meta charset="UTF-8">
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }}
-                        .container {{ max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                        .error {{ color: #d32f2f; }}
-                        .icon {{ font-size: 48px; margin-bottom: 20px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="icon">❌</div>
-                        <h1 class="error">認証エラー</h1>
-                        <p>OAuth認証中にエラーが発生しました:</p>
-                        <p><strong>{error}</strong></p>
-                        <p>もう一度お試しください。</p>
-                    </div>
-                </body>
-                </html>
-                """,
+                content=_OAUTH_ERROR_TEMPLATE.substitute(error=html.escape(error)),
                 status_code=400
             )
 
         if not code:
-            return HTMLResponse(
-                content="""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>認証エラー - Zoho MCP Server</title>
-                    <meta charset="UTF-8">
-                    <style>
-                        body { font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }
-                        .container { max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-                        .error { color: #d32f2f; }
-                        .icon { font-size: 48px; margin-bottom: 20px; }
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="icon">❌</div>
-                        <h1 class="error">認証コードが見つかりません</h1>
-                        <p>認証コードが提供されませんでした。</p>
-                        <p>もう一度認証フローを開始してください。</p>
-                    </div>
-                </body>
-                </html>
-                """,
-                status_code=400
-            )
+            return HTMLResponse(content=_MISSING_CODE_HTML, status_code=400)
 
         try:
             # Exchange code for tokens
@@ -252,151 +688,53 @@ def create_app() -> FastAPI:
 
                 if env_updated:
                     return HTMLResponse(
-                        content=f"""
-                        <!DOCTYPE html>
-                        <html>
-                        <head>
-                            <title>認証成功 - Zoho MCP Server</title>
-                            <meta charset="UTF-8">
-                            <style>
-                                body {{ font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }}
-                                .container {{ max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                                .success {{ color: #2e7d32; }}
-                                .info {{ background-color: #e3f2fd; padding: 15px; border-radius: 4px; margin: 15px 0; }}
-                                .icon {{ font-size: 48px; margin-bottom: 20px; }}
-                                .token {{ font-family: monospace; background-color: #f5f5f5; padding: 10px; border-radius: 4px; word-break: break-all; }}
-                                .next-steps {{ background-color: #fff3e0; padding: 15px; border-radius: 4px; margin: 15px 0; }}
-                            </style>
-                        </head>
-                        <body>
-                            <div class="container">
-                                <div class="icon">✅</div>
-                                <h1 class="success">認証成功！</h1>
-                                <p>Zoho OAuth認証が正常に完了しました。</p>
-
-                                <div class="info">
-                                    <h3>取得した情報:</h3>
-                                    <ul>
-                                        <li><strong>Access Token:</strong> 取得済み（有効期限: {result.get('expires_in', 'N/A')}秒）</li>
-                                        <li><strong>Refresh Token:</strong> 取得済み・保存済み</li>
-                                        <li><strong>スコープ:</strong> {result.get('scope', 'N/A')}</li>
-                                        <li><strong>API Domain:</strong> {result.get('api_domain', 'N/A')}</li>
-                                    </ul>
-                                </div>
-
-                                <div class="next-steps">
-                                    <h3>🎯 次のステップ:</h3>
-                                    <ol>
-                                        <li>この画面を閉じてください</li>
-                                        <li>MCPサーバーが自動的に新しいトークンを使用します</li>
-                                        <li>Zoho Projects APIの機能が利用可能になりました</li>
-                                    </ol>
-                                </div>
-
-                                <p><small>このウィンドウは安全に閉じることができます。</small></p>
-                            </div>
-                        </body>
-                        </html>
-                        """
+                        content=_AUTH_SUCCESS_TEMPLATE.substitute(
+                            expires_in=html.escape(str(result.get('expires_in', 'N/A'))),
+                            scope=html.escape(str(result.get('scope', 'N/A'))),
+                            api_domain=html.escape(str(result.get('api_domain', 'N/A')))
+                        )
                     )
                 else:
                     return HTMLResponse(
-                        content="""
-                        <!DOCTYPE html>
-                        <html>
-                        <head>
-                            <title>設定エラー - Zoho MCP Server</title>
-                            <meta charset="UTF-8">
-                            <style>
-                                body { font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }
-                                .container { max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-                                .warning { color: #f57c00; }
-                                .icon { font-size: 48px; margin-bottom: 20px; }
-                            </style>
-                        </head>
-                        <body>
-                            <div class="container">
-                                <div class="icon">⚠️</div>
-                                <h1 class="warning">設定更新エラー</h1>
-                                <p>認証は成功しましたが、設定ファイルの更新に失敗しました。</p>
-                                <p>手動で以下のRefresh Tokenを.envファイルに設定してください:</p>
-                                <p><code>{refresh_token}</code></p>
-                            </div>
-                        </body>
-                        </html>
-                        """,
+                        content=_ENV_UPDATE_ERROR_TEMPLATE.substitute(
+                            refresh_token=html.escape(refresh_token)
+                        ),
                         status_code=500
                     )
             else:
                 return HTMLResponse(
-                    content=f"""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <title>トークン交換エラー - Zoho MCP Server</title>
-                        <meta charset="UTF-8">
-                        <style>
-                            body {{ font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }}
-                            .container {{ max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                            .error {{ color: #d32f2f; }}
-                            .icon {{ font-size: 48px; margin-bottom: 20px; }}
-                        </style>
-                    </head>
-                    <body>
-                        <div class="container">
-                            <div class="icon">❌</div>
-                            <h1 class="error">トークン交換エラー</h1>
-                            <p>認証コードをトークンに変換する際にエラーが発生しました:</p>
-                            <p><strong>{result.get('error', 'Unknown error')}</strong></p>
-                            <p>もう一度認証フローを開始してください。</p>
-                        </div>
-                    </body>
-                    </html>
-                    """,
+                    content=_TOKEN_EXCHANGE_ERROR_TEMPLATE.substitute(
+                        error=html.escape(str(result.get('error', 'Unknown error')))
+                    ),
                     status_code=500
                 )
 
         except Exception as e:
-            logger.error(f"OAuth callback processing failed: {e}")
+            logger.exception("OAuth callback processing failed")
             return HTMLResponse(
-                content=f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>処理エラー - Zoho MCP Server</title>
-                    <meta charset="UTF-8">
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; background-color: #f5f5f5; }}
-                        .container {{ max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                        .error {{ color: #d32f2f; }}
-                        .icon {{ font-size: 48px; margin-bottom: 20px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="icon">❌</div>
-                        <h1 class="error">処理エラー</h1>
-                        <p>認証処理中に予期しないエラーが発生しました:</p>
-                        <p><strong>{str(e)}</strong></p>
-                        <p>もう一度認証フローを開始してください。</p>
-                    </div>
-                </body>
-                </html>
-                """,
+                content=_CALLBACK_ERROR_TEMPLATE.substitute(error=html.escape(str(e))),
                 status_code=500
             )
 
     @app.post("/mcp")
-    async def mcp_endpoint_noauth(request: Request) -> JSONResponse:
+    async def mcp_endpoint_noauth(request: Request) -> ORJSONResponse:
         """MCP JSON-RPC endpoint without authentication for Cursor compatibility."""
+        body: Optional[dict] = None
         try:
-            body = await request.json()
-            logger.info(f"MCP request (no auth): {body.get('method', 'unknown')}")
-            response = await mcp_handler.handle_request(body)
-            return JSONResponse(content=response)
-        except Exception as e:
-            logger.error(f"MCP request failed: {e}")
-            return JSONResponse(
+            raw = await request.body()
+            # Content-Length is only advisory, so enforce the limit on the body itself
+            if len(raw) > settings.max_request_size:
+                return _request_too_large_response(len(raw), settings.max_request_size)
+            body = orjson.loads(raw)
+            logger.info("MCP request (no auth): %s", body.get("method", "unknown"))
+            response = await request.app.state.mcp_handler.handle_request(body)
+            return ORJSONResponse(response)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Invalid JSON in MCP request: %s", e)
+            return ORJSONResponse(status_code=400, content=_PARSE_ERROR_CONTENT)
+        except Exception:
+            logger.exception("MCP request failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "jsonrpc": "2.0",
@@ -404,24 +742,30 @@ def create_app() -> FastAPI:
                         "code": -32603,
                         "message": "Internal error"
                     },
-                    "id": body.get("id") if 'body' in locals() else None
+                    "id": body.get("id") if isinstance(body, dict) else None
                 }
             )
 
     @app.post("/mcp-auth")
-    async def mcp_endpoint_auth(
-        request: Request,
-        current_user: TokenData = Depends(get_current_user)
-    ) -> JSONResponse:
+    async def mcp_endpoint_auth(request: Request) -> ORJSONResponse:
         """MCP JSON-RPC endpoint with JWT authentication."""
+        current_user = get_current_user(request)
+        body: Optional[dict] = None
         try:
-            body = await request.json()
-            logger.info(f"MCP request from user: {current_user.sub}")
-            response = await mcp_handler.handle_request(body)
-            return JSONResponse(content=response)
-        except Exception as e:
-            logger.error(f"MCP request failed: {e}")
-            return JSONResponse(
+            raw = await request.body()
+            # Content-Length is only advisory, so enforce the limit on the body itself
+            if len(raw) > settings.max_request_size:
+                return _request_too_large_response(len(raw), settings.max_request_size)
+            body = orjson.loads(raw)
+            logger.info("MCP request from user: %s", current_user.sub)
+            response = await request.app.state.mcp_handler.handle_request(body)
+            return ORJSONResponse(response)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Invalid JSON in MCP request: %s", e)
+            return ORJSONResponse(status_code=400, content=_PARSE_ERROR_CONTENT)
+        except Exception:
+            logger.exception("MCP request failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "jsonrpc": "2.0",
@@ -429,198 +773,113 @@ def create_app() -> FastAPI:
                         "code": -32603,
                         "message": "Internal error"
                     },
-                    "id": body.get("id") if 'body' in locals() else None
+                    "id": body.get("id") if isinstance(body, dict) else None
                 }
             )
 
     @app.get("/api/files/search")
     async def search_files_api(
+        request: Request,
         query: str = "",
         folder_id: Optional[str] = None,
         limit: int = 10
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Search files in WorkDrive via REST API."""
         try:
-            result = await file_handler.search_files(query, folder_id)
-            return JSONResponse(content=result)
+            result = await request.app.state.file_handler.search_files(query, folder_id)
+            return ORJSONResponse(result)
         except Exception as e:
-            logger.error(f"File search API failed: {e}")
-            return JSONResponse(
+            logger.exception("File search API failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": str(e)}
             )
 
     @app.get("/api/workspaces")
-    async def get_workspaces_api() -> JSONResponse:
+    async def get_workspaces_api(request: Request) -> ORJSONResponse:
         """Get workspaces and teams via REST API."""
         try:
-            result = await file_handler.get_workspaces_and_teams()
-            return JSONResponse(content=result)
+            result = await request.app.state.file_handler.get_workspaces_and_teams()
+            return ORJSONResponse(result)
         except Exception as e:
-            logger.error(f"Workspaces API failed: {e}")
-            return JSONResponse(
+            logger.exception("Workspaces API failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": str(e)}
             )
 
     @app.get("/api/team-folders")
-    async def get_team_folders_api(team_id: Optional[str] = None) -> JSONResponse:
+    async def get_team_folders_api(
+        request: Request,
+        team_id: Optional[str] = None
+    ) -> ORJSONResponse:
         """Get team folders via REST API."""
         try:
-            result = await file_handler.list_team_folders(team_id)
-            return JSONResponse(content=result)
+            result = await request.app.state.file_handler.list_team_folders(team_id)
+            return ORJSONResponse(result)
         except Exception as e:
-            logger.error(f"Team folders API failed: {e}")
-            return JSONResponse(
+            logger.exception("Team folders API failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": str(e)}
             )
 
     @app.get("/api/folders/{folder_id}/files")
-    async def get_folder_files_api(folder_id: str, limit: int = 50) -> JSONResponse:
+    async def get_folder_files_api(
+        request: Request,
+        folder_id: str,
+        limit: int = 50
+    ) -> ORJSONResponse:
         """Get files in a specific folder via REST API."""
         try:
-            result = await file_handler.list_folder_contents(folder_id)
-            return JSONResponse(content=result)
+            result = await request.app.state.file_handler.list_folder_contents(folder_id)
+            return ORJSONResponse(result)
         except Exception as e:
-            logger.error(f"Folder files API failed: {e}")
-            return JSONResponse(
+            logger.exception("Folder files API failed")
+            return ORJSONResponse(
                 status_code=500,
                 content={"error": str(e)}
             )
 
     @app.get("/manifest.json")
-    async def get_manifest() -> dict[str, object]:
+    async def get_manifest(request: Request) -> Response:
         """Get MCP manifest with available tools."""
-        return {
-            "name": "zoho-mcp-server",
-            "version": "0.1.0",
-            "description": "Zoho MCP Server for project and file management",
-            "tools": [
-                {
-                    "name": "listTasks",
-                    "description": "List tasks from a Zoho project",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "project_id": {"type": "string"},
-                            "status": {
-                                "type": "string",
-                                "enum": ["open", "closed", "overdue"]
-                            }
-                        },
-                        "required": ["project_id"]
-                    }
-                },
-                {
-                    "name": "createTask",
-                    "description": "Create a new task in Zoho project",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "project_id": {"type": "string"},
-                            "name": {"type": "string"},
-                            "owner": {"type": "string"},
-                            "due_date": {"type": "string", "format": "date"}
-                        },
-                        "required": ["project_id", "name"]
-                    }
-                },
-                {
-                    "name": "updateTask",
-                    "description": "Update an existing task",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "task_id": {"type": "string"},
-                            "status": {"type": "string"},
-                            "due_date": {"type": "string", "format": "date"},
-                            "owner": {"type": "string"}
-                        },
-                        "required": ["task_id"]
-                    }
-                },
-                {
-                    "name": "getTaskDetail",
-                    "description": "Get detailed information about a task",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "task_id": {"type": "string"}
-                        },
-                        "required": ["task_id"]
-                    }
-                },
-                {
-                    "name": "getProjectSummary",
-                    "description": "Get project summary with completion rate",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "project_id": {"type": "string"},
-                            "period": {
-                                "type": "string",
-                                "enum": ["week", "month"]
-                            }
-                        },
-                        "required": ["project_id"]
-                    }
-                },
-                {
-                    "name": "downloadFile",
-                    "description": "Download a file from WorkDrive",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_id": {"type": "string"}
-                        },
-                        "required": ["file_id"]
-                    }
-                },
-                {
-                    "name": "uploadReviewSheet",
-                    "description": "Upload a review sheet to WorkDrive",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "project_id": {"type": "string"},
-                            "folder_id": {"type": "string"},
-                            "name": {"type": "string"},
-                            "content_base64": {"type": "string"}
-                        },
-                        "required": ["project_id", "folder_id", "name", "content_base64"]
-                    }
-                },
-                {
-                    "name": "searchFiles",
-                    "description": "Search files in WorkDrive",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "folder_id": {"type": "string"}
-                        },
-                        "required": ["query"]
-                    }
-                }
-            ]
-        }
+        if request.headers.get("if-none-match") == _MANIFEST_ETAG:
+            return Response(status_code=304, headers=_MANIFEST_HEADERS)
+        return Response(
+            content=_MANIFEST_BYTES,
+            media_type="application/json",
+            headers=_MANIFEST_HEADERS
+        )
 
     @app.post("/webhook/task-updated")
-    async def webhook_task_updated(request: Request) -> JSONResponse:
+    async def webhook_task_updated(request: Request) -> Response:
         """Handle task updated webhook from Zoho."""
         try:
-            body_data = await request.json()
+            # Read the body once and use the same bytes for the signature and the parse
+            payload = await request.body()
+            signature = request.headers.get("X-Zoho-Signature", "")
+            webhook_handler = request.app.state.webhook_handler
+            if not webhook_handler.verify_signature(payload, signature):
+                raise HTTPException(status_code=401, detail="Invalid signature")
+
+            try:
+                body_data = orjson.loads(payload)
+            except orjson.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
             result = await webhook_handler.process_webhook(
-                request=request,
                 event_type="task.updated",
                 event_data=body_data
             )
-            return JSONResponse(content=result)
+            if result is None:
+                # Plain acknowledgement, no body to serialize
+                return Response(status_code=204)
+            return ORJSONResponse(result)
         except HTTPException:
             raise
-        except Exception as e:
-            logger.error(f"Webhook processing failed: {e}")
+        except Exception:
+            logger.exception("Webhook processing failed")
             raise HTTPException(
                 status_code=500,
                 detail="Webhook processing failed"
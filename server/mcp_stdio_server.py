@@ -2,18 +2,28 @@
 """Stdio-based MCP server for Cursor compatibility."""
 
 import asyncio
-import json
 import logging
 import sys
 import tempfile
+import time
+from collections import deque
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
+
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from server.core.mcp_handler import MCPHandler
+from server.zoho.api_client import close_zoho_client
+from server.zoho.oauth_client import oauth_client
 
 # Configure logging to file (stdout is used for MCP communication)
 # Use secure temporary directory instead of hardcoded /tmp
@@ -22,7 +32,7 @@ log_dir.mkdir(exist_ok=True)
 log_file = log_dir / "mcp_server.log"
 
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler(str(log_file), mode='a'),
@@ -31,17 +41,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# JSON-RPC messages arrive one per line
+_STDIN_LINE_LIMIT = 16 * 1024 * 1024
+_STDIN_CHUNK_SIZE = 256 * 1024
+
+# Requests are handled by a fixed pool of workers fed through a bounded queue
+_WORKER_COUNT = 8
+_QUEUE_SIZE = 64
+
+# Notifications the handler only acknowledges with a log line
+_NOTIFICATION_METHODS = frozenset({
+    "initialized",
+    "notifications/initialized",
+    "notifications/cancelled",
+})
+
 
 class StdioMCPServer:
     """Stdio-based MCP server for Cursor compatibility."""
 
     def __init__(self):
         """Initialize the stdio MCP server."""
+        self.reader: Optional[asyncio.StreamReader] = None
+        self._frames: deque[bytes] = deque()
+        self._partial = bytearray()
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._write_lock = asyncio.Lock()
+        # Bounded so a burst of input waits for workers instead of piling up
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._workers: list[asyncio.Task] = []
         try:
             self.mcp_handler = MCPHandler()
             logger.info("Stdio MCP server initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize MCP server: {e}")
+            logger.error("Failed to initialize MCP server: %s", e)
             raise
 
     async def handle_request(self, request_data: dict[str, Any]) -> dict[str, Any]:
@@ -52,87 +85,201 @@ class StdioMCPServer:
 
         Returns:
             The JSON-RPC response
+
+        Raises:
+            Exception: Handler failures propagate to the caller, which turns
+                them into a JSON-RPC error response
         """
+        return await self.mcp_handler.handle_request(request_data)
+
+    async def _connect_stdio(self) -> None:
+        """Attach non-blocking stream transports to stdin and stdout.
+
+        Pipes are what Cursor hands us. When either stream is not a pipe (a
+        regular file, a Windows console, a test double) the blocking
+        fallbacks in ``_read_line`` and ``_write`` are used instead.
+        """
+        loop = asyncio.get_running_loop()
+
         try:
-            response = await self.mcp_handler.handle_request(request_data)
-            return response
+            reader = asyncio.StreamReader(limit=_STDIN_CHUNK_SIZE)
+            protocol = asyncio.StreamReaderProtocol(reader)
+            await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+            self.reader = reader
+        except (OSError, ValueError, NotImplementedError) as e:
+            logger.info("stdin is not a pipe, reading in executor: %s", e)
+
+        try:
+            transport, protocol = await loop.connect_write_pipe(
+                asyncio.streams.FlowControlMixin, sys.stdout
+            )
+            self.writer = asyncio.StreamWriter(transport, protocol, None, loop)
+        except (OSError, ValueError, NotImplementedError) as e:
+            logger.info("stdout is not a pipe, writing to buffer: %s", e)
+
+    async def _read_line(self) -> bytes:
+        """Read one line from stdin, returning ``b""`` at EOF.
+
+        From a pipe, stdin is read in large chunks and every complete line in
+        a chunk is framed at once, so a burst of pipelined messages is served
+        from one read.
+
+        Raises:
+            ValueError: If a line grows beyond ``_STDIN_LINE_LIMIT`` bytes
+        """
+        if self.reader is None:
+            line = await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+            return line.encode()
+
+        while not self._frames:
+            chunk = await self.reader.read(_STDIN_CHUNK_SIZE)
+            if not chunk:
+                line = bytes(self._partial)
+                self._partial.clear()
+                return line
+
+            self._partial += chunk
+            if b"\n" in chunk:
+                end = self._partial.rfind(b"\n")
+                self._frames.extend(
+                    frame for frame in bytes(self._partial[:end]).split(b"\n") if frame
+                )
+                del self._partial[:end + 1]
+
+            if len(self._partial) > _STDIN_LINE_LIMIT:
+                self._partial.clear()
+                raise ValueError(f"stdin line exceeds {_STDIN_LINE_LIMIT} bytes")
+
+        return self._frames.popleft()
+
+    async def _write(self, data: bytes) -> None:
+        """Write bytes to stdout and wait until they are handed to the OS.
+
+        Requests are handled concurrently, so writes are serialized to keep
+        each response on its own line.
+        """
+        async with self._write_lock:
+            if self.writer is not None:
+                self.writer.write(data)
+                await self.writer.drain()
+            else:
+                sys.stdout.buffer.write(data)
+                sys.stdout.buffer.flush()
+
+    async def _process(self, request_data: dict[str, Any]) -> None:
+        """Handle one parsed request and write its response, if any.
+
+        Args:
+            request_data: The JSON-RPC request
+        """
+        started = time.perf_counter()
+        method = request_data.get("method", "unknown")
+        try:
+            response = await self.handle_request(request_data)
         except Exception as e:
-            logger.error(f"Request handling failed: {e}")
-            return {
+            logger.exception("Error handling request")
+            response = {
                 "jsonrpc": "2.0",
                 "error": {
                     "code": -32603,
-                    "message": "Internal error"
+                    "message": f"Internal error: {str(e)}"
                 },
                 "id": request_data.get("id")
             }
 
+        # Send response to stdout (only if response is not None)
+        if response is None:
+            logger.info("notification method=%s", method)
+            return
+
+        try:
+            # orjson emits compact UTF-8 bytes with the line terminator already
+            # appended, so each response goes out as a single write
+            response_json = orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE)
+            await self._write(response_json)
+        except Exception as e:
+            logger.error("Failed to send response for id %s: %s", response.get("id"), e)
+            return
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "req method=%s id=%s bytes=%d dur_ms=%.1f",
+                method, response.get("id"), len(response_json),
+                (time.perf_counter() - started) * 1000
+            )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("response: %s", response_json[:200].decode(errors="replace"))
+
+    async def _notify(self, request_data: dict[str, Any]) -> None:
+        """Handle a notification, which never gets a response.
+
+        Args:
+            request_data: The JSON-RPC notification
+        """
+        try:
+            await self.mcp_handler.handle_request(request_data)
+        except Exception:
+            logger.exception("Notification handling failed")
+        logger.info("notification method=%s", request_data.get("method"))
+
+    async def _worker(self) -> None:
+        """Handle queued requests and notifications until cancelled."""
+        while True:
+            request_data = await self._queue.get()
+            try:
+                if "id" in request_data:
+                    await self._process(request_data)
+                else:
+                    await self._notify(request_data)
+            except Exception:
+                logger.exception("Worker failed to handle request")
+            finally:
+                self._queue.task_done()
+
     async def run(self):
         """Run the stdio MCP server main loop."""
         logger.info("Starting stdio MCP server...")
-        logger.info(f"Working directory: {Path.cwd()}")
-        logger.info(f"Python executable: {sys.executable}")
-        logger.info(f"Python path: {sys.path[:3]}...")
+        logger.info("Working directory: %s", Path.cwd())
+        logger.info("Python executable: %s", sys.executable)
+        logger.info("Python path: %s...", sys.path[:3])
         
+        await self._connect_stdio()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(_WORKER_COUNT)]
+
         try:
             while True:
                 # Read request from stdin
                 try:
-                    line = await asyncio.get_event_loop().run_in_executor(
-                        None, sys.stdin.readline
-                    )
+                    line = await self._read_line()
 
                     if not line:
                         logger.info("EOF received, shutting down")
+                        await self._queue.join()
                         break
 
                     line = line.strip()
                     if not line:
                         continue
 
-                    logger.info(f"Received request: {line}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("request: %s", line[:200].decode(errors="replace"))
 
                     # Parse JSON request
                     try:
-                        request_data = json.loads(line)
-                        logger.info(f"Parsed request - method: {request_data.get('method')}, id: {request_data.get('id')}")
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Invalid JSON: {e}")
+                        request_data = orjson.loads(line)
+                    except orjson.JSONDecodeError as e:
+                        logger.error("Invalid JSON: %s", e)
                         continue
 
-                    # Handle request
-                    try:
-                        response = await self.handle_request(request_data)
-                        if response is not None:
-                            logger.info(f"Generated response for {request_data.get('method')}: {json.dumps(response)[:200]}...")
-                        else:
-                            logger.info(f"No response needed for notification: {request_data.get('method')}")
-                    except Exception as e:
-                        logger.error(f"Error handling request: {e}")
-                        response = {
-                            "jsonrpc": "2.0",
-                            "error": {
-                                "code": -32603,
-                                "message": f"Internal error: {str(e)}"
-                            },
-                            "id": request_data.get("id")
-                        }
-
-                    # Send response to stdout (only if response is not None)
-                    if response is not None:
-                        response_json = json.dumps(response, separators=(',', ':'), ensure_ascii=False)
-                        print(response_json)
-                        sys.stdout.flush()  # Ensure immediate delivery
+                    if "id" not in request_data and request_data.get("method") in _NOTIFICATION_METHODS:
+                        logger.info("notification method=%s", request_data["method"])
+                        continue
 
-                        logger.info(f"Sent response for method: {request_data.get('method', 'unknown')}")
-                        logger.info(f"Response size: {len(response_json)} bytes")
-                        logger.info(f"Response ID: {response.get('id')}")
-                        logger.info("Response flushed to stdout")
-                    else:
-                        logger.info("Notification processed, no response sent: %s", request_data.get('method', 'unknown'))
+                    # Handled by the worker pool; responses may complete out of order
+                    await self._queue.put(request_data)
 
                 except Exception as e:
-                    logger.error(f"Error in main loop: {e}")
+                    logger.error("Error in main loop: %s", e)
                     # Send error response instead of crashing
                     try:
                         error_response = {
@@ -143,18 +290,21 @@ class StdioMCPServer:
                             },
                             "id": None
                         }
-                        print(json.dumps(error_response, separators=(',', ':')))
-                        sys.stdout.flush()
+                        await self._write(orjson.dumps(error_response, option=orjson.OPT_APPEND_NEWLINE))
                     except Exception as json_error:
-                        logger.error(f"Failed to send error response: {json_error}")
+                        logger.error("Failed to send error response: %s", json_error)
                         pass
                     continue
 
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
         except Exception as e:
-            logger.error(f"Server error: {e}")
+            logger.error("Server error: %s", e)
         finally:
+            for worker in self._workers:
+                worker.cancel()
+            await close_zoho_client()
+            await oauth_client.aclose()
             logger.info("Stdio MCP server shutting down")
 
 
@@ -165,4 +315,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -1,21 +1,91 @@
 """Internationalization middleware for Zoho MCP Server."""
 
 import logging
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional
 
 from babel.support import Translations
 from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_LOCALE = "en"
+_MAX_ACCEPT_LANGUAGE_RANGES = 6
+
+# Predefined translations until .po/.mo catalogs are wired in. Lookups are
+# memoized by _translate, so this table must not be modified at runtime.
+_TRANSLATIONS: dict[str, dict[str, str]] = {
+    "en": {
+        "task_created": "Task created successfully",
+        "task_updated": "Task updated successfully",
+        "task_not_found": "Task not found",
+        "file_uploaded": "File uploaded successfully",
+        "file_not_found": "File not found",
+        "invalid_parameters": "Invalid parameters",
+        "internal_error": "Internal server error",
+        "access_denied": "Access denied",
+        "rate_limit_exceeded": "Rate limit exceeded"
+    },
+    "ja": {
+        "task_created": "タスクが正常に作成されました",
+        "task_updated": "タスクが正常に更新されました",
+        "task_not_found": "タスクが見つかりません",
+        "file_uploaded": "ファイルが正常にアップロードされました",
+        "file_not_found": "ファイルが見つかりません",
+        "invalid_parameters": "無効なパラメータです",
+        "internal_error": "内部サーバーエラー",
+        "access_denied": "アクセスが拒否されました",
+        "rate_limit_exceeded": "レート制限を超過しました"
+    }
+}
+
+
+@lru_cache(maxsize=512)
+def _translate(message: str, locale: str) -> str:
+    """Look up a message in the predefined translations.
+
+    Args:
+        message: Message key to translate
+        locale: Target locale
+
+    Returns:
+        Translated message, or the key itself when no translation exists
+    """
+    locale_translations = _TRANSLATIONS.get(locale, _TRANSLATIONS[_DEFAULT_LOCALE])
+    return locale_translations.get(message, message)
+
+
+@lru_cache(maxsize=256)
+def _parse_accept_language(header: str, supported: frozenset[str]) -> str:
+    """Pick the first supported language from an Accept-Language header.
+
+    Clients send the same header on every request, so results are cached by
+    header value.
+
+    Args:
+        header: Raw Accept-Language header value
+        supported: Supported locale codes
+
+    Returns:
+        Matched locale code, or an empty string if none is supported
+    """
+    # Parse Accept-Language header (simplified); only the leading ranges matter
+    for lang_range in header.split(",", _MAX_ACCEPT_LANGUAGE_RANGES)[:_MAX_ACCEPT_LANGUAGE_RANGES]:
+        lang = lang_range.split(";")[0].strip().lower()
+        # Extract language code (e.g., "en-US" -> "en")
+        lang_code = lang.split("-")[0]
+        if lang_code in supported:
+            return lang_code
+    return ""
+
 
 class I18nManager:
     """Internationalization manager for handling multiple languages."""
 
     def __init__(self) -> None:
         """Initialize i18n manager."""
-        self.supported_locales = ["en", "ja"]
-        self.default_locale = "en"
+        self.supported_locales = frozenset(_TRANSLATIONS)
+        self.default_locale = _DEFAULT_LOCALE
         self.translations: dict[str, Optional[Translations]] = {}
 
         # Initialize translations
@@ -46,19 +116,19 @@ class I18nManager:
         """
         # Check query parameter first
         locale = request.query_params.get("locale")
-        if locale and self._is_supported_locale(locale):
-            return locale
+        if locale:
+            if locale in self.supported_locales:
+                return locale
+            locale = locale.lower()
+            if locale in self.supported_locales:
+                return locale
 
         # Check Accept-Language header
         accept_language = request.headers.get("Accept-Language", "")
         if accept_language:
-            # Parse Accept-Language header (simplified)
-            for lang_range in accept_language.split(","):
-                lang = lang_range.split(";")[0].strip().lower()
-                # Extract language code (e.g., "en-US" -> "en")
-                lang_code = lang.split("-")[0]
-                if self._is_supported_locale(lang_code):
-                    return lang_code
+            lang_code = _parse_accept_language(accept_language, self.supported_locales)
+            if lang_code:
+                return lang_code
 
         return self.default_locale
 
@@ -71,7 +141,9 @@ class I18nManager:
         Returns:
             True if supported
         """
-        return locale.lower() in self.supported_locales
+        if locale in self.supported_locales:
+            return True
+        return not locale.islower() and locale.lower() in self.supported_locales
 
     def translate(self, message: str, locale: Optional[str] = None) -> str:
         """Translate message to specified locale.
@@ -86,34 +158,7 @@ class I18nManager:
         if not locale:
             locale = self.default_locale
 
-        # For now, return predefined translations
-        translations = {
-            "en": {
-                "task_created": "Task created successfully",
-                "task_updated": "Task updated successfully",
-                "task_not_found": "Task not found",
-                "file_uploaded": "File uploaded successfully",
-                "file_not_found": "File not found",
-                "invalid_parameters": "Invalid parameters",
-                "internal_error": "Internal server error",
-                "access_denied": "Access denied",
-                "rate_limit_exceeded": "Rate limit exceeded"
-            },
-            "ja": {
-                "task_created": "タスクが正常に作成されました",
-                "task_updated": "タスクが正常に更新されました",
-                "task_not_found": "タスクが見つかりません",
-                "file_uploaded": "ファイルが正常にアップロードされました",
-                "file_not_found": "ファイルが見つかりません",
-                "invalid_parameters": "無効なパラメータです",
-                "internal_error": "内部サーバーエラー",
-                "access_denied": "アクセスが拒否されました",
-                "rate_limit_exceeded": "レート制限を超過しました"
-            }
-        }
-
-        locale_translations = translations.get(locale, translations[self.default_locale])
-        return locale_translations.get(message, message)
+        return _translate(message, locale)
 
     def format_response_message(
         self,
@@ -131,10 +176,13 @@ class I18nManager:
         Returns:
             Formatted message
         """
-        translated = self.translate(message_key, locale)
+        # Keyword-less messages are served straight from the translation cache
+        translated = _translate(message_key, locale or self.default_locale)
+        if not kwargs:
+            return translated
 
         try:
-            return translated.format(**kwargs) if kwargs else translated
+            return translated.format(**kwargs)
         except Exception as e:
             logger.warning(f"Failed to format message '{message_key}': {e}")
             return translated
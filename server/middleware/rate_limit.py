@@ -1,86 +1,323 @@
 """Rate limiting middleware for Zoho MCP Server."""
 
 import asyncio
+import ipaddress
 import logging
+import os
 import time
-import threading
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, List, Optional, Union
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Response
+from redis.exceptions import NoScriptError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
+# Atomically count a request in the current window, starting the window's TTL
+# on its first request. Returns {count, remaining TTL in ms}.
+_FIXED_WINDOW_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return {count, redis.call('PTTL', KEYS[1])}
+"""
+
+# Strict sliding log: drop expired entries, then record the request if the
+# client is under its limit. ARGV is {now_ms, period_ms, limit, member}.
+# Returns {limited, remaining, reset_ms}.
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - period)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local reset = now + period
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + period
+    end
+    return {1, 0, reset}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], period)
+return {0, limit - count - 1, now + period}
+"""
+
+# Concurrent Redis checks are coalesced for up to this long into one pipeline
+_REDIS_BATCH_WINDOW = 0.001
+_REDIS_BATCH_MAX = 128
+
+
+class _RedisScriptBatcher:
+    """Coalesce concurrent calls of one Redis script into pipelined batches.
+
+    Checks for different clients touch different keys, so they can share a
+    non-transactional pipeline: each script still runs atomically, while a
+    burst of requests costs one round trip instead of one per request.
+    """
+
+    def __init__(self, redis_client: Any, script: Any) -> None:
+        """Initialize the batcher.
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware to implement rate limiting per client IP."""
+        Args:
+            redis_client: Redis client used to create pipelines
+            script: Registered script to run for every call
+        """
+        self.redis_client = redis_client
+        self.script = script
+        # Set once SCRIPT LOAD has succeeded, so flushes send EVALSHA only
+        self._script_loaded = False
+        self._pending: list[tuple[list[str], list[Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def run(self, keys: list[str], args: list[Any]) -> Any:
+        """Queue a script call and wait for its result.
+
+        Args:
+            keys: Script KEYS
+            args: Script ARGV
+
+        Returns:
+            The script's return value
+
+        Raises:
+            Exception: If the pipeline or this call's script fails
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((keys, args, future))
+
+        if len(self._pending) >= _REDIS_BATCH_MAX:
+            # Keep a reference so the flush task is not garbage collected mid-flight
+            task = asyncio.create_task(self._flush(self._take_batch()))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_window())
+
+        return await future
+
+    def _take_batch(self) -> list[tuple[list[str], list[Any], asyncio.Future]]:
+        """Detach the pending calls so new calls start a fresh batch."""
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def _flush_after_window(self) -> None:
+        """Flush whatever has queued up once the batch window closes."""
+        await asyncio.sleep(_REDIS_BATCH_WINDOW)
+        self._timer = None
+        batch = self._take_batch()
+        if batch:
+            await self._flush(batch)
+
+    async def _load_script(self) -> None:
+        """Load the script into Redis so EVALSHA can find it."""
+        await self.redis_client.script_load(self.script.script)
+        self._script_loaded = True
+
+    async def _execute(self, batch: list[tuple[list[str], list[Any], asyncio.Future]]) -> list[Any]:
+        """Send a batch of EVALSHA calls in one pipeline round trip."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        # Queued by hand: calling the script object with client=pipe returns
+        # a coroutine, and nothing reaches the pipeline until it is awaited
+        for keys, args, _ in batch:
+            pipe.evalsha(self.script.sha, len(keys), *keys, *args)
+        return list(await pipe.execute(raise_on_error=False))
+
+    async def _flush(self, batch: list[tuple[list[str], list[Any], asyncio.Future]]) -> None:
+        """Run a batch of script calls in one pipeline and resolve their futures."""
+        try:
+            if not self._script_loaded:
+                await self._load_script()
+            results = await self._execute(batch)
+
+            # Redis dropped the script (restart, failover or SCRIPT FLUSH): load
+            # it again and retry only the calls that missed it
+            missed = [i for i, result in enumerate(results) if isinstance(result, NoScriptError)]
+            if missed:
+                await self._load_script()
+                retried = await self._execute([batch[i] for i in missed])
+                for i, result in zip(missed, retried):
+                    results[i] = result
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        # A short result list must not leave callers waiting forever
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Redis pipeline returned no result for this call"))
+
+
+class RateLimiter:
+    """Token bucket rate limiting per client IP, shared by the ASGI middlewares."""
 
     def __init__(
         self,
-        app: Any,
         calls: int = 100,
         period: int = 60,
         bypass_paths: Optional[List[str]] = None,
         redis_client=None,
-        trusted_proxies: Optional[List[str]] = None
+        trusted_proxies: Optional[List[str]] = None,
+        capacity: Optional[int] = None,
+        refill_per_sec: Optional[float] = None,
+        sliding_window: bool = False
     ) -> None:
-        """Initialize rate limiting middleware.
+        """Initialize rate limiter.
 
         Args:
-            app: FastAPI application
             calls: Number of calls allowed per period
             period: Time period in seconds
             bypass_paths: List of paths that bypass rate limiting
             redis_client: Redis client for distributed rate limiting
-            trusted_proxies: List of trusted proxy IP addresses
+            trusted_proxies: List of trusted proxy IP addresses or CIDR blocks
+            capacity: Token bucket size (burst allowance), defaults to calls
+            refill_per_sec: Tokens added per second, defaults to calls / period
+            sliding_window: Use a strict sliding log in Redis instead of a fixed
+                window counter, at the cost of one sorted set entry per request
         """
-        super().__init__(app)
-        self.calls = calls
+        self.calls = capacity if capacity is not None else calls
         self.period = period
+        self.capacity = float(self.calls)
+        self.refill_per_sec = refill_per_sec if refill_per_sec is not None else calls / period
+        # A limit of zero or less turns rate limiting off
+        self.enabled = self.calls > 0
+        # Seconds for an empty bucket to refill completely; idle clients past this are evicted
+        self.full_refill_time = self.capacity / self.refill_per_sec if self.enabled else 0.0
         self.bypass_paths = bypass_paths or ["/health", "/docs", "/openapi.json"]
+        # str.startswith accepts a tuple, matching every prefix in one C call
+        self._bypass_tuple = tuple(self.bypass_paths)
         self.redis_client = redis_client
-        self.trusted_proxies = set(trusted_proxies or [])
-
-        # Thread-safe in-memory storage for when Redis is unavailable
-        self.clients: Dict[str, Dict[str, Any]] = {}
-        self._lock = threading.RLock()
-
-        logger.info(f"Rate limiting initialized: {calls} calls per {period} seconds")
+        self.sliding_window = sliding_window
+        # Exact proxy addresses are matched with a set lookup; CIDR blocks (load
+        # balancer subnets) are only scanned when that lookup misses
+        self.trusted_proxies: frozenset[str] = frozenset()
+        self._trusted_networks: tuple[Union[ipaddress.IPv4Network, ipaddress.IPv6Network], ...] = ()
+        self._parse_trusted_proxies(trusted_proxies or [])
+
+        # Only retry_after varies between 429 responses, so build the rest once
+        self._limited_body_template = (
+            b'{"error":"Rate limit exceeded",'
+            b'"message":"Too many requests. Limit: %d per %d seconds",'
+            b'"retry_after":%%d}' % (self.calls, self.period)
+        )
+        self._limited_headers = {
+            "X-RateLimit-Limit": str(self.calls),
+            "X-RateLimit-Remaining": "0",
+        }
+        # Encoded once for the headers added to every allowed response
+        self._limit_header = str(self.calls).encode("latin-1")
+
+        # In-memory token buckets for when Redis is unavailable, mapping client
+        # id to (tokens, last refill time) in least recently used order
+        self.clients: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # Periodic eviction, scheduled on the event loop by the first check. The
+        # loop is kept with the handle so a check on another loop reschedules it.
+        self._cleanup_handle: Optional[asyncio.TimerHandle] = None
+        self._cleanup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        logger.info(
+            "Rate limiting initialized: bucket of %d refilling %.2f tokens per second",
+            self.calls, self.refill_per_sec
+        )
         if redis_client:
+            # The script object caches its SHA and uses EVALSHA, reloading on NOSCRIPT
+            self._redis_window_script = redis_client.register_script(
+                _SLIDING_WINDOW_SCRIPT if sliding_window else _FIXED_WINDOW_SCRIPT
+            )
+            self._redis_batcher = _RedisScriptBatcher(redis_client, self._redis_window_script)
             logger.info("Using Redis for distributed rate limiting")
         else:
             logger.warning("Using in-memory storage - not suitable for production with multiple instances")
 
-    def _get_client_identifier(self, request: Request) -> str:
-        """Get client identifier for rate limiting.
+    def _parse_trusted_proxies(self, proxies: List[str]) -> None:
+        """Split trusted proxies into exact addresses and CIDR networks.
 
         Args:
-            request: FastAPI request object
+            proxies: Trusted proxy IP addresses or CIDR blocks
+        """
+        addresses = set()
+        networks = []
+        for proxy in proxies:
+            try:
+                network = ipaddress.ip_network(proxy, strict=False)
+            except ValueError as e:
+                logger.error("Invalid trusted proxy '%s': %s", proxy, e)
+                continue
+            if network.num_addresses == 1:
+                addresses.add(str(network.network_address))
+            else:
+                networks.append(network)
+
+        self.trusted_proxies = frozenset(addresses)
+        self._trusted_networks = tuple(networks)
+
+    def _is_trusted_proxy(self, address: str) -> bool:
+        """Check if an address is a trusted proxy.
+
+        Args:
+            address: Immediate client IP address
+
+        Returns:
+            True if the address is a trusted proxy
+        """
+        if address in self.trusted_proxies:
+            return True
+        if not self._trusted_networks:
+            return False
+        try:
+            parsed = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(parsed in network for network in self._trusted_networks)
+
+    def get_client_identifier(self, scope: Scope) -> str:
+        """Get client identifier for rate limiting, honoring trusted proxy headers.
+
+        Args:
+            scope: ASGI HTTP scope
 
         Returns:
             Client identifier (IP address)
         """
         # Get the immediate client IP
-        immediate_client = request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        immediate_client = client[0] if client else "unknown"
 
         # Only trust forwarded headers if they come from trusted proxies
-        if self.trusted_proxies and immediate_client in self.trusted_proxies:
+        if self._is_trusted_proxy(immediate_client):
+            forwarded_for = real_ip = None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for" and forwarded_for is None:
+                    forwarded_for = value
+                elif name == b"x-real-ip" and real_ip is None:
+                    real_ip = value
+
             # Check for forwarded headers from trusted proxy
-            forwarded_for = request.headers.get("X-Forwarded-For")
             if forwarded_for:
-                client_ip = forwarded_for.split(",")[0].strip()
-                return client_ip
+                return forwarded_for.decode("latin-1").split(",")[0].strip()
 
             # Check for real IP header from trusted proxy
-            real_ip = request.headers.get("X-Real-IP")
             if real_ip:
-                return real_ip.strip()
+                return real_ip.decode("latin-1").strip()
 
         # Use immediate client IP if no trusted proxy headers
         return immediate_client
 
-    def _should_bypass_check(self, path: str) -> bool:
+    def should_bypass(self, path: str) -> bool:
         """Check if path should bypass rate limiting.
 
         Args:
@@ -89,35 +326,40 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         Returns:
             True if should bypass check
         """
-        return any(path.startswith(bypass_path) for bypass_path in self.bypass_paths)
+        return path.startswith(self._bypass_tuple)
 
     def _cleanup_expired_entries(self, current_time: float) -> None:
-        """Clean up expired entries from client tracking.
+        """Evict clients whose buckets have been idle long enough to refill.
+
+        A fully refilled bucket is indistinguishable from a new one, so these
+        entries can be dropped. Clients are kept in least recently used order,
+        so eviction stops at the first client that is still refilling.
 
         Args:
-            current_time: Current timestamp
+            current_time: Current monotonic timestamp
         """
-        expired_clients = []
-
-        for client_id, client_data in self.clients.items():
-            # Remove entries older than the period
-            requests_list = client_data["requests"]
-            client_data["requests"] = [
-                req_time for req_time in requests_list
-                if current_time - req_time < self.period
-            ]
-
-            # Mark client for removal if no recent requests
-            if not client_data["requests"]:
-                expired_clients.append(client_id)
-
-        # Remove expired clients
-        for client_id in expired_clients:
+        while self.clients:
+            client_id, (_, last_refill) = next(iter(self.clients.items()))
+            if current_time - last_refill < self.full_refill_time:
+                break
             del self.clients[client_id]
 
+    def _schedule_cleanup(self) -> None:
+        """Evict idle clients once per period, off the request path."""
+        self._cleanup_loop = asyncio.get_running_loop()
+        self._cleanup_handle = self._cleanup_loop.call_later(self.period, self._run_cleanup)
+
+    def _run_cleanup(self) -> None:
+        """Evict idle clients and schedule the next pass."""
+        self._cleanup_expired_entries(time.monotonic())
+        self._schedule_cleanup()
+
     async def _is_rate_limited_redis(self, client_id: str) -> tuple[bool, int, float]:
         """Check if client is rate limited using Redis.
 
+        Each check is a single script call: a fixed-window counter by default,
+        or a sliding log when ``sliding_window`` is enabled.
+
         Args:
             client_id: Client identifier
 
@@ -125,43 +367,35 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             Tuple of (is_limited, remaining_calls, reset_time)
         """
         current_time = time.time()
-        key = f"rate_limit:{client_id}"
 
         try:
-            # Use Redis atomic operations for thread safety
-            pipe = self.redis_client.pipeline()
-            pipe.zremrangebyscore(key, 0, current_time - self.period)  # Remove expired entries
-            pipe.zcard(key)  # Count current entries
-            pipe.expire(key, self.period)  # Set expiration
-            results = await pipe.execute()
-
-            current_count = results[1]
-
-            if current_count >= self.calls:
-                # Get the oldest request to calculate reset time
-                oldest_requests = await self.redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest_requests:
-                    reset_time = oldest_requests[0][1] + self.period
-                else:
-                    reset_time = current_time + self.period
-                return True, 0, reset_time
-
-            # Add current request
-            await self.redis_client.zadd(key, {str(current_time): current_time})
-            await self.redis_client.expire(key, self.period)
-
-            remaining_calls = self.calls - (current_count + 1)
-            reset_time = current_time + self.period
-
-            return False, remaining_calls, reset_time
+            if self.sliding_window:
+                # Wall-clock milliseconds so scores agree across instances
+                now_ms = time.time_ns() // 1_000_000
+                limited, remaining, reset_ms = await self._redis_batcher.run(
+                    keys=[f"rate_limit:{client_id}"],
+                    args=[now_ms, self.period * 1000, self.calls, f"{now_ms}-{os.urandom(6).hex()}"]
+                )
+                return bool(limited), remaining, reset_ms / 1000
+
+            # Window number in the key rotates counters without any cleanup commands
+            key = f"rate_limit:{client_id}:{int(current_time // self.period)}"
+            count, ttl_ms = await self._redis_batcher.run(
+                keys=[key], args=[self.period * 1000]
+            )
+            reset_time = current_time + max(ttl_ms, 0) / 1000
+            return count > self.calls, max(0, self.calls - count), reset_time
 
         except Exception as e:
-            logger.error(f"Redis rate limiting error: {e}")
+            logger.error("Redis rate limiting error: %s", e)
             # Fallback to in-memory rate limiting
             return self._is_rate_limited_memory(client_id)
 
     def _is_rate_limited_memory(self, client_id: str) -> tuple[bool, int, float]:
-        """Check if client is rate limited using thread-safe in-memory storage.
+        """Check if client is rate limited using in-memory token buckets.
+
+        The check never awaits, so it runs atomically on the event loop and
+        needs no lock.
 
         Args:
             client_id: Client identifier
@@ -169,46 +403,22 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         Returns:
             Tuple of (is_limited, remaining_calls, reset_time)
         """
-        current_time = time.time()
-
-        with self._lock:
-            # Clean up expired entries periodically
-            if len(self.clients) > 1000:  # Cleanup threshold
-                self._cleanup_expired_entries(current_time)
-
-            # Initialize client data if not exists
-            if client_id not in self.clients:
-                self.clients[client_id] = {
-                    "requests": [],
-                    "first_request": current_time
-                }
-
-            client_data = self.clients[client_id]
-
-            # Remove requests older than the period
-            requests_list = client_data["requests"]
-            client_data["requests"] = [
-                req_time for req_time in requests_list
-                if current_time - req_time < self.period
-            ]
-
-            # Check if rate limit exceeded
-            if len(client_data["requests"]) >= self.calls:
-                oldest_request = min(client_data["requests"])
-                reset_time = oldest_request + self.period
-                return True, 0, reset_time
+        current_time = time.monotonic()
+        tokens, last_refill = self.clients.pop(client_id, (self.capacity, current_time))
+        tokens = min(self.capacity, tokens + (current_time - last_refill) * self.refill_per_sec)
 
-            # Add current request
-            client_data["requests"].append(current_time)
+        if tokens < 1:
+            self.clients[client_id] = (tokens, current_time)
+            # Reset when the next token becomes available
+            return True, 0, time.time() + (1 - tokens) / self.refill_per_sec
 
-            # Calculate remaining calls and reset time
-            remaining_calls = self.calls - len(client_data["requests"])
-            oldest_request = min(client_data["requests"]) if client_data["requests"] else current_time
-            reset_time = oldest_request + self.period
+        tokens -= 1
+        self.clients[client_id] = (tokens, current_time)
 
-            return False, remaining_calls, reset_time
+        # Reset when the bucket is full again
+        return False, int(tokens), time.time() + (self.capacity - tokens) / self.refill_per_sec
 
-    async def _is_rate_limited(self, client_id: str) -> tuple[bool, int, float]:
+    async def is_rate_limited(self, client_id: str) -> tuple[bool, int, float]:
         """Check if client is rate limited.
 
         Args:
@@ -217,62 +427,162 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         Returns:
             Tuple of (is_limited, remaining_calls, reset_time)
         """
+        if self._cleanup_loop is not asyncio.get_running_loop():
+            # First check, or the previous loop is gone (e.g. a new test client)
+            self.close()
+            self._schedule_cleanup()
+
         if self.redis_client:
             return await self._is_rate_limited_redis(client_id)
         else:
             return self._is_rate_limited_memory(client_id)
 
-    async def dispatch(self, request: Request, call_next: Any) -> Response:
-        """Process request and apply rate limiting.
+    def close(self) -> None:
+        """Cancel the periodic cleanup; the next check schedules it again."""
+        if self._cleanup_handle is not None:
+            self._cleanup_handle.cancel()
+        self._cleanup_handle = None
+        self._cleanup_loop = None
+
+    def lifespan_send(self, send: Send) -> Send:
+        """Wrap a lifespan send callable to close the limiter on shutdown.
+
+        Args:
+            send: ASGI send callable of a lifespan scope
+
+        Returns:
+            Send callable that closes the limiter once the app has shut down
+        """
+        async def send_and_close(message: Message) -> None:
+            if message["type"] in ("lifespan.shutdown.complete", "lifespan.shutdown.failed"):
+                self.close()
+            await send(message)
+
+        return send_and_close
+
+    def rate_limited_response(self, reset_time: float) -> Response:
+        """Build the 429 response for a client over its limit.
+
+        Args:
+            reset_time: Timestamp when the client's window resets
+
+        Returns:
+            Rate limit error response
+        """
+        retry_after = int(reset_time - time.time())
+        return Response(
+            content=self._limited_body_template % retry_after,
+            status_code=429,
+            media_type="application/json",
+            headers={
+                **self._limited_headers,
+                "X-RateLimit-Reset": str(int(reset_time)),
+                "Retry-After": str(retry_after)
+            }
+        )
+
+    async def check(self, scope: Scope) -> tuple[Optional[Response], tuple[tuple[bytes, bytes], ...]]:
+        """Apply the rate limit to an HTTP request.
 
         Args:
-            request: Incoming request
-            call_next: Next middleware in chain
+            scope: ASGI HTTP scope
 
         Returns:
-            Response or rate limit error
+            Tuple of (rate limit error response or None, headers to add to an
+            allowed response)
         """
-        # Skip rate limiting for bypass paths
-        if self._should_bypass_check(request.url.path):
-            return await call_next(request)
+        path = scope["path"]
+        # Skip rate limiting when disabled and for bypass paths
+        if not self.enabled or self.should_bypass(path):
+            return None, ()
 
         # Get client identifier
-        client_id = self._get_client_identifier(request)
+        client_id = self.get_client_identifier(scope)
 
         # Check rate limit
-        is_limited, remaining_calls, reset_time = await self._is_rate_limited(client_id)
+        is_limited, remaining_calls, reset_time = await self.is_rate_limited(client_id)
 
         if is_limited:
-            logger.warning(
-                f"Rate limit exceeded for client {client_id} on {request.url.path}"
-            )
+            logger.warning("Rate limit exceeded for client %s on %s", client_id, path)
+            return self.rate_limited_response(reset_time), ()
 
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Too many requests. Limit: {self.calls} per {self.period} seconds",
-                    "retry_after": int(reset_time - time.time())
-                },
-                headers={
-                    "X-RateLimit-Limit": str(self.calls),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(reset_time)),
-                    "Retry-After": str(int(reset_time - time.time()))
-                }
-            )
+        return None, (
+            (b"x-ratelimit-limit", self._limit_header),
+            (b"x-ratelimit-remaining", str(remaining_calls).encode("latin-1")),
+            (b"x-ratelimit-reset", str(int(reset_time)).encode("latin-1")),
+        )
 
-        # Continue to next middleware
-        response = await call_next(request)
 
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(self.calls)
-        response.headers["X-RateLimit-Remaining"] = str(remaining_calls)
-        response.headers["X-RateLimit-Reset"] = str(int(reset_time))
+class RateLimitMiddleware:
+    """Pure ASGI middleware to implement token bucket rate limiting per client IP."""
 
-        logger.debug(
-            f"Request processed for client {client_id}: "
-            f"{remaining_calls} calls remaining"
+    def __init__(
+        self,
+        app: ASGIApp,
+        calls: int = 100,
+        period: int = 60,
+        bypass_paths: Optional[List[str]] = None,
+        redis_client=None,
+        trusted_proxies: Optional[List[str]] = None,
+        capacity: Optional[int] = None,
+        refill_per_sec: Optional[float] = None,
+        sliding_window: bool = False
+    ) -> None:
+        """Initialize rate limiting middleware.
+
+        Args:
+            app: ASGI application
+            calls: Number of calls allowed per period
+            period: Time period in seconds
+            bypass_paths: List of paths that bypass rate limiting
+            redis_client: Redis client for distributed rate limiting
+            trusted_proxies: List of trusted proxy IP addresses or CIDR blocks
+            capacity: Token bucket size (burst allowance), defaults to calls
+            refill_per_sec: Tokens added per second, defaults to calls / period
+            sliding_window: Use a strict sliding log in Redis instead of a fixed
+                window counter, at the cost of one sorted set entry per request
+        """
+        self.app = app
+        self.limiter = RateLimiter(
+            calls=calls,
+            period=period,
+            bypass_paths=bypass_paths,
+            redis_client=redis_client,
+            trusted_proxies=trusted_proxies,
+            capacity=capacity,
+            refill_per_sec=refill_per_sec,
+            sliding_window=sliding_window
         )
 
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Apply rate limiting to an HTTP request.
+
+        Args:
+            scope: ASGI scope
+            receive: ASGI receive callable
+            send: ASGI send callable
+        """
+        if scope["type"] == "lifespan":
+            await self.app(scope, receive, self.limiter.lifespan_send(send))
+            return
+
+        # Skip rate limiting for non-HTTP traffic
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        error_response, rate_limit_headers = await self.limiter.check(scope)
+        if error_response is not None:
+            await error_response(scope, receive, send)
+            return
+
+        if not rate_limit_headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *rate_limit_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
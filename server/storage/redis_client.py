@@ -1,16 +1,28 @@
 """Redis client for caching and storage."""
 
+import asyncio
 import logging
 from typing import Dict, Optional, Union
 from urllib.parse import urlparse
 
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
+from redis.commands.core import AsyncScript
 
 from server.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Increment a counter and start its TTL when the increment created it.
+# ARGV is {amount, ttl_ms}. Returns the new value.
+_INCR_WITH_TTL_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value == tonumber(ARGV[1]) then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
 
 class RedisClient:
     """Async Redis client wrapper with connection management."""
@@ -20,17 +32,29 @@ class RedisClient:
         self._pool: Optional[ConnectionPool] = None
         self._client: redis.Optional[Redis] = None
         self._url = settings.redis_url
+        self._parsed = urlparse(self._url)
         self._password = settings.redis_password
         self._ssl = settings.redis_ssl
+        self._max_connections = settings.redis_max_connections
+        self._connect_lock = asyncio.Lock()
+        self._incr_ttl_script: Optional[AsyncScript] = None
 
     async def _ensure_connection(self) -> redis.Redis:
         """Ensure Redis connection is established.
 
+        Once connected this is a plain attribute check. Only the first
+        connect takes the lock, so concurrent callers share one pool.
+
         Returns:
             Redis client instance
         """
-        if self._client is None:
-            await self._create_connection()
+        client = self._client
+        if client is not None:
+            return client
+
+        async with self._connect_lock:
+            if self._client is None:
+                await self._create_connection()
         if self._client is None:
             raise RuntimeError("Failed to establish Redis connection")
         return self._client
@@ -38,23 +62,26 @@ class RedisClient:
     async def _create_connection(self) -> None:
         """Create Redis connection pool and client."""
         try:
-            # Parse Redis URL
-            parsed_url = urlparse(self._url)
+            parsed_url = self._parsed
 
-            # Create connection pool
+            # Create connection pool; RESP is parsed by hiredis when it is installed
             pool_kwargs = {
                 "password": self._password if self._password else None,
                 "decode_responses": False,  # Handle encoding manually
-                "max_connections": 20,
+                "max_connections": self._max_connections,
                 "retry_on_timeout": True,
                 "socket_timeout": 5,
                 "socket_connect_timeout": 5
             }
 
-            # Add SSL settings only if SSL is enabled
-            if self._ssl:
-                pool_kwargs["ssl"] = True
-                pool_kwargs["ssl_cert_reqs"] = None
+            # unix:// URLs use a local socket, where TCP keepalive and SSL do not apply
+            if parsed_url.scheme != "unix":
+                pool_kwargs["socket_keepalive"] = True
+
+                # Add SSL settings only if SSL is enabled
+                if self._ssl:
+                    pool_kwargs["ssl"] = True
+                    pool_kwargs["ssl_cert_reqs"] = None
 
             self._pool = ConnectionPool.from_url(self._url, **pool_kwargs)
 
@@ -64,7 +91,10 @@ class RedisClient:
             # Test connection
             await self._client.ping()
 
-            logger.info(f"Redis connected to {parsed_url.hostname}:{parsed_url.port}")
+            if parsed_url.scheme == "unix":
+                logger.info(f"Redis connected to unix socket {parsed_url.path}")
+            else:
+                logger.info(f"Redis connected to {parsed_url.hostname}:{parsed_url.port}")
 
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
@@ -81,8 +111,7 @@ class RedisClient:
         """
         try:
             client = await self._ensure_connection()
-            result = await client.get(key)
-            return result if result is None else bytes(result)
+            return await client.get(key)
         except Exception as e:
             logger.error(f"Redis GET failed for key '{key}': {e}")
             return None
@@ -181,6 +210,25 @@ class RedisClient:
             logger.error(f"Redis TTL failed for key '{key}': {e}")
             return -2
 
+    async def get_with_ttl(self, key: str) -> tuple[Optional[bytes], int]:
+        """Get value and time to live for key in one round trip.
+
+        Args:
+            key: Redis key
+
+        Returns:
+            Value as bytes or None if not found, and TTL in seconds as
+            returned by ttl()
+        """
+        try:
+            client = await self._ensure_connection()
+            pipe = client.pipeline(transaction=False)
+            value, ttl = await pipe.get(key).ttl(key).execute()
+            return value, int(ttl)
+        except Exception as e:
+            logger.error(f"Redis GET/TTL failed for key '{key}': {e}")
+            return None, -2
+
     async def expire(self, key: str, time: int) -> bool:
         """Set expiration for key.
 
@@ -217,6 +265,30 @@ class RedisClient:
             logger.error(f"Redis INCR failed for key '{key}': {e}")
             return None
 
+    async def incr_with_ttl(self, key: str, ttl_ms: int, amount: int = 1) -> Optional[int]:
+        """Increment key value, setting its TTL when the key is created.
+
+        Both happen in one round trip. The script is sent by EVALSHA and
+        reloaded automatically if the server has flushed its script cache.
+
+        Args:
+            key: Redis key
+            ttl_ms: Expiration time in milliseconds, applied on creation only
+            amount: Increment amount
+
+        Returns:
+            New value or None if failed
+        """
+        try:
+            client = await self._ensure_connection()
+            if self._incr_ttl_script is None:
+                self._incr_ttl_script = client.register_script(_INCR_WITH_TTL_SCRIPT)
+            result = await self._incr_ttl_script(keys=[key], args=[amount, ttl_ms], client=client)
+            return int(result)
+        except Exception as e:
+            logger.error(f"Redis INCR with TTL failed for key '{key}': {e}")
+            return None
+
     async def hset(
         self,
         name: str,
@@ -251,14 +323,13 @@ class RedisClient:
         """
         try:
             client = await self._ensure_connection()
-            result = await client.hget(name, key)
-            return bytes(result) if result is not None else None
+            return await client.hget(name, key)
         except Exception as e:
             logger.error(f"Redis HGET failed for hash '{name}', field '{key}': {e}")
             return None
 
-    async def hgetall(self, name: str) -> dict[bytes, bytes]:
-        """Get all hash fields and values.
+    async def hgetall(self, name: str) -> dict[str, str]:
+        """Get all hash fields and values decoded as UTF-8.
 
         Args:
             name: Hash name
@@ -269,7 +340,24 @@ class RedisClient:
         try:
             client = await self._ensure_connection()
             result = await client.hgetall(name)
-            return {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v for k, v in result.items()}
+            # The pool never decodes responses, so every field and value is bytes
+            return {k.decode(): v.decode() for k, v in result.items()}
+        except Exception as e:
+            logger.error(f"Redis HGETALL failed for hash '{name}': {e}")
+            return {}
+
+    async def hgetall_bytes(self, name: str) -> dict[bytes, bytes]:
+        """Get all hash fields and values as raw bytes.
+
+        Args:
+            name: Hash name
+
+        Returns:
+            Dictionary of field-value pairs
+        """
+        try:
+            client = await self._ensure_connection()
+            return await client.hgetall(name)
         except Exception as e:
             logger.error(f"Redis HGETALL failed for hash '{name}': {e}")
             return {}
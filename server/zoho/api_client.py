@@ -2,17 +2,51 @@
 
 import asyncio
 import logging
-from typing import Any, Union, Optional, Dict, Type
+import random
+import time
+import weakref
+from typing import Any, AsyncIterator, Union, Optional, Dict, List, Tuple, Type
 from types import TracebackType
 
 import httpx
+import orjson
+
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+except ImportError:  # installed with the httpx[http2] extra
+    h2 = None
 
 from server.core.config import settings
-from server.core.exceptions import ZohoAPIError, ExternalAPIError, TemporaryError, TimeoutError
+from server.core.exceptions import ZohoAPIError, ExternalAPIError, TimeoutError
 from server.zoho.oauth_client import oauth_client
+from server.zoho.retry import parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+_USER_AGENT = "zoho-mcp-server/0.1.0"
+
+# Sent with bodies serialized by orjson; never mutated
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Bounds for retry waits, in seconds
+_MIN_RETRY_DELAY = 0.1
+_MAX_RETRY_AFTER = 30.0
+
+
+class _Retry:
+    """Returned by ``_handle_response`` when the request should be sent again."""
+
+    __slots__ = ("delay",)
+
+    def __init__(self, delay: Optional[float] = None) -> None:
+        """Initialize retry signal.
+
+        Args:
+            delay: Seconds to wait before the next attempt, or None to use
+                the client's jittered backoff
+        """
+        self.delay = delay
+
 
 class ZohoAPIClient:
     """HTTP client for Zoho APIs with authentication and retry logic."""
@@ -21,20 +55,45 @@ class ZohoAPIClient:
         """Initialize Zoho API client."""
         self.projects_base_url = settings.api_base_url
         self.workdrive_base_url = settings.workdrive_api_url
+        # Trailing slashes stripped once so building a URL is one concatenation
+        self._projects_base = self.projects_base_url.rstrip("/")
+        self._workdrive_base = self.workdrive_base_url.rstrip("/")
         self.timeout = httpx.Timeout(30.0, connect=10.0)
         self.max_retries = 3
-        self.retry_delays = [0.5, 1.0, 2.0]  # Exponential backoff
+        # Decorrelated jitter backoff: each wait is drawn from a window that
+        # grows from the previous one, so concurrent callers do not retry in step
+        self.retry_base_delay = 0.5
+        self.retry_max_delay = 5.0
         
-        # Connection pooling configuration
+        # Connection pooling configuration. Every pooled connection may stay
+        # warm, and idle ones are kept about as long as Zoho keeps them open.
         self.limits = httpx.Limits(
-            max_connections=100,      # Maximum number of connections to pool
-            max_keepalive_connections=20,  # Maximum number of keep-alive connections
-            keepalive_expiry=30.0     # Keep-alive expiry time in seconds
+            max_connections=settings.zoho_max_conn,
+            max_keepalive_connections=settings.zoho_max_conn,
+            keepalive_expiry=settings.zoho_keepalive
         )
         
+        # Circuit breaker per (use_workdrive, method): after breaker_threshold
+        # consecutive failures, calls fail fast for breaker_cooldown seconds
+        # and then one trial request is let through
+        self.breaker_threshold = 5
+        self.breaker_cooldown = 30.0
+        self._breaker: Dict[Tuple[bool, str], Dict[str, float]] = {}
+
+        # GETs currently on the wire, so identical concurrent reads share one
+        self._inflight: Dict[Tuple[Any, ...], asyncio.Task] = {}
+        # Responses of GETs made with cache_ttl, as (expiry, data), oldest first
+        self._get_cache: Dict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]] = {}
+        self.get_cache_size = 1024
+
         # Shared HTTP client with connection pooling
         self._client: Optional[httpx.AsyncClient] = None
 
+        # Authorization headers for the most recent token, rebuilt when it changes.
+        # Shared between requests, so callers must copy before adding to it.
+        self._auth_token: Optional[str] = None
+        self._auth_headers: Dict[str, str] = {}
+
         logger.info("Zoho API client initialized")
 
     async def _get_client(self) -> httpx.AsyncClient:
@@ -47,12 +106,26 @@ class ZohoAPIClient:
             self._client = httpx.AsyncClient(
                 timeout=self.timeout,
                 limits=self.limits,
+                # Concurrent requests to a host share one connection as HTTP/2 streams
+                http2=h2 is not None,
                 follow_redirects=True,
-                headers={"User-Agent": "Zoho-MCP-Server/1.0"}
+                headers={"User-Agent": _USER_AGENT}
             )
             logger.debug("Created new HTTP client with connection pooling")
         return self._client
 
+    def _backoff(self, previous: float) -> float:
+        """Pick the next retry delay with decorrelated jitter.
+
+        Args:
+            previous: The previous delay, or ``retry_base_delay`` before the
+                first retry
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        return random.uniform(_MIN_RETRY_DELAY, min(self.retry_max_delay, previous * 3))
+
     async def close(self) -> None:
         """Close the HTTP client and clean up connections."""
         if self._client and not self._client.is_closed:
@@ -73,23 +146,39 @@ class ZohoAPIClient:
         await self.close()
 
     async def _get_headers(self, use_workdrive: bool = False) -> Dict[str, str]:
-        """Get request headers with authentication token.
+        """Get per-request headers with authentication token.
+
+        User-Agent is set once on the shared HTTP client, and httpx adds
+        Content-Type for whichever body a request carries.
 
         Args:
             use_workdrive: Whether this is for WorkDrive API
 
         Returns:
-            Headers dictionary
+            Headers dictionary, shared between requests and not to be mutated
         """
-        access_token = await oauth_client.get_access_token()
+        # A token close to expiry is still used while it refreshes in the background
+        access_token = await oauth_client.get_access_token(allow_stale=True)
+        if access_token != self._auth_token:
+            self._auth_token = access_token
+            self._auth_headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
+
+        return self._auth_headers
 
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {access_token}",
-            "Content-Type": "application/json",
-            "User-Agent": "zoho-mcp-server/0.1.0"
-        }
+    def _build_url(self, endpoint: str, use_workdrive: bool) -> str:
+        """Join an endpoint to the Projects or WorkDrive base URL.
 
-        return headers
+        Args:
+            endpoint: API endpoint, with or without a leading slash
+            use_workdrive: Use WorkDrive base URL
+
+        Returns:
+            Absolute request URL
+        """
+        base = self._workdrive_base if use_workdrive else self._projects_base
+        if endpoint.startswith("/"):
+            return base + endpoint
+        return f"{base}/{endpoint}"
 
     async def _make_request(
         self,
@@ -114,19 +203,103 @@ class ZohoAPIClient:
         Raises:
             ZohoAPIError: If API request fails
         """
-        base_url = self.workdrive_base_url if use_workdrive else self.projects_base_url
-        url = f"{base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        url = self._build_url(endpoint, use_workdrive)
 
-        headers = await self._get_headers(use_workdrive)
+        breaker_key = (use_workdrive, method)
+        self._check_breaker(breaker_key)
 
-        # Merge headers with any provided headers
-        if "headers" in kwargs:
-            headers.update(kwargs.pop("headers"))
+        try:
+            result = await self._send(
+                method,
+                url,
+                use_workdrive,
+                self.max_retries if retry else 1,
+                kwargs.pop("headers", None),
+                kwargs
+            )
+        except (TimeoutError, ExternalAPIError) as e:
+            # Only outages count; a 4xx means Zoho is up and answering
+            status_code = getattr(e, "status_code", None)
+            if status_code is None or status_code >= 500:
+                self._record_failure(breaker_key)
+            else:
+                self._breaker.pop(breaker_key, None)
+            raise
+
+        self._breaker.pop(breaker_key, None)
+        return result
 
+    def _check_breaker(self, key: Tuple[bool, str]) -> None:
+        """Fail fast while the circuit for this kind of request is open.
+
+        Args:
+            key: (use_workdrive, method) circuit key
+
+        Raises:
+            ExternalAPIError: If the circuit is open
+        """
+        state = self._breaker.get(key)
+        if state is None or state["failures"] < self.breaker_threshold:
+            return
+
+        now = time.monotonic()
+        if now - state["opened_at"] < self.breaker_cooldown:
+            raise ExternalAPIError("Zoho API is unavailable, failing fast", service="zoho_api")
+
+        # Half-open: this request is the trial, everyone else keeps failing fast
+        state["opened_at"] = now
+
+    def _record_failure(self, key: Tuple[bool, str]) -> None:
+        """Count a failed request and open the circuit at the threshold.
+
+        Args:
+            key: (use_workdrive, method) circuit key
+        """
+        state = self._breaker.setdefault(key, {"failures": 0, "opened_at": 0.0})
+        state["failures"] += 1
+        if state["failures"] >= self.breaker_threshold:
+            state["opened_at"] = time.monotonic()
+            logger.warning(
+                "Zoho API circuit open for %s %s after %d failures",
+                key[1], "WorkDrive" if key[0] else "Projects", int(state["failures"])
+            )
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        use_workdrive: bool,
+        max_attempts: int,
+        extra_headers: Optional[Dict[str, str]],
+        kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Send a request, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            use_workdrive: Whether this is for WorkDrive API
+            max_attempts: Maximum number of attempts
+            extra_headers: Headers to add to the authentication header
+            kwargs: Additional request arguments
+
+        Returns:
+            API response data
+
+        Raises:
+            ZohoAPIError: If API request fails
+            ExternalAPIError: If the network keeps failing
+            TimeoutError: If the request keeps timing out
+        """
         attempt = 0
-        max_attempts = self.max_retries if retry else 1
+        delay = self.retry_base_delay
 
         while attempt < max_attempts:
+            # Fetched per attempt so a retry after a 401 uses the refreshed token
+            headers = await self._get_headers(use_workdrive)
+            if extra_headers:
+                headers = {**headers, **extra_headers}
+
             try:
                 client = await self._get_client()
                 logger.debug(f"Making {method} request to {url} (attempt {attempt + 1})")
@@ -138,14 +311,13 @@ class ZohoAPIClient:
                     **kwargs
                 )
 
-                return await self._handle_response(response, attempt, max_attempts)
-
             except httpx.TimeoutException as e:
                 attempt += 1
                 if attempt >= max_attempts:
                     logger.error(f"Request timed out after {max_attempts} attempts: {e}")
                     raise TimeoutError(f"Request timed out: {e}", timeout_duration=self.timeout.connect) from e
-                    
+                continue
+
             except httpx.RequestError as e:
                 attempt += 1
                 if attempt >= max_attempts:
@@ -153,15 +325,28 @@ class ZohoAPIClient:
                     raise ExternalAPIError(f"Network error: {e}", service="zoho_api") from e
 
                 # Wait before retry
-                await asyncio.sleep(self.retry_delays[min(attempt - 1, len(self.retry_delays) - 1)])
+                delay = self._backoff(delay)
+                await asyncio.sleep(delay)
                 logger.warning(f"Request failed, retrying ({attempt}/{max_attempts}): {e}")
+                continue
+
+            result = await self._handle_response(response, attempt, max_attempts)
+            if not isinstance(result, _Retry):
+                return result
+
+            attempt += 1
+            if result.delay is None:
+                delay = self._backoff(delay)
+                await asyncio.sleep(delay)
+            elif result.delay > 0:
+                await asyncio.sleep(result.delay)
 
     async def _handle_response(
         self,
         response: httpx.Response,
         attempt: int,
         max_attempts: int
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], _Retry]:
         """Handle API response and errors.
 
         Args:
@@ -170,7 +355,8 @@ class ZohoAPIClient:
             max_attempts: Maximum attempts
 
         Returns:
-            Parsed response data
+            Parsed response data, or a ``_Retry`` when the request should be
+            sent again after the given delay
 
         Raises:
             ZohoAPIError: If response indicates error
@@ -180,21 +366,26 @@ class ZohoAPIClient:
 
         # Handle success responses
         if 200 <= response.status_code < 300:
+            content = response.content
+            # 204s and many PUT/DELETE responses have no body at all
+            if not content:
+                return {}
             try:
-                return response.json()
-            except Exception:
-                # Some endpoints return empty responses
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                logger.debug("Non-JSON %d response from %s", response.status_code, response.url)
                 return {}
 
         # Handle rate limiting
         if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 60))
             if attempt < max_attempts - 1:
-                logger.warning(f"Rate limited, waiting {retry_after} seconds")
-                await asyncio.sleep(retry_after)
-                raise TemporaryError("Rate limited, retrying", retry_after=retry_after)
-            else:
-                raise ZohoAPIError("Rate limit exceeded", 429, response.text)
+                # Capped so one response cannot stall a tool call for minutes,
+                # and jittered so waiting callers do not all return at once
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = min(retry_after, _MAX_RETRY_AFTER) + random.uniform(0, 0.25)
+                logger.warning(f"Rate limited, waiting {delay:.1f} seconds")
+                return _Retry(delay)
+            raise ZohoAPIError("Rate limit exceeded", 429, response.text)
 
         # Handle authentication errors
         if response.status_code == 401:
@@ -202,17 +393,18 @@ class ZohoAPIClient:
             try:
                 # Force refresh token and retry once
                 await oauth_client.get_access_token(force_refresh=True)
-                if attempt < max_attempts - 1:
-                    raise TemporaryError("Authentication failed, retrying with new token")
             except Exception as e:
                 logger.error(f"Token refresh failed: {e}")
+            else:
+                if attempt < max_attempts - 1:
+                    return _Retry(0.0)
 
             raise ZohoAPIError("Authentication failed", 401, response.text)
 
         # Handle other client errors
         if 400 <= response.status_code < 500:
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_message = error_data.get("message", response.text)
             except Exception:
                 error_message = response.text
@@ -223,13 +415,10 @@ class ZohoAPIClient:
         # Handle server errors
         if response.status_code >= 500:
             if attempt < max_attempts - 1:
-                # Retry on server errors
-                delay = self.retry_delays[min(attempt, len(self.retry_delays) - 1)]
-                logger.warning(f"Server error {response.status_code}, retrying in {delay}s")
-                await asyncio.sleep(delay)
-                raise Exception(f"Server error {response.status_code}, retrying")
-            else:
-                raise ZohoAPIError(f"Server error: {response.status_code}", response.status_code, response.text)
+                # Retry on server errors after a backoff
+                logger.warning(f"Server error {response.status_code}, retrying")
+                return _Retry()
+            raise ZohoAPIError(f"Server error: {response.status_code}", response.status_code, response.text)
 
         # Unexpected status code
         raise ZohoAPIError(f"Unexpected response: {response.status_code}", response.status_code, response.text)
@@ -240,7 +429,8 @@ class ZohoAPIClient:
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
         use_workdrive: bool = False,
-        retry: bool = True
+        retry: bool = True,
+        cache_ttl: float = 0
     ) -> Dict[str, Any]:
         """Make GET request to Zoho API.
 
@@ -250,24 +440,138 @@ class ZohoAPIClient:
             headers: Additional headers
             use_workdrive: Use WorkDrive API
             retry: Enable retry logic
+            cache_ttl: Seconds to reuse a successful response for; 0 disables
+                caching. Meant for data that rarely changes
 
         Returns:
-            API response data
+            API response data. Concurrent identical GETs share one request
+            and receive the same object, as do cache hits, so callers must
+            not modify it.
         """
-        kwargs = {}
-        if params:
-            kwargs["params"] = params
-        if headers:
-            kwargs["headers"] = headers
+        kwargs: Dict[str, Any] = {}
+        if not params and not headers:
+            # The common get(endpoint) shape: nothing to assemble or hash
+            key: Optional[Tuple[Any, ...]] = (endpoint, use_workdrive, None)
+        else:
+            key = None
+            if params:
+                kwargs["params"] = params
+            if headers:
+                kwargs["headers"] = headers
+            else:
+                try:
+                    key = (endpoint, use_workdrive, frozenset(params.items()))
+                except TypeError:
+                    pass  # Unhashable parameter values are neither deduplicated nor cached
+
+        if key is not None and cache_ttl > 0:
+            cached = self._get_cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+        if key is None or not retry:
+            result = await self._make_request(
+                "GET",
+                endpoint,
+                use_workdrive=use_workdrive,
+                retry=retry,
+                **kwargs
+            )
+        else:
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._make_request(
+                    "GET",
+                    endpoint,
+                    use_workdrive=use_workdrive,
+                    retry=retry,
+                    **kwargs
+                ))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
 
-        return await self._make_request(
-            "GET",
-            endpoint,
-            use_workdrive=use_workdrive,
-            retry=retry,
-            **kwargs
+            # Shielded so one caller giving up does not cancel the others
+            result = await asyncio.shield(task)
+
+        if key is not None and cache_ttl > 0:
+            self._cache_response(key, result, cache_ttl)
+        return result
+
+    def _cache_response(self, key: Tuple[Any, ...], data: Dict[str, Any], ttl: float) -> None:
+        """Store a GET response, evicting the oldest entry when full.
+
+        Args:
+            key: Request cache key
+            data: Response data
+            ttl: Seconds the response stays valid
+        """
+        cache = self._get_cache
+        cache.pop(key, None)
+        if len(cache) >= self.get_cache_size:
+            del cache[next(iter(cache))]
+        cache[key] = (time.monotonic() + ttl, data)
+
+    async def get_many(
+        self,
+        calls: List[Tuple[str, Optional[Dict[str, Any]]]],
+        use_workdrive: bool = False
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """Make several independent GET requests concurrently.
+
+        Callers that need more than one resource should fetch them here
+        rather than awaiting each ``get`` in turn; the requests share the
+        pooled (and, with HTTP/2, multiplexed) connections.
+
+        Args:
+            calls: (endpoint, query parameters) pairs
+            use_workdrive: Use WorkDrive API
+
+        Returns:
+            One entry per call, in order: the response data, or the exception
+            that call raised
+        """
+        return await asyncio.gather(
+            *(self.get(endpoint, params=params, use_workdrive=use_workdrive) for endpoint, params in calls),
+            return_exceptions=True
         )
 
+    async def get_stream(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        use_workdrive: bool = False,
+        chunk_size: int = 65536
+    ) -> AsyncIterator[bytes]:
+        """Stream a GET response body in chunks instead of buffering it.
+
+        Meant for file contents and other large bodies. The request is not
+        retried, since a partly consumed stream cannot be replayed.
+
+        Args:
+            endpoint: API endpoint
+            params: Query parameters
+            use_workdrive: Use WorkDrive API
+            chunk_size: Maximum size of each yielded chunk in bytes
+
+        Yields:
+            Chunks of the response body
+
+        Raises:
+            ZohoAPIError: If the response status is not 2xx
+        """
+        url = self._build_url(endpoint, use_workdrive)
+        headers = await self._get_headers(use_workdrive)
+        client = await self._get_client()
+
+        async with client.stream("GET", url, params=params, headers=headers) as response:
+            if not 200 <= response.status_code < 300:
+                await response.aread()
+                raise ZohoAPIError(
+                    f"Stream request failed: {response.status_code}", response.status_code, response.text
+                )
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
     async def post(
         self,
         endpoint: str,
@@ -296,15 +600,19 @@ class ZohoAPIClient:
         request_headers = {}
 
         if files:
-            # For file uploads, don't set Content-Type (let httpx handle it)
-            request_headers.pop("Content-Type", None)
+            # httpx sets the multipart Content-Type with its boundary
             kwargs["files"] = files
 
         if data:
             kwargs["data"] = data
 
         if json:
-            kwargs["json"] = json
+            if files or data:
+                kwargs["json"] = json
+            else:
+                # Encoded once, as UTF-8 without ASCII escaping
+                kwargs["content"] = orjson.dumps(json, option=orjson.OPT_NON_STR_KEYS)
+                request_headers.update(_JSON_HEADERS)
 
         if headers:
             request_headers.update(headers)
@@ -340,13 +648,18 @@ class ZohoAPIClient:
         Returns:
             API response data
         """
+        kwargs = {}
+        if json is not None:
+            kwargs["content"] = orjson.dumps(json, option=orjson.OPT_NON_STR_KEYS)
+            headers = {**_JSON_HEADERS, **headers} if headers else _JSON_HEADERS
+
         return await self._make_request(
             "PUT",
             endpoint,
-            json=json,
             headers=headers,
             use_workdrive=use_workdrive,
-            retry=retry
+            retry=retry,
+            **kwargs
         )
 
     async def delete(
@@ -449,13 +762,18 @@ class ZohoAPIClient:
         Returns:
             API response data
         """
+        kwargs = {}
+        if json is not None:
+            kwargs["content"] = orjson.dumps(json, option=orjson.OPT_NON_STR_KEYS)
+            headers = {**_JSON_HEADERS, **headers} if headers else _JSON_HEADERS
+
         return await self._make_request(
             "PATCH",
             endpoint,
-            json=json,
             headers=headers,
             use_workdrive=use_workdrive,
-            retry=retry
+            retry=retry,
+            **kwargs
         )
 
     async def health_check(self) -> bool:
@@ -466,12 +784,38 @@ class ZohoAPIClient:
         """
         try:
             # Try to get user info as a health check
-            response = await self.get("/user", retry=False)
+            response = await self.get("/user", retry=False, cache_ttl=30.0)
             return response is not None
         except Exception as e:
             logger.error(f"Zoho API health check failed: {e}")
             return False
 
 
-# Create global instance
-zoho_client = ZohoAPIClient()
+# One client per event loop, since pooled connections belong to the loop that
+# opened them; an entry goes away with its loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ZohoAPIClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_zoho_client() -> ZohoAPIClient:
+    """Get the Zoho API client for the running event loop.
+
+    Returns:
+        Client shared by everything running on this loop
+
+    Raises:
+        RuntimeError: If no event loop is running
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = ZohoAPIClient()
+    return client
+
+
+async def close_zoho_client() -> None:
+    """Close the running event loop's Zoho API client, if it was created."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
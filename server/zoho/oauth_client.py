@@ -2,16 +2,24 @@
 
 import asyncio
 import logging
+import random
+import time
 from typing import Optional
 
 import httpx
+import orjson
 from pydantic import BaseModel
 
 from server.core.config import settings
 from server.storage.redis_client import redis_client
+from server.zoho.retry import parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Every OAuth endpoint lives on the accounts server
+_ACCOUNTS_URL = "https://accounts.zoho.com"
+_TOKEN_PATH = "/oauth/v2/token"
+
 
 class TokenResponse(BaseModel):
     """Zoho OAuth token response model."""
@@ -31,10 +39,25 @@ class ZohoOAuthClient:
         self.client_id = settings.zoho_client_id
         self.client_secret = settings.zoho_client_secret
         self.refresh_token = settings.zoho_refresh_token
-        self.token_url = "https://accounts.zoho.com/oauth/v2/token"
         self.cache_key = "zoho:access_token"
+        # Rejections of the refresh token are remembered briefly so a
+        # misconfigured deployment does not call Zoho on every request
+        self.negative_cache_key = "zoho:access_token:neg"
+        self.negative_cache_ttl = 30
         self.cache_ttl = settings.token_cache_ttl_seconds
 
+        # In-process copy of the current token so most calls skip Redis.
+        # Inside the stale window it is still served while a refresh runs.
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0  # time.monotonic() deadline
+        self.stale_window = 300.0
+        self._background_refresh: Optional[asyncio.Task] = None
+        # Refresh currently talking to Zoho, shared by every caller that needs it
+        self._refresh_inflight: Optional[asyncio.Task] = None
+
+        # Shared HTTP client so refresh, revoke and info calls reuse connections
+        self._http: Optional[httpx.AsyncClient] = None
+
         # Rate limiting configuration
         self.max_retries = 3
         self.base_delay = 1.0  # Base delay in seconds
@@ -45,6 +68,26 @@ class ZohoOAuthClient:
 
         logger.info("Zoho OAuth client initialized")
 
+    async def _get_http(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client for the accounts server.
+
+        Returns:
+            Shared HTTP client instance
+        """
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=_ACCOUNTS_URL,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30.0)
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the HTTP client and clean up connections."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+            logger.debug("OAuth HTTP client closed")
+
     def _validate_oauth_config(self) -> None:
         """Validate OAuth configuration.
 
@@ -60,11 +103,17 @@ class ZohoOAuthClient:
 
         logger.debug("OAuth configuration validated successfully")
 
-    async def get_access_token(self, force_refresh: bool = False) -> str:
+    async def get_access_token(
+        self,
+        force_refresh: bool = False,
+        allow_stale: bool = False
+    ) -> str:
         """Get valid access token, refreshing if necessary.
 
         Args:
             force_refresh: Force token refresh even if cached token exists
+            allow_stale: Return a token that is close to expiry right away and
+                refresh it in the background instead of waiting
 
         Returns:
             Valid access token
@@ -73,31 +122,127 @@ class ZohoOAuthClient:
             Exception: If token refresh fails
         """
         if not force_refresh:
+            token = self._token
+            if token is not None:
+                remaining = self._token_expires_at - time.monotonic()
+                if remaining > self.stale_window:
+                    return token
+                if remaining > 0 and allow_stale:
+                    self._schedule_refresh()
+                    return token
+
             # Try to get cached token
-            cached_token = await self._get_cached_token()
+            cached_token, ttl = await self._get_cached_token()
             if cached_token:
                 logger.debug("Using cached access token")
+                if ttl > 0:
+                    # The cache entry expires 5 minutes before the token does
+                    self._remember_token(cached_token, ttl + 300)
+                    # Refresh ahead of expiry, jittered by 10% so instances
+                    # sharing the cache do not all refresh in the same second
+                    if ttl < self.stale_window * random.uniform(0.9, 1.1):
+                        self._schedule_refresh()
                 return cached_token
 
         # Refresh token
         logger.info("Refreshing Zoho access token")
-        return await self._refresh_access_token()
+        return await self._refresh_once()
+
+    async def _refresh_once(self) -> str:
+        """Refresh the access token, sharing one request between concurrent callers.
+
+        Returns:
+            New access token
+
+        Raises:
+            Exception: If token refresh fails
+        """
+        task = self._refresh_inflight
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_access_token())
+            self._refresh_inflight = task
+            task.add_done_callback(lambda _: setattr(self, "_refresh_inflight", None))
+
+        # Shielded so one caller giving up does not cancel the others
+        return await asyncio.shield(task)
+
+    def _remember_token(self, access_token: str, expires_in: float) -> None:
+        """Keep the current token in process memory.
+
+        Args:
+            access_token: Access token
+            expires_in: Seconds until the token expires
+        """
+        self._token = access_token
+        self._token_expires_at = time.monotonic() + expires_in
+
+    def _forget_token(self) -> None:
+        """Drop the in-process token so the next call goes to Redis or Zoho."""
+        self._token = None
+        self._token_expires_at = 0.0
+
+    def _schedule_refresh(self) -> None:
+        """Start a background refresh unless one is already running."""
+        task = self._background_refresh
+        if task is None or task.done():
+            self._background_refresh = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self) -> None:
+        """Refresh the access token, logging instead of raising on failure.
+
+        The current token stays in use until it expires, after which callers
+        refresh synchronously and see the error themselves.
+        """
+        try:
+            await self._refresh_once()
+        except Exception as e:
+            logger.warning("Background token refresh failed: %s", e)
+
+    def _backoff(self, attempt: int) -> float:
+        """Get a full-jitter exponential backoff delay.
+
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+
+        Returns:
+            Seconds to wait, drawn uniformly so that instances retrying the
+            same failure do not all hit Zoho again at the same moment
+        """
+        return random.uniform(0, min(self.base_delay * (2 ** attempt), self.max_delay))
+
+    def _rate_limit_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Get the wait before retrying a rate-limited request.
+
+        Args:
+            response: 429 response from Zoho
+            attempt: Zero-based number of the attempt that was rate limited
+
+        Returns:
+            The server's Retry-After, capped and jittered by 10%, or the
+            backoff delay if it did not send one
+        """
+        retry_after = parse_retry_after(response.headers.get("Retry-After"), default=0.0)
+        if retry_after > 0:
+            return min(retry_after, self.max_delay) * random.uniform(0.9, 1.1)
+        return self._backoff(attempt)
 
-    async def _get_cached_token(self) -> Optional[str]:
-        """Get cached access token if valid.
+    async def _get_cached_token(self) -> tuple[Optional[str], int]:
+        """Get cached access token if valid, with the cache entry's TTL.
 
         Returns:
-            Cached token if valid, None otherwise
+            Cached token if valid, None otherwise, and its TTL in seconds
+            (negative if unknown)
         """
         try:
-            token_data = await redis_client.get(self.cache_key)
+            token_data, ttl = await redis_client.get_with_ttl(self.cache_key)
             if token_data:
                 # Token exists in cache
-                return token_data.decode('utf-8') if isinstance(token_data, bytes) else token_data
-            return None
+                token = token_data.decode('utf-8') if isinstance(token_data, bytes) else token_data
+                return token, ttl
+            return None, -2
         except Exception as e:
             logger.warning(f"Failed to get cached token: {e}")
-            return None
+            return None, -2
 
     async def _refresh_access_token(self) -> str:
         """Refresh access token using refresh token with rate limiting and retry logic.
@@ -106,75 +251,79 @@ class ZohoOAuthClient:
             New access token
 
         Raises:
-            Exception: If token refresh fails after all retries
+            Exception: If token refresh fails after all retries, or Zoho
+                rejected the refresh token within the negative cache TTL
         """
+        rejection = await redis_client.get(self.negative_cache_key)
+        if rejection:
+            if isinstance(rejection, bytes):
+                rejection = rejection.decode('utf-8')
+            raise Exception(f"Token refresh failed: {rejection} (cached)")
+
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient() as client:
-                    logger.debug(f"Token refresh attempt {attempt + 1}/{self.max_retries}")
-
-                    response = await client.post(
-                        self.token_url,
-                        data={
-                            "grant_type": "refresh_token",
-                            "client_id": self.client_id,
-                            "client_secret": self.client_secret,
-                            "refresh_token": self.refresh_token,
-                        },
-                        timeout=30.0
-                    )
-
-                    token_data = response.json()
-
-                    # Handle rate limiting (429 Too Many Requests)
-                    if response.status_code == 429:
-                        if attempt < self.max_retries - 1:
-                            # Get retry-after header or use exponential backoff
-                            retry_after = int(response.headers.get("Retry-After", 0))
-                            if retry_after > 0:
-                                delay = min(retry_after, self.max_delay)
-                            else:
-                                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-
-                            logger.warning(f"Rate limited (429), waiting {delay}s before retry {attempt + 2}")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            logger.error("Rate limit exceeded, no more retries available")
-                            raise Exception("Token refresh failed: 429 - Rate limit exceeded")
-
-                    # Check for other errors in response
-                    if response.status_code != 200 or "error" in token_data:
-                        error_detail = token_data.get("error", response.text)
-                        error_description = token_data.get("error_description", "Unknown error")
-
-                        # For non-retriable errors, don't retry
-                        if response.status_code in [400, 401, 403]:
-                            logger.error(f"Token refresh failed with non-retriable error: {response.status_code} - {error_detail}: {error_description}")
-                            await redis_client.delete(self.cache_key)
-                            raise Exception(f"Token refresh failed: {response.status_code} - {error_detail}: {error_description}")
-
-                        # For other server errors, retry with exponential backoff
-                        if attempt < self.max_retries - 1:
-                            delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                            logger.warning(f"Token refresh failed ({response.status_code}), retrying in {delay}s: {error_detail}")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            logger.error(f"Token refresh failed after all retries: {response.status_code} - {error_detail}: {error_description}")
-                            await redis_client.delete(self.cache_key)
-                            raise Exception(f"Token refresh failed: {response.status_code} - {error_detail}: {error_description}")
-
-                    # Success - parse and cache token
-                    token_response = TokenResponse(**token_data)
-                    await self._cache_token(token_response.access_token, token_response.expires_in)
-                    logger.info("Access token refreshed successfully")
-                    return token_response.access_token
+                client = await self._get_http()
+                logger.debug(f"Token refresh attempt {attempt + 1}/{self.max_retries}")
+
+                response = await client.post(
+                    _TOKEN_PATH,
+                    data={
+                        "grant_type": "refresh_token",
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret,
+                        "refresh_token": self.refresh_token,
+                    }
+                )
+
+                token_data = orjson.loads(response.content)
+
+                # Handle rate limiting (429 Too Many Requests)
+                if response.status_code == 429:
+                    if attempt < self.max_retries - 1:
+                        delay = self._rate_limit_delay(response, attempt)
+                        logger.warning(f"Rate limited (429), waiting {delay:.1f}s before retry {attempt + 2}")
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
+                        logger.error("Rate limit exceeded, no more retries available")
+                        raise Exception("Token refresh failed: 429 - Rate limit exceeded")
+
+                # Check for other errors in response
+                if response.status_code != 200 or "error" in token_data:
+                    error_detail = token_data.get("error", response.text)
+                    error_description = token_data.get("error_description", "Unknown error")
+
+                    # For non-retriable errors, don't retry
+                    if response.status_code in [400, 401, 403]:
+                        logger.error(f"Token refresh failed with non-retriable error: {response.status_code} - {error_detail}: {error_description}")
+                        self._forget_token()
+                        await redis_client.delete(self.cache_key)
+                        failure = f"{response.status_code} - {error_detail}: {error_description}"
+                        await redis_client.setex(self.negative_cache_key, self.negative_cache_ttl, failure)
+                        raise Exception(f"Token refresh failed: {failure}")
+
+                    # For other server errors, retry with exponential backoff
+                    if attempt < self.max_retries - 1:
+                        delay = self._backoff(attempt)
+                        logger.warning(f"Token refresh failed ({response.status_code}), retrying in {delay:.1f}s: {error_detail}")
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
+                        logger.error(f"Token refresh failed after all retries: {response.status_code} - {error_detail}: {error_description}")
+                        self._forget_token()
+                        await redis_client.delete(self.cache_key)
+                        raise Exception(f"Token refresh failed: {response.status_code} - {error_detail}: {error_description}")
+
+                # Success - only two fields are needed, so skip model validation
+                access_token = token_data["access_token"]
+                await self._cache_token(access_token, int(token_data["expires_in"]))
+                logger.info("Access token refreshed successfully")
+                return access_token
 
             except httpx.RequestError as e:
                 if attempt < self.max_retries - 1:
-                    delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                    logger.warning(f"Network error during token refresh, retrying in {delay}s: {e}")
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Network error during token refresh, retrying in {delay:.1f}s: {e}")
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -186,8 +335,8 @@ class ZohoOAuthClient:
                     raise
 
                 if attempt < self.max_retries - 1:
-                    delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                    logger.warning(f"Unexpected error during token refresh, retrying in {delay}s: {e}")
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Unexpected error during token refresh, retrying in {delay:.1f}s: {e}")
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -204,6 +353,8 @@ class ZohoOAuthClient:
             access_token: Access token to cache
             expires_in: Token expiration time in seconds
         """
+        self._remember_token(access_token, expires_in)
+
         try:
             # Cache for slightly less time than actual expiration to be safe
             cache_ttl = min(expires_in - 300, self.cache_ttl)  # 5 minutes buffer
@@ -229,35 +380,35 @@ class ZohoOAuthClient:
         """
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://accounts.zoho.com/oauth/v2/token/revoke",
-                        data={"token": token},
-                        timeout=30.0
-                    )
-
-                    if response.status_code == 200:
-                        # Remove from cache
-                        await redis_client.delete(self.cache_key)
-                        logger.info("Token revoked successfully")
-                        return True
-                    elif response.status_code == 429:
-                        if attempt < self.max_retries - 1:
-                            delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                            logger.warning(f"Rate limited during revocation, waiting {delay}s")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            logger.warning("Token revocation failed: Rate limit exceeded")
-                            return False
+                client = await self._get_http()
+                response = await client.post(
+                    f"{_TOKEN_PATH}/revoke",
+                    data={"token": token}
+                )
+
+                if response.status_code == 200:
+                    # Remove from cache
+                    self._forget_token()
+                    await redis_client.delete(self.cache_key)
+                    logger.info("Token revoked successfully")
+                    return True
+                elif response.status_code == 429:
+                    if attempt < self.max_retries - 1:
+                        delay = self._rate_limit_delay(response, attempt)
+                        logger.warning(f"Rate limited during revocation, waiting {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
                     else:
-                        logger.warning(f"Token revocation failed: {response.status_code}")
+                        logger.warning("Token revocation failed: Rate limit exceeded")
                         return False
+                else:
+                    logger.warning(f"Token revocation failed: {response.status_code}")
+                    return False
 
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                    logger.warning(f"Token revocation error, retrying in {delay}s: {e}")
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Token revocation error, retrying in {delay:.1f}s: {e}")
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -277,32 +428,31 @@ class ZohoOAuthClient:
         """
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        "https://accounts.zoho.com/oauth/v2/token/info",
-                        data={"access_token": token},
-                        timeout=30.0
-                    )
-
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 429:
-                        if attempt < self.max_retries - 1:
-                            delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                            logger.warning(f"Rate limited during token info check, waiting {delay}s")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            logger.warning("Token info request failed: Rate limit exceeded")
-                            return None
+                client = await self._get_http()
+                response = await client.post(
+                    f"{_TOKEN_PATH}/info",
+                    data={"access_token": token}
+                )
+
+                if response.status_code == 200:
+                    return orjson.loads(response.content)
+                elif response.status_code == 429:
+                    if attempt < self.max_retries - 1:
+                        delay = self._rate_limit_delay(response, attempt)
+                        logger.warning(f"Rate limited during token info check, waiting {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
                     else:
-                        logger.warning(f"Token info request failed: {response.status_code}")
+                        logger.warning("Token info request failed: Rate limit exceeded")
                         return None
+                else:
+                    logger.warning(f"Token info request failed: {response.status_code}")
+                    return None
 
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                    logger.warning(f"Token info error, retrying in {delay}s: {e}")
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Token info error, retrying in {delay:.1f}s: {e}")
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -330,7 +480,8 @@ class ZohoOAuthClient:
             Warning message if token expires within 3 days
         """
         try:
-            cached_token = await self._get_cached_token()
+            # Token and TTL come back from Redis in one round trip
+            cached_token, ttl = await self._get_cached_token()
             if not cached_token:
                 return "No cached token found"
 
@@ -339,7 +490,6 @@ class ZohoOAuthClient:
                 return "Token is invalid"
 
             # Check if token expires within 3 days
-            ttl = await redis_client.ttl(self.cache_key)
             if ttl < 3 * 24 * 3600:  # 3 days in seconds
                 return f"Token expires in {ttl // 3600} hours"
 
@@ -0,0 +1,30 @@
+"""Helpers for retrying requests to Zoho."""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str], default: float = 60.0) -> float:
+    """Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP-date
+        default: Seconds to use when the header is missing or malformed
+
+    Returns:
+        Seconds to wait, never negative
+    """
+    if value is None:
+        return default
+    try:
+        return max(float(int(value)), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
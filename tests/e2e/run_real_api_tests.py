@@ -11,7 +11,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from server.zoho.oauth_client import oauth_client
-from server.zoho.api_client import zoho_client
+from server.zoho.api_client import close_zoho_client, get_zoho_client
 
 # Configure logging
 logging.basicConfig(
@@ -45,7 +45,7 @@ async def test_projects_api():
     logger.info("📋 Testing Zoho Projects API")
     try:
         # Try to list projects with correct endpoint
-        response = await zoho_client.get("/portal/fujisoftamerica2/projects/")
+        response = await get_zoho_client().get("/portal/fujisoftamerica2/projects/")
         if response and "projects" in response:
             project_count = len(response["projects"])
             logger.info(f"✅ Projects API connection successful")
@@ -70,7 +70,7 @@ async def test_workdrive_api():
     logger.info("📁 Testing Zoho WorkDrive API")
     try:
         # Try a simpler WorkDrive endpoint
-        response = await zoho_client.get("/users/me", use_workdrive=True)
+        response = await get_zoho_client().get("/users/me", use_workdrive=True)
         if response:
             logger.info("✅ WorkDrive API connection successful")
             logger.info(f"   Response keys: {list(response.keys())}")
@@ -139,7 +139,7 @@ async def main():
         logger.warning(f"⚠️ {total - passed} test(s) failed")
     
     # Cleanup
-    await zoho_client.close()
+    await close_zoho_client()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,22 @@
 """Tests for Zoho API client module."""
 
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 from unittest.mock import AsyncMock, Mock, patch
 
 import httpx
+import orjson
 import pytest
 
-from server.zoho.api_client import ZohoAPIClient, ZohoAPIError
-from server.core.exceptions import ExternalAPIError, TemporaryError, TimeoutError
+from server.zoho.api_client import (
+    ZohoAPIClient,
+    ZohoAPIError,
+    _Retry,
+    close_zoho_client,
+    get_zoho_client,
+)
+from server.core.exceptions import ExternalAPIError, TimeoutError
 
 
 class TestZohoAPIError:
@@ -50,8 +60,21 @@ class TestZohoAPIClient:
         assert client.workdrive_base_url is not None
         assert client.timeout is not None
         assert client.max_retries == 3
-        assert len(client.retry_delays) == 3
-        assert client.retry_delays == [0.5, 1.0, 2.0]
+        assert client.retry_base_delay == 0.5
+        assert client.retry_max_delay == 5.0
+
+    def test_backoff_stays_within_bounds(self, client):
+        """Test jittered backoff grows from the previous delay up to the cap."""
+        delay = client.retry_base_delay
+        for _ in range(50):
+            previous, delay = delay, client._backoff(delay)
+            assert 0.1 <= delay <= min(client.retry_max_delay, previous * 3)
+
+    def test_pool_limits_keep_every_connection_warm(self, client):
+        """Test the pool keeps all of its connections alive between requests."""
+        assert client.limits.max_connections == 20
+        assert client.limits.max_keepalive_connections == client.limits.max_connections
+        assert client.limits.keepalive_expiry == 90.0
 
     @pytest.mark.asyncio
     async def test_get_headers_projects(self, client, mock_oauth_client):
@@ -59,9 +82,19 @@ class TestZohoAPIClient:
         headers = await client._get_headers(use_workdrive=False)
 
         mock_oauth_client.get_access_token.assert_called_once()
-        assert headers["Authorization"] == "Zoho-oauthtoken test_access_token"
-        assert headers["Content-Type"] == "application/json"
-        assert headers["User-Agent"] == "zoho-mcp-server/0.1.0"
+        assert headers == {"Authorization": "Zoho-oauthtoken test_access_token"}
+
+    @pytest.mark.asyncio
+    async def test_get_headers_reused_until_token_changes(self, client, mock_oauth_client):
+        """Test the auth headers dict is only rebuilt for a new token."""
+        first = await client._get_headers()
+        assert await client._get_headers() is first
+
+        mock_oauth_client.get_access_token.return_value = "new_token"
+        second = await client._get_headers()
+        assert second is not first
+        assert second == {"Authorization": "Zoho-oauthtoken new_token"}
+        assert first == {"Authorization": "Zoho-oauthtoken test_access_token"}
 
     @pytest.mark.asyncio
     async def test_get_headers_workdrive(self, client, mock_oauth_client):
@@ -69,9 +102,7 @@ class TestZohoAPIClient:
         headers = await client._get_headers(use_workdrive=True)
 
         mock_oauth_client.get_access_token.assert_called_once()
-        assert headers["Authorization"] == "Zoho-oauthtoken test_access_token"
-        assert headers["Content-Type"] == "application/json"
-        assert headers["User-Agent"] == "zoho-mcp-server/0.1.0"
+        assert headers == {"Authorization": "Zoho-oauthtoken test_access_token"}
 
     @pytest.mark.asyncio
     async def test_handle_response_success_with_json(self, client):
@@ -79,13 +110,12 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://api.example.com/test"
-        mock_response.json.return_value = {"status": "success", "data": {"id": 123}}
+        mock_response.content = orjson.dumps({"status": "success", "data": {"id": 123}})
 
         with patch('server.zoho.api_client.logger'):
             result = await client._handle_response(mock_response, 0, 1)
 
         assert result == {"status": "success", "data": {"id": 123}}
-        mock_response.json.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_handle_response_success_empty(self, client):
@@ -93,7 +123,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 204
         mock_response.url = "https://api.example.com/test"
-        mock_response.json.side_effect = Exception("No JSON")
+        mock_response.content = b""
 
         with patch('server.zoho.api_client.logger'):
             result = await client._handle_response(mock_response, 0, 1)
@@ -110,10 +140,25 @@ class TestZohoAPIClient:
         with patch('server.zoho.api_client.logger'), \
              patch('asyncio.sleep') as mock_sleep:
 
-            with pytest.raises(Exception, match="Rate limited, retrying"):
-                await client._handle_response(mock_response, 0, 2)  # attempt 0 of 2
+            result = await client._handle_response(mock_response, 0, 2)  # attempt 0 of 2
+
+        assert isinstance(result, _Retry)
+        assert 30 <= result.delay <= 30.25
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_handle_response_rate_limit_http_date(self, client):
+        """Test a date-form Retry-After is honoured and capped."""
+        mock_response = Mock()
+        mock_response.status_code = 429
+        retry_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+        mock_response.headers = {"Retry-After": format_datetime(retry_at, usegmt=True)}
+
+        with patch('server.zoho.api_client.logger'):
+            result = await client._handle_response(mock_response, 0, 2)
 
-        mock_sleep.assert_called_once_with(30)
+        assert isinstance(result, _Retry)
+        assert 30 <= result.delay <= 30.25
 
     @pytest.mark.asyncio
     async def test_handle_response_rate_limit_final_attempt(self, client):
@@ -141,10 +186,10 @@ class TestZohoAPIClient:
         mock_oauth_client.get_access_token = AsyncMock()
 
         with patch('server.zoho.api_client.logger'):
-            # The code actually raises ZohoAPIError after attempting token refresh
-            with pytest.raises(ZohoAPIError, match="Authentication failed"):
-                await client._handle_response(mock_response, 0, 2)
+            result = await client._handle_response(mock_response, 0, 2)
 
+        assert isinstance(result, _Retry)
+        assert result.delay == 0
         mock_oauth_client.get_access_token.assert_called_once_with(force_refresh=True)
 
     @pytest.mark.asyncio
@@ -165,7 +210,7 @@ class TestZohoAPIClient:
         """Test handling client error with JSON response."""
         mock_response = Mock()
         mock_response.status_code = 400
-        mock_response.json.return_value = {"message": "Invalid request", "code": "INVALID_DATA"}
+        mock_response.content = orjson.dumps({"message": "Invalid request", "code": "INVALID_DATA"})
         mock_response.text = "Bad Request"
 
         with patch('server.zoho.api_client.logger'):
@@ -180,7 +225,7 @@ class TestZohoAPIClient:
         """Test handling client error without JSON response."""
         mock_response = Mock()
         mock_response.status_code = 404
-        mock_response.json.side_effect = Exception("No JSON")
+        mock_response.content = b"Not Found"
         mock_response.text = "Not Found"
 
         with patch('server.zoho.api_client.logger'):
@@ -200,10 +245,11 @@ class TestZohoAPIClient:
         with patch('server.zoho.api_client.logger'), \
              patch('asyncio.sleep') as mock_sleep:
 
-            with pytest.raises(Exception, match="Server error 500, retrying"):
-                await client._handle_response(mock_response, 0, 2)
+            result = await client._handle_response(mock_response, 0, 2)
 
-        mock_sleep.assert_called_once_with(0.5)  # First retry delay
+        assert isinstance(result, _Retry)
+        assert result.delay is None  # Use the client's backoff
+        mock_sleep.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_handle_response_server_error_final_attempt(self, client):
@@ -240,7 +286,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://api.example.com/test"
-        mock_response.json.return_value = {"result": "success"}
+        mock_response.content = orjson.dumps({"result": "success"})
 
         mock_client = AsyncMock()
         mock_client.request = AsyncMock(return_value=mock_response)
@@ -286,6 +332,67 @@ class TestZohoAPIClient:
         assert mock_sleep.call_count == 2  # 2 retry delays
         assert "Network error" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_opens_after_repeated_failures(self, client, mock_oauth_client):
+        """Test the circuit fails fast once the failure threshold is reached."""
+        client.breaker_threshold = 2
+        mock_client = AsyncMock()
+        mock_client.request = AsyncMock(side_effect=httpx.ConnectError("Connection failed"))
+
+        with patch.object(client, '_get_client', return_value=mock_client), \
+             patch('server.zoho.api_client.logger'):
+            for _ in range(2):
+                with pytest.raises(ExternalAPIError, match="Network error"):
+                    await client._make_request("GET", "/test")
+
+            with pytest.raises(ExternalAPIError, match="failing fast"):
+                await client._make_request("GET", "/test")
+
+            # Other methods have their own circuit
+            with pytest.raises(ExternalAPIError, match="Network error"):
+                await client._make_request("POST", "/test")
+
+        assert mock_client.request.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_closes_after_successful_trial(self, client, mock_oauth_client):
+        """Test a successful trial request after the cool-down closes the circuit."""
+        client.breaker_threshold = 1
+        client.breaker_cooldown = 0.0
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = orjson.dumps({"result": "success"})
+        mock_client = AsyncMock()
+        mock_client.request = AsyncMock(side_effect=[httpx.ConnectError("Connection failed"), mock_response])
+
+        with patch.object(client, '_get_client', return_value=mock_client), \
+             patch('server.zoho.api_client.logger'):
+            with pytest.raises(ExternalAPIError):
+                await client._make_request("GET", "/test")
+            result = await client._make_request("GET", "/test")
+
+        assert result == {"result": "success"}
+        assert client._breaker == {}
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_ignores_client_errors(self, client, mock_oauth_client):
+        """Test 4xx responses do not count towards opening the circuit."""
+        client.breaker_threshold = 1
+        mock_response = Mock()
+        mock_response.status_code = 404
+        mock_response.content = b"Not Found"
+        mock_response.text = "Not Found"
+        mock_client = AsyncMock()
+        mock_client.request = AsyncMock(return_value=mock_response)
+
+        with patch.object(client, '_get_client', return_value=mock_client), \
+             patch('server.zoho.api_client.logger'):
+            for _ in range(2):
+                with pytest.raises(ZohoAPIError):
+                    await client._make_request("GET", "/test")
+
+        assert mock_client.request.call_count == 2
+
     @pytest.mark.asyncio
     async def test_get_method(self, client, mock_oauth_client):
         """Test GET method."""
@@ -301,6 +408,108 @@ class TestZohoAPIClient:
         )
         assert result == {"data": "test"}
 
+    @pytest.mark.asyncio
+    async def test_get_without_params_or_headers(self, client, mock_oauth_client):
+        """Test a bare GET passes no optional request arguments and is cached."""
+        with patch.object(client, '_make_request', return_value={"data": "test"}) as mock_make_request:
+            await client.get("/portals", cache_ttl=60.0)
+            await client.get("/portals", cache_ttl=60.0)
+
+        mock_make_request.assert_called_once_with(
+            "GET",
+            "/portals",
+            use_workdrive=False,
+            retry=True
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_deduplicates_concurrent_identical_requests(self, client, mock_oauth_client):
+        """Test concurrent identical GETs share a single request."""
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0)
+            return {"data": "test"}
+
+        with patch.object(client, '_make_request', side_effect=slow_request) as mock_make_request:
+            results = await asyncio.gather(
+                client.get("/tasks", params={"index": 1}),
+                client.get("/tasks", params={"index": 1}),
+                client.get("/tasks", params={"index": 2}),
+                client.get("/tasks", params={"index": 1}, headers={"X-Custom": "1"}),
+            )
+
+        assert results == [{"data": "test"}] * 4
+        assert mock_make_request.call_count == 3
+        assert client._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_get_cache_ttl_reuses_response(self, client, mock_oauth_client):
+        """Test GETs with cache_ttl are answered from cache until they expire."""
+        with patch.object(client, '_make_request', return_value={"data": "test"}) as mock_make_request:
+            first = await client.get("/user", cache_ttl=30.0)
+            second = await client.get("/user", cache_ttl=30.0)
+            uncached = await client.get("/user")
+
+            client._get_cache[("/user", False, None)] = (0.0, {"data": "old"})
+            expired = await client.get("/user", cache_ttl=30.0)
+
+        assert first == second == uncached == expired == {"data": "test"}
+        assert mock_make_request.call_count == 3
+
+    def test_get_cache_is_bounded(self, client):
+        """Test the GET cache evicts its oldest entry when full."""
+        client.get_cache_size = 2
+        for endpoint in ("/a", "/b", "/c"):
+            client._cache_response((endpoint, False, None), {}, 30.0)
+
+        assert list(client._get_cache) == [("/b", False, None), ("/c", False, None)]
+
+    @pytest.mark.asyncio
+    async def test_get_many_returns_results_in_order(self, client, mock_oauth_client):
+        """Test get_many runs GETs concurrently and keeps failures per call."""
+        error = ZohoAPIError("Not found", 404)
+
+        async def fake_get(endpoint, params=None, use_workdrive=False):
+            if endpoint == "/missing":
+                raise error
+            return {"endpoint": endpoint, "params": params}
+
+        with patch.object(client, 'get', side_effect=fake_get):
+            results = await client.get_many([("/a", None), ("/missing", None), ("/b", {"index": 1})])
+
+        assert results == [
+            {"endpoint": "/a", "params": None},
+            error,
+            {"endpoint": "/b", "params": {"index": 1}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_stream_yields_body_in_chunks(self, client, mock_oauth_client):
+        """Test get_stream yields the body without buffering it whole."""
+        body = b"x" * 10
+
+        def handler(request):
+            assert request.headers["Authorization"] == "Zoho-oauthtoken test_access_token"
+            return httpx.Response(200, content=body)
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.object(client, '_get_client', return_value=http_client):
+            chunks = [chunk async for chunk in client.get_stream("/files/1/content", chunk_size=4)]
+
+        assert chunks == [b"xxxx", b"xxxx", b"xx"]
+
+    @pytest.mark.asyncio
+    async def test_get_stream_error_status(self, client, mock_oauth_client):
+        """Test get_stream raises ZohoAPIError for error responses."""
+        http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(404, content=b"missing"))
+        )
+        with patch.object(client, '_get_client', return_value=http_client):
+            with pytest.raises(ZohoAPIError) as exc_info:
+                async for _ in client.get_stream("/files/1/content"):
+                    pass
+
+        assert exc_info.value.status_code == 404
+
     @pytest.mark.asyncio
     async def test_post_method_with_json(self, client, mock_oauth_client):
         """Test POST method with JSON payload."""
@@ -317,7 +526,8 @@ class TestZohoAPIClient:
             "/projects",
             use_workdrive=False,
             retry=False,
-            json={"name": "Test Project"}
+            content=b'{"name":"Test Project"}',
+            headers={"Content-Type": "application/json"}
         )
         assert result == {"id": 123}
 
@@ -344,6 +554,16 @@ class TestZohoAPIClient:
         )
         assert result == {"upload_id": "abc123"}
 
+    @pytest.mark.asyncio
+    async def test_put_json_body_keeps_custom_headers_and_non_ascii(self, client, mock_oauth_client):
+        """Test JSON bodies are sent as unescaped UTF-8 alongside caller headers."""
+        with patch.object(client, '_make_request', return_value={}) as mock_make_request:
+            await client.put("/tasks/1", json={"name": "タスク"}, headers={"X-Custom": "1"})
+
+        kwargs = mock_make_request.call_args[1]
+        assert kwargs["content"] == '{"name":"タスク"}'.encode()
+        assert kwargs["headers"] == {"Content-Type": "application/json", "X-Custom": "1"}
+
     @pytest.mark.asyncio
     async def test_put_method(self, client, mock_oauth_client):
         """Test PUT method."""
@@ -357,10 +577,10 @@ class TestZohoAPIClient:
         mock_make_request.assert_called_once_with(
             "PUT",
             "/projects/123",
-            json={"name": "Updated Project"},
-            headers=None,
+            headers={"Content-Type": "application/json"},
             use_workdrive=True,
-            retry=True
+            retry=True,
+            content=b'{"name":"Updated Project"}'
         )
         assert result == {"updated": True}
 
@@ -384,7 +604,7 @@ class TestZohoAPIClient:
         with patch.object(client, 'get', return_value={"user": {"id": "123"}}) as mock_get:
             result = await client.health_check()
 
-        mock_get.assert_called_once_with("/user", retry=False)
+        mock_get.assert_called_once_with("/user", retry=False, cache_ttl=30.0)
         assert result is True
 
     @pytest.mark.asyncio
@@ -395,7 +615,7 @@ class TestZohoAPIClient:
 
             result = await client.health_check()
 
-        mock_get.assert_called_once_with("/user", retry=False)
+        mock_get.assert_called_once_with("/user", retry=False, cache_ttl=30.0)
         assert result is False
 
     @pytest.mark.asyncio
@@ -404,7 +624,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://projects.example.com/api/v3/test"
-        mock_response.json.return_value = {}
+        mock_response.content = orjson.dumps({})
 
         mock_client = AsyncMock()
         mock_client.request = AsyncMock(return_value=mock_response)
@@ -423,7 +643,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://workdrive.example.com/api/v1/test"
-        mock_response.json.return_value = {}
+        mock_response.content = orjson.dumps({})
 
         mock_client = AsyncMock()
         mock_client.request = AsyncMock(return_value=mock_response)
@@ -442,7 +662,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://api.example.com/test"
-        mock_response.json.return_value = {}
+        mock_response.content = orjson.dumps({})
 
         custom_headers = {"X-Custom-Header": "test-value"}
 
@@ -508,10 +728,10 @@ class TestZohoAPIClient:
         mock_make_request.assert_called_once_with(
             "PATCH",
             "/test",
-            json=patch_data,
-            headers=None,
+            headers={"Content-Type": "application/json"},
             use_workdrive=False,
-            retry=True
+            retry=True,
+            content=orjson.dumps(patch_data)
         )
 
     @pytest.mark.asyncio
@@ -520,7 +740,7 @@ class TestZohoAPIClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.url = "https://api.example.com/upload"
-        mock_response.json.return_value = {"uploaded": True}
+        mock_response.content = orjson.dumps({"uploaded": True})
 
         files = {"file": ("test.txt", "test content", "text/plain")}
 
@@ -549,6 +769,7 @@ class TestZohoAPIClient:
         client2 = await client._get_client()
         assert client2 is client1
         assert client._client is client1
+        assert client1.headers["User-Agent"] == "zoho-mcp-server/0.1.0"
 
     @pytest.mark.asyncio
     async def test_connection_pooling_client_recreation(self, client):
@@ -563,17 +784,27 @@ class TestZohoAPIClient:
         assert client._client is client2
 
     @pytest.mark.asyncio
-    async def test_handle_response_temporary_error_rate_limit(self, client):
-        """Test handling rate limit with TemporaryError."""
-        mock_response = Mock()
-        mock_response.status_code = 429
-        mock_response.headers = {"Retry-After": "30"}
-        mock_response.text = "Rate limit exceeded"
+    async def test_make_request_retries_after_server_error(self, client, mock_oauth_client):
+        """Test make_request sleeps and retries when the response asks for it."""
+        error_response = Mock()
+        error_response.status_code = 503
+        error_response.text = "Service Unavailable"
+        ok_response = Mock()
+        ok_response.status_code = 200
+        ok_response.content = orjson.dumps({"result": "success"})
 
-        with pytest.raises(TemporaryError) as exc_info:
-            await client._handle_response(mock_response, 0, 2)  # Not final attempt
+        mock_client = AsyncMock()
+        mock_client.request = AsyncMock(side_effect=[error_response, ok_response])
 
-        assert exc_info.value.retry_after == 30
+        with patch.object(client, '_get_client', return_value=mock_client), \
+             patch('server.zoho.api_client.logger'), \
+             patch('asyncio.sleep') as mock_sleep:
+            result = await client._make_request("GET", "/test", retry=True)
+
+        assert result == {"result": "success"}
+        assert mock_client.request.call_count == 2
+        mock_sleep.assert_called_once()
+        assert 0.1 <= mock_sleep.call_args[0][0] <= 1.5
 
     @pytest.mark.asyncio
     async def test_handle_response_auth_error_final_attempt(self, client, mock_oauth_client):
@@ -595,12 +826,10 @@ class TestZohoAPIClient:
         mock_response.status_code = 500
         mock_response.text = "Internal Server Error"
 
-        with patch('asyncio.sleep') as mock_sleep:
-            with pytest.raises(Exception, match="Server error 500, retrying"):
-                await client._handle_response(mock_response, 0, 2)  # Not final attempt
+        result = await client._handle_response(mock_response, 1, 3)  # Not final attempt
 
-        # Should sleep before retry
-        mock_sleep.assert_called_once_with(0.5)  # First retry delay
+        assert isinstance(result, _Retry)
+        assert result.delay is None
 
     @pytest.mark.asyncio 
     async def test_head_method_exception_handling(self, client, mock_oauth_client):
@@ -636,3 +865,28 @@ def test_global_client_instance():
     # Just test that we can create an instance
     client = ZohoAPIClient()
     assert isinstance(client, ZohoAPIClient)
+
+
+@pytest.mark.asyncio
+async def test_get_zoho_client_is_shared_within_a_loop():
+    """Test the client is created once per event loop and closed on request."""
+    client = get_zoho_client()
+    assert get_zoho_client() is client
+
+    with patch.object(client, 'close', new_callable=AsyncMock) as mock_close:
+        await close_zoho_client()
+
+    mock_close.assert_awaited_once()
+    assert get_zoho_client() is not client
+    await close_zoho_client()
+
+
+def test_get_zoho_client_per_loop():
+    """Test separate event loops never share a client."""
+    first = asyncio.run(_current_client())
+    second = asyncio.run(_current_client())
+    assert first is not second
+
+
+async def _current_client() -> ZohoAPIClient:
+    return get_zoho_client()
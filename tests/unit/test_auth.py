@@ -5,9 +5,9 @@ from datetime import timezone, datetime, timedelta
 from unittest.mock import AsyncMock, Mock
 
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 
-from server.auth.ip_allowlist import IPAllowlistMiddleware
+from server.auth.ip_allowlist import IPAllowlist, IPAllowlistMiddleware
 from server.auth.jwt_handler import JWTHandler, TokenData
 
 
@@ -56,6 +56,49 @@ class TestJWTHandler:
         assert exc_info.value.status_code == 401
         assert "expired" in exc_info.value.detail.lower()
 
+    def test_verify_token_cached_reuses_token_data(self, jwt_handler):
+        """Test cached verification returns the same frozen token data."""
+        token = jwt_handler.create_access_token("test_user")
+
+        first = jwt_handler.verify_token_cached(token)
+        second = jwt_handler.verify_token_cached(token)
+
+        assert first is second
+        assert first.sub == "test_user"
+        with pytest.raises(Exception):
+            first.sub = "other_user"
+
+    def test_verify_token_cached_rejects_invalid_token(self, jwt_handler):
+        """Test cached verification does not cache failures."""
+        with pytest.raises(HTTPException) as exc_info:
+            jwt_handler.verify_token_cached("invalid_token")
+
+        assert exc_info.value.status_code == 401
+        assert jwt_handler._verified_cache == {}
+
+    def test_verify_token_cached_is_bounded(self, jwt_handler):
+        """Test cached verification evicts least recently used tokens."""
+        jwt_handler.cache_maxsize = 2
+        tokens = [
+            jwt_handler.create_access_token(f"user_{i}") for i in range(3)
+        ]
+
+        for token in tokens:
+            jwt_handler.verify_token_cached(token)
+
+        assert len(jwt_handler._verified_cache) == 2
+
+    def test_verify_token_cached_expires_entries(self, jwt_handler):
+        """Test cached verification re-verifies after the cache TTL."""
+        jwt_handler.cache_ttl = 0
+        token = jwt_handler.create_access_token("test_user")
+
+        first = jwt_handler.verify_token_cached(token)
+        second = jwt_handler.verify_token_cached(token)
+
+        assert first is not second
+        assert first == second
+
     def test_is_token_expired(self, jwt_handler):
         """Test token expiration check."""
         # Valid token
@@ -89,91 +132,140 @@ class TestJWTHandler:
         assert new_token != expiring_token
 
 
-class TestIPAllowlistMiddleware:
-    """Test IP allowlist middleware."""
+def make_request(path="/api/tasks", client_host="192.168.1.100", headers=()):
+    """Build a request from a minimal ASGI HTTP scope."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(name.lower(), value) for name, value in headers],
+        "client": (client_host, 12345),
+    })
+
+
+class TestIPAllowlist:
+    """Test IP allowlist checks."""
 
     def test_parse_ip_list(self):
         """Test IP list parsing."""
-        middleware = IPAllowlistMiddleware(
-            app=Mock(),
-            allowed_ips=["192.168.1.1", "10.0.0.0/8", "::1"]
-        )
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.1", "10.0.0.0/8", "::1"])
 
-        assert len(middleware.allowed_networks) == 3
-        assert any(isinstance(net, ipaddress.IPv4Network) for net in middleware.allowed_networks)
-        assert any(isinstance(net, ipaddress.IPv6Network) for net in middleware.allowed_networks)
+        assert len(allowlist.allowed_networks) == 3
+        assert any(isinstance(net, ipaddress.IPv4Network) for net in allowlist.allowed_networks)
+        assert any(isinstance(net, ipaddress.IPv6Network) for net in allowlist.allowed_networks)
 
     def test_parse_invalid_ip(self):
         """Test invalid IP handling."""
-        middleware = IPAllowlistMiddleware(
-            app=Mock(),
-            allowed_ips=["192.168.1.1", "invalid_ip", "10.0.0.0/8"]
-        )
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.1", "invalid_ip", "10.0.0.0/8"])
 
         # Should skip invalid IP and continue with valid ones
-        assert len(middleware.allowed_networks) == 2
+        assert len(allowlist.allowed_networks) == 2
 
-    def test_is_ip_allowed(self):
+    def test_is_allowed(self):
         """Test IP allowlist checking."""
-        middleware = IPAllowlistMiddleware(
-            app=Mock(),
-            allowed_ips=["192.168.1.0/24", "10.0.0.1"]
-        )
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.0/24", "10.0.0.1"])
 
         # Test allowed IPs
-        assert middleware._is_ip_allowed("192.168.1.100")
-        assert middleware._is_ip_allowed("10.0.0.1")
+        assert allowlist.is_allowed("192.168.1.100")
+        assert allowlist.is_allowed("10.0.0.1")
 
         # Test blocked IPs
-        assert not middleware._is_ip_allowed("192.168.2.1")
-        assert not middleware._is_ip_allowed("172.16.0.1")
+        assert not allowlist.is_allowed("192.168.2.1")
+        assert not allowlist.is_allowed("172.16.0.1")
+
+    def test_single_addresses_use_set_lookup(self):
+        """Test single addresses are collected for set membership checks."""
+        allowlist = IPAllowlist(allowed_ips=frozenset({"10.0.0.1", "192.168.1.0/24", "::1"}))
+
+        assert allowlist._allowed_v4_addresses == frozenset({int(ipaddress.ip_address("10.0.0.1"))})
+        assert allowlist._allowed_v6_addresses == frozenset({1})
+        assert allowlist.is_allowed("::1")
+        # ::1 and 0.0.0.1 share an integer value but not a version
+        assert not allowlist.is_allowed("0.0.0.1")
+
+    def test_single_address_matches_any_spelling(self):
+        """Test single IPv6 entries match non-canonical spellings of the address."""
+        allowlist = IPAllowlist(allowed_ips=["2001:db8::1"])
+
+        assert allowlist.is_allowed("2001:db8::1")
+        assert allowlist.is_allowed("2001:0db8::1")
+        assert allowlist.is_allowed("2001:DB8::1")
+        assert allowlist.is_allowed("2001:db8:0:0:0:0:0:1")
+        assert not allowlist.is_allowed("2001:db8::2")
+
+    def test_is_allowed_cidr(self):
+        """Test CIDR matching for IPv4 and IPv6 blocks."""
+        allowlist = IPAllowlist(
+            allowed_ips=["10.0.0.0/8", "192.168.1.128/25", "2001:db8::/32", "0.0.0.0/0"]
+        )
+
+        assert allowlist.is_allowed("10.255.0.1")
+        assert allowlist.is_allowed("192.168.1.200")
+        assert allowlist.is_allowed("2001:db8::1")
+        assert allowlist.is_allowed("172.16.0.1")  # matched by 0.0.0.0/0
+        assert not allowlist.is_allowed("2001:db9::1")
 
     def test_get_client_ip_direct(self):
         """Test direct client IP extraction."""
-        request = Mock()
-        request.headers = {}
-        request.client.host = "192.168.1.100"
+        scope = make_request(client_host="192.168.1.100").scope
 
-        middleware = IPAllowlistMiddleware(app=Mock(), allowed_ips=["192.168.1.0/24"])
-        client_ip = middleware._get_client_ip(request)
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.0/24"])
 
-        assert client_ip == "192.168.1.100"
+        assert allowlist.get_client_ip(scope) == "192.168.1.100"
 
     def test_get_client_ip_forwarded(self):
         """Test forwarded IP extraction."""
-        request = Mock()
-        request.headers = {"X-Forwarded-For": "192.168.1.100, 10.0.0.1"}
-        request.client.host = "10.0.0.1"
+        scope = make_request(
+            client_host="10.0.0.1",
+            headers=[(b"X-Forwarded-For", b"192.168.1.100, 10.0.0.1")]
+        ).scope
 
-        # Configure middleware with trusted proxy to enable forwarded header processing
-        middleware = IPAllowlistMiddleware(
-            app=Mock(), 
+        # Configure allowlist with trusted proxy to enable forwarded header processing
+        allowlist = IPAllowlist(
             allowed_ips=["192.168.1.0/24"],
             trusted_proxies=["10.0.0.0/24"]  # Trust the proxy network
         )
-        client_ip = middleware._get_client_ip(request)
 
-        assert client_ip == "192.168.1.100"
+        assert allowlist.get_client_ip(scope) == "192.168.1.100"
+
+    def test_get_client_ip_forwarded_untrusted(self):
+        """Test forwarded headers are ignored from untrusted clients."""
+        scope = make_request(
+            client_host="172.16.0.1",
+            headers=[(b"X-Real-IP", b"192.168.1.100")]
+        ).scope
 
-    def test_should_bypass_check(self):
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.0/24"], trusted_proxies=["10.0.0.0/24"])
+
+        assert allowlist.get_client_ip(scope) == "172.16.0.1"
+
+    def test_should_bypass(self):
         """Test bypass path checking."""
-        middleware = IPAllowlistMiddleware(
-            app=Mock(),
+        allowlist = IPAllowlist(
             allowed_ips=["192.168.1.0/24"],
             bypass_paths=["/health", "/docs"]
         )
 
-        assert middleware._should_bypass_check("/health")
-        assert middleware._should_bypass_check("/docs/swagger")
-        assert not middleware._should_bypass_check("/api/tasks")
+        assert allowlist.should_bypass("/health")
+        assert allowlist.should_bypass("/docs/swagger")
+        assert not allowlist.should_bypass("/api/tasks")
+
+    def test_check(self):
+        """Test check returns a denial only for blocked clients on guarded paths."""
+        allowlist = IPAllowlist(allowed_ips=["192.168.1.0/24"])
+
+        assert allowlist.check(make_request(client_host="192.168.1.100").scope) is None
+        assert allowlist.check(make_request(path="/health", client_host="172.16.0.1").scope) is None
+        assert allowlist.check(make_request(client_host="172.16.0.1").scope).status_code == 403
+
+
+class TestIPAllowlistMiddleware:
+    """Test IP allowlist middleware."""
 
     @pytest.mark.asyncio
     async def test_dispatch_allowed_ip(self):
         """Test request dispatch with allowed IP."""
-        request = Mock()
-        request.url.path = "/api/tasks"
-        request.headers = {}
-        request.client.host = "192.168.1.100"
+        request = make_request(client_host="192.168.1.100")
 
         call_next = AsyncMock(return_value="success")
 
@@ -190,10 +282,7 @@ class TestIPAllowlistMiddleware:
     @pytest.mark.asyncio
     async def test_dispatch_blocked_ip(self):
         """Test request dispatch with blocked IP."""
-        request = Mock()
-        request.url.path = "/api/tasks"
-        request.headers = {}
-        request.client.host = "172.16.0.1"
+        request = make_request(client_host="172.16.0.1")
 
         call_next = AsyncMock()
 
@@ -210,10 +299,7 @@ class TestIPAllowlistMiddleware:
     @pytest.mark.asyncio
     async def test_dispatch_bypass_path(self):
         """Test request dispatch with bypass path."""
-        request = Mock()
-        request.url.path = "/health"
-        request.headers = {}
-        request.client.host = "172.16.0.1"  # Blocked IP
+        request = make_request(path="/health", client_host="172.16.0.1")  # Blocked IP
 
         call_next = AsyncMock(return_value="health_ok")
 
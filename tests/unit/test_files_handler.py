@@ -53,7 +53,7 @@ class TestFileHandler:
     @pytest.fixture
     def handler(self):
         """Create FileHandler instance with mocked API client."""
-        with patch('server.handlers.files.ZohoAPIClient'):
+        with patch('server.handlers.files.get_zoho_client'):
             handler = FileHandler()
             handler.api_client = AsyncMock()
             return handler
@@ -1,7 +1,10 @@
 """Unit tests for MCP Stdio server."""
 
 import asyncio
+import io
 import json
+import logging
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import AsyncMock, Mock, patch, mock_open
@@ -11,6 +14,32 @@ import pytest
 from server.mcp_stdio_server import StdioMCPServer
 
 
+class FakeStdout:
+    """Stand-in for sys.stdout that captures bytes written to its buffer."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def fileno(self):
+        """Behave like a stream that is not backed by a pipe."""
+        raise io.UnsupportedOperation("fileno")
+
+    def responses(self):
+        """Decode every JSON line written so far."""
+        return [json.loads(line) for line in self.buffer.getvalue().splitlines()]
+
+
+async def run_server(server, lines=(), stdin=None, stdout=None):
+    """Run the server loop over the given stdin lines until EOF."""
+    stdin = stdin if stdin is not None else io.StringIO("".join(lines))
+    stdout = stdout if stdout is not None else FakeStdout()
+    if isinstance(stdin, Mock):
+        stdin.fileno.side_effect = io.UnsupportedOperation("fileno")
+    with patch('sys.stdin', stdin), patch('sys.stdout', stdout):
+        await server.run()
+    return stdout
+
+
 class TestStdioMCPServer:
     """Test MCP Stdio server."""
 
@@ -66,8 +95,7 @@ class TestStdioMCPServer:
 
     @pytest.mark.asyncio
     async def test_handle_request_exception(self, server, mock_mcp_handler):
-        """Test request handling with exception."""
-        # Setup mock to raise exception
+        """Test handler failures propagate to the main loop."""
         mock_mcp_handler.handle_request.side_effect = Exception("Handler error")
 
         request_data = {
@@ -76,227 +104,222 @@ class TestStdioMCPServer:
             "id": 1
         }
 
-        result = await server.handle_request(request_data)
-
-        # Verify error response
-        assert result["jsonrpc"] == "2.0"
-        assert result["error"]["code"] == -32603
-        assert result["error"]["message"] == "Internal error"
-        assert result["id"] == 1
-
-    @pytest.mark.asyncio
-    async def test_handle_request_no_id(self, server, mock_mcp_handler):
-        """Test request handling without ID (notification)."""
-        mock_mcp_handler.handle_request.side_effect = Exception("Handler error")
-
-        request_data = {
-            "jsonrpc": "2.0",
-            "method": "initialized"
-        }
-
-        result = await server.handle_request(request_data)
-
-        # Verify error response includes None ID
-        assert result["id"] is None
+        with pytest.raises(Exception, match="Handler error"):
+            await server.handle_request(request_data)
 
     @pytest.mark.asyncio
     async def test_run_single_request_success(self, server, mock_mcp_handler):
         """Test main loop with single successful request."""
-        # Mock stdin readline
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n',
-            ''  # EOF
-        ]
-
-        # Mock MCP handler response
-        mock_response = {
+        mock_mcp_handler.handle_request.return_value = {
             "jsonrpc": "2.0",
             "result": {"tools": []},
             "id": 1
         }
-        mock_mcp_handler.handle_request.return_value = mock_response
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            # Mock executor to run synchronously
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
 
-            await server.run()
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n'])
 
-            # Verify print was called with response
-            mock_print.assert_called_once_with(
-                '{"jsonrpc":"2.0","result":{"tools":[]},"id":1}',
-                flush=True
-            )
+        # Responses are compact JSON, one per line
+        assert stdout.buffer.getvalue() == b'{"jsonrpc":"2.0","result":{"tools":[]},"id":1}\n'
 
     @pytest.mark.asyncio
     async def test_run_invalid_json(self, server, mock_mcp_handler):
         """Test main loop with invalid JSON input."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            'invalid json\n',
-            ''  # EOF
-        ]
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
-
-            await server.run()
+        stdout = await run_server(server, ['invalid json\n'])
 
-            # Verify no print was called (invalid JSON is skipped)
-            mock_print.assert_not_called()
+        # Invalid JSON is skipped
+        assert stdout.responses() == []
+        mock_mcp_handler.handle_request.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_run_empty_lines(self, server, mock_mcp_handler):
         """Test main loop with empty lines."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '\n',  # Empty line
-            '   \n',  # Whitespace only
-            ''  # EOF
-        ]
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
-
-            await server.run()
+        stdout = await run_server(server, ['\n', '   \n'])
 
-            # Verify no print was called (empty lines are skipped)
-            mock_print.assert_not_called()
+        # Empty lines are skipped
+        assert stdout.responses() == []
 
     @pytest.mark.asyncio
     async def test_run_request_handling_exception(self, server, mock_mcp_handler):
         """Test main loop with request handling exception."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n',
-            ''  # EOF
-        ]
-
-        # Mock handler to raise exception
         mock_mcp_handler.handle_request.side_effect = Exception("Handler crashed")
 
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
-
-            await server.run()
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n'])
 
-            # Verify error response was printed
-            mock_print.assert_called_once()
-            call_args = mock_print.call_args[0][0]
-            error_response = json.loads(call_args)
-            
-            assert error_response["jsonrpc"] == "2.0"
-            assert error_response["error"]["code"] == -32603
-            assert "Internal error: Handler crashed" in error_response["error"]["message"]
-            assert error_response["id"] == 1
+        error_response, = stdout.responses()
+        assert error_response["jsonrpc"] == "2.0"
+        assert error_response["error"]["code"] == -32603
+        assert error_response["error"]["message"].startswith("Internal error")
+        assert error_response["id"] == 1
 
     @pytest.mark.asyncio
     async def test_run_notification_no_response(self, server, mock_mcp_handler):
         """Test main loop with notification (no response expected)."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '{"jsonrpc": "2.0", "method": "initialized"}\n',
-            ''  # EOF
-        ]
-
-        # Mock handler to return None (notification)
         mock_mcp_handler.handle_request.return_value = None
 
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "initialized"}\n'])
+
+        # Notifications have no response
+        assert stdout.responses() == []
+
+    @pytest.mark.asyncio
+    async def test_run_known_notification_skips_handler(self, server, mock_mcp_handler):
+        """Test acknowledged-only notifications never reach the handler."""
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "notifications/initialized"}\n'])
+
+        assert stdout.responses() == []
+        mock_mcp_handler.handle_request.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_run_notification_response_discarded(self, server, mock_mcp_handler):
+        """Test other notifications are handled but never answered."""
+        mock_mcp_handler.handle_request.return_value = {
+            "jsonrpc": "2.0",
+            "error": {"code": -32601, "message": "Method not found"},
+            "id": None
+        }
+
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "notifications/progress"}\n'])
+
+        assert stdout.responses() == []
+        mock_mcp_handler.handle_request.assert_called_once()
 
-            await server.run()
+    @pytest.mark.asyncio
+    async def test_run_multiple_requests(self, server, mock_mcp_handler):
+        """Test main loop answers each request in turn."""
+        mock_mcp_handler.handle_request.side_effect = lambda request: {
+            "jsonrpc": "2.0",
+            "result": {},
+            "id": request["id"]
+        }
+
+        stdout = await run_server(server, [
+            '{"jsonrpc": "2.0", "method": "ping", "id": 1}\n',
+            '{"jsonrpc": "2.0", "method": "ping", "id": 2}\n',
+        ])
+
+        assert [response["id"] for response in stdout.responses()] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_run_handles_requests_concurrently(self, server, mock_mcp_handler):
+        """Test a slow request does not block the requests read after it."""
+        second_done = asyncio.Event()
+
+        async def handle(request):
+            if request["id"] == 1:
+                await second_done.wait()
+            else:
+                second_done.set()
+            return {"jsonrpc": "2.0", "result": {}, "id": request["id"]}
+
+        mock_mcp_handler.handle_request.side_effect = handle
+
+        stdout = await asyncio.wait_for(run_server(server, [
+            '{"jsonrpc": "2.0", "method": "tools/call", "id": 1}\n',
+            '{"jsonrpc": "2.0", "method": "ping", "id": 2}\n',
+        ]), timeout=5)
+
+        assert [response["id"] for response in stdout.responses()] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_run_over_pipes(self, server, mock_mcp_handler):
+        """Test the stream reader and writer are used when stdio are pipes."""
+        mock_mcp_handler.handle_request.return_value = {"jsonrpc": "2.0", "result": {}, "id": 1}
+        stdin_read, stdin_write = os.pipe()
+        stdout_read, stdout_write = os.pipe()
+        os.write(stdin_write, b'{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n')
+        os.close(stdin_write)
+
+        with open(stdin_read, "rb") as stdin, open(stdout_write, "wb") as stdout:
+            await run_server(server, stdin=stdin, stdout=stdout)
+            assert server.reader is not None
+            assert server.writer is not None
+            server.writer.close()
+
+        with open(stdout_read, "rb") as output:
+            assert json.loads(output.readline()) == {"jsonrpc": "2.0", "result": {}, "id": 1}
+
+    @pytest.mark.asyncio
+    async def test_run_worker_pool_limits_concurrency(self, server, mock_mcp_handler):
+        """Test no more requests run at once than there are workers."""
+        active = 0
+        peak = 0
+
+        async def handle(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"jsonrpc": "2.0", "result": {}, "id": request["id"]}
+
+        mock_mcp_handler.handle_request.side_effect = handle
+
+        with patch("server.mcp_stdio_server._WORKER_COUNT", 2):
+            stdout = await run_server(server, [
+                f'{{"jsonrpc": "2.0", "method": "ping", "id": {i}}}\n' for i in range(5)
+            ])
+
+        assert sorted(response["id"] for response in stdout.responses()) == list(range(5))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_read_line_frames_buffered_lines(self, server):
+        """Test every complete line in a chunk is framed from one read."""
+        server.reader = asyncio.StreamReader()
+        server.reader.feed_data(b'{"id": 1}\n\n{"id": 2}\n{"id"')
+        server.reader.feed_data(b': 3}')
+        server.reader.feed_eof()
+
+        lines = [await server._read_line() for _ in range(4)]
+
+        assert lines == [b'{"id": 1}', b'{"id": 2}', b'{"id": 3}', b""]
+
+    @pytest.mark.asyncio
+    async def test_read_line_rejects_oversized_line(self, server):
+        """Test a line over the limit raises and is discarded."""
+        server.reader = asyncio.StreamReader()
+        server.reader.feed_data(b"x" * 32)
+        server.reader.feed_eof()
+
+        with patch("server.mcp_stdio_server._STDIN_LINE_LIMIT", 16):
+            with pytest.raises(ValueError):
+                await server._read_line()
 
-            # Verify no print was called (notification has no response)
-            mock_print.assert_not_called()
+        assert await server._read_line() == b""
 
     @pytest.mark.asyncio
     async def test_run_keyboard_interrupt(self, server):
         """Test main loop with keyboard interrupt."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = KeyboardInterrupt()
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
+        stdin = Mock()
+        stdin.readline.side_effect = KeyboardInterrupt()
 
-            # Should not raise exception
-            await server.run()
+        # Should not raise exception
+        await run_server(server, stdin=stdin)
 
     @pytest.mark.asyncio
     async def test_run_main_loop_exception(self, server):
         """Test main loop with unexpected exception."""
-        with patch('sys.stdin.readline', side_effect=Exception("Unexpected error")), \
-             patch('builtins.print') as mock_print, \
-             patch('sys.stdout.flush') as mock_flush, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
+        stdin = Mock()
+        stdin.readline.side_effect = [Exception("Unexpected error"), ""]
 
-            await server.run()
+        stdout = await run_server(server, stdin=stdin)
 
-            # Verify error response was printed
-            mock_print.assert_called_once()
-            call_args = mock_print.call_args[0][0]
-            error_response = json.loads(call_args)
-            
-            assert error_response["jsonrpc"] == "2.0"
-            assert error_response["error"]["code"] == -32603
-            assert "Server error: Unexpected error" in error_response["error"]["message"]
-            assert error_response["id"] is None
+        error_response, = stdout.responses()
+        assert error_response["jsonrpc"] == "2.0"
+        assert error_response["error"]["code"] == -32603
+        assert "Server error: Unexpected error" in error_response["error"]["message"]
+        assert error_response["id"] is None
 
     @pytest.mark.asyncio
     async def test_run_json_dump_error(self, server):
-        """Test main loop with JSON serialization error in error response."""
-        with patch('sys.stdin.readline', side_effect=Exception("Unexpected error")), \
-             patch('builtins.print', side_effect=Exception("Print failed")), \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
+        """Test main loop when the error response cannot be written."""
+        stdin = Mock()
+        stdin.readline.side_effect = [Exception("Unexpected error"), ""]
+        stdout = FakeStdout()
+        stdout.buffer.write = Mock(side_effect=Exception("Write failed"))
 
-            # Should not raise exception even when error response fails
-            await server.run()
+        # Should not raise exception even when error response fails
+        await run_server(server, stdin=stdin, stdout=stdout)
 
     def test_logging_configuration(self):
         """Test that logging is configured properly."""
@@ -336,14 +359,7 @@ class TestStdioMCPServer:
     @pytest.mark.asyncio
     async def test_complex_json_response(self, server, mock_mcp_handler):
         """Test handling complex JSON response with Unicode characters."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n',
-            ''  # EOF
-        ]
-
-        # Mock response with Unicode characters
-        mock_response = {
+        mock_mcp_handler.handle_request.return_value = {
             "jsonrpc": "2.0",
             "result": {
                 "tools": [
@@ -355,61 +371,26 @@ class TestStdioMCPServer:
             },
             "id": 1
         }
-        mock_mcp_handler.handle_request.return_value = mock_response
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
 
-            await server.run()
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n'])
 
-            # Verify Unicode handling in JSON response
-            mock_print.assert_called_once()
-            call_args = mock_print.call_args[0][0]
-            
-            # Should be valid JSON with Unicode characters
-            parsed_response = json.loads(call_args)
-            assert parsed_response["result"]["tools"][0]["name"] == "測試テスト"
-            assert "日本語" in parsed_response["result"]["tools"][0]["description"]
+        # Unicode is written as UTF-8, not escaped
+        assert "日本語".encode() in stdout.buffer.getvalue()
+        parsed_response, = stdout.responses()
+        assert parsed_response["result"]["tools"][0]["name"] == "測試テスト"
+        assert "日本語" in parsed_response["result"]["tools"][0]["description"]
 
     @pytest.mark.asyncio
     async def test_large_response_handling(self, server, mock_mcp_handler):
         """Test handling of large response data."""
-        mock_stdin_readline = Mock()
-        mock_stdin_readline.side_effect = [
-            '{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n',
-            ''  # EOF
-        ]
-
-        # Mock large response
         large_data = "x" * 10000  # 10KB of data
-        mock_response = {
+        mock_mcp_handler.handle_request.return_value = {
             "jsonrpc": "2.0",
             "result": {"large_field": large_data},
             "id": 1
         }
-        mock_mcp_handler.handle_request.return_value = mock_response
-
-        with patch('sys.stdin.readline', mock_stdin_readline), \
-             patch('builtins.print') as mock_print, \
-             patch('asyncio.get_event_loop') as mock_loop:
-            
-            def run_in_executor(executor, func):
-                return func()
-            
-            mock_loop.return_value.run_in_executor.side_effect = run_in_executor
 
-            await server.run()
+        stdout = await run_server(server, ['{"jsonrpc": "2.0", "method": "tools/list", "id": 1}\n'])
 
-            # Verify large response is handled correctly
-            mock_print.assert_called_once()
-            call_args = mock_print.call_args[0][0]
-            
-            # Should contain the large data
-            parsed_response = json.loads(call_args)
-            assert len(parsed_response["result"]["large_field"]) == 10000
\ No newline at end of file
+        parsed_response, = stdout.responses()
+        assert parsed_response["result"]["large_field"] == large_data
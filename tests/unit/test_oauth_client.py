@@ -1,8 +1,12 @@
 """Tests for Zoho OAuth client module."""
 
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 from unittest.mock import AsyncMock, Mock, patch
 
 import httpx
+import orjson
 import pytest
 
 from server.zoho.oauth_client import TokenResponse, ZohoOAuthClient
@@ -56,10 +60,11 @@ class TestZohoOAuthClient:
     def mock_redis(self):
         """Mock Redis client."""
         with patch('server.zoho.oauth_client.redis_client') as mock:
-            mock.get = AsyncMock()
+            mock.get = AsyncMock(return_value=None)
             mock.setex = AsyncMock()
             mock.delete = AsyncMock()
-            mock.ttl = AsyncMock()
+            mock.ttl = AsyncMock(return_value=-2)
+            mock.get_with_ttl = AsyncMock(return_value=(None, -2))
             yield mock
 
     @pytest.fixture
@@ -72,7 +77,6 @@ class TestZohoOAuthClient:
         assert client.client_id == "test_client_id"
         assert client.client_secret == "test_client_secret"
         assert client.refresh_token == "test_refresh_token"
-        assert client.token_url == "https://accounts.zoho.com/oauth/v2/token"
         assert client.cache_key == "zoho:access_token"
         assert client.cache_ttl == 3600
         assert client.max_retries == 3
@@ -109,96 +113,181 @@ class TestZohoOAuthClient:
             with pytest.raises(ValueError, match="ZOHO_REFRESH_TOKEN is required"):
                 ZohoOAuthClient()
 
+    @pytest.mark.asyncio
+    async def test_http_client_is_reused_until_closed(self, client):
+        """Test OAuth calls share one HTTP client for the accounts server."""
+        http = await client._get_http()
+        assert await client._get_http() is http
+        assert http.base_url == "https://accounts.zoho.com"
+
+        await client.aclose()
+        assert http.is_closed
+        assert await client._get_http() is not http
+        await client.aclose()
+
+    def test_backoff_full_jitter_bounds(self, client):
+        """Test backoff delays stay within the exponential cap."""
+        for attempt in range(10):
+            cap = min(client.base_delay * (2 ** attempt), client.max_delay)
+            for _ in range(20):
+                assert 0 <= client._backoff(attempt) <= cap
+
     @pytest.mark.asyncio
     async def test_get_cached_token_success(self, client, mock_redis):
         """Test getting cached token successfully."""
-        mock_redis.get.return_value = b"cached_token"
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 3000)
 
         with patch('server.zoho.oauth_client.logger'):
             result = await client._get_cached_token()
 
-        mock_redis.get.assert_called_once_with("zoho:access_token")
-        assert result == "cached_token"
+        mock_redis.get_with_ttl.assert_called_once_with("zoho:access_token")
+        assert result == ("cached_token", 3000)
 
     @pytest.mark.asyncio
     async def test_get_cached_token_string_response(self, client, mock_redis):
         """Test getting cached token when Redis returns string."""
-        mock_redis.get.return_value = "cached_token"
+        mock_redis.get_with_ttl.return_value = ("cached_token", 3000)
 
         result = await client._get_cached_token()
 
-        assert result == "cached_token"
+        assert result == ("cached_token", 3000)
 
     @pytest.mark.asyncio
     async def test_get_cached_token_not_found(self, client, mock_redis):
         """Test getting cached token when not found."""
-        mock_redis.get.return_value = None
-
         result = await client._get_cached_token()
 
-        assert result is None
+        assert result == (None, -2)
 
     @pytest.mark.asyncio
     async def test_get_cached_token_error(self, client, mock_redis):
         """Test getting cached token with Redis error."""
-        mock_redis.get.side_effect = Exception("Redis error")
+        mock_redis.get_with_ttl.side_effect = Exception("Redis error")
 
         with patch('server.zoho.oauth_client.logger'):
             result = await client._get_cached_token()
 
-        assert result is None
+        assert result == (None, -2)
 
     @pytest.mark.asyncio
     async def test_get_access_token_cached(self, client, mock_redis):
         """Test getting access token from cache."""
-        mock_redis.get.return_value = b"cached_token"
+        mock_redis.get_with_ttl.return_value = (b"cached_token", -2)
 
         with patch('server.zoho.oauth_client.logger'):
             result = await client.get_access_token()
 
         assert result == "cached_token"
-        mock_redis.get.assert_called_once_with("zoho:access_token")
+        mock_redis.get_with_ttl.assert_called_once_with("zoho:access_token")
+
+    @pytest.mark.asyncio
+    async def test_get_access_token_reuses_token_in_memory(self, client, mock_redis):
+        """Test a fresh token is served without touching Redis again."""
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 3000)
+
+        first = await client.get_access_token()
+        second = await client.get_access_token()
+
+        assert first == second == "cached_token"
+        mock_redis.get_with_ttl.assert_called_once_with("zoho:access_token")
+        assert client._background_refresh is None
+
+    @pytest.mark.asyncio
+    async def test_get_access_token_refreshes_ahead_of_cache_expiry(self, client, mock_redis):
+        """Test a cached token near expiry is returned while a refresh starts."""
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 100)
+
+        with patch.object(client, '_refresh_access_token', AsyncMock(return_value="new_token")) as mock_refresh:
+            result = await client.get_access_token()
+            await client._background_refresh
+
+        assert result == "cached_token"
+        mock_refresh.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_access_token_stale_refreshes_in_background(self, client, mock_redis):
+        """Test a stale token is returned while a refresh runs in the background."""
+        client._remember_token("stale_token", 60)
+
+        with patch.object(client, '_refresh_access_token', AsyncMock(return_value="new_token")) as mock_refresh:
+            result = await client.get_access_token(allow_stale=True)
+            await client._background_refresh
+
+        assert result == "stale_token"
+        mock_refresh.assert_called_once()
+        mock_redis.get_with_ttl.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_access_token_stale_blocks_without_allow_stale(self, client, mock_redis):
+        """Test a stale token is refreshed synchronously by default."""
+        client._remember_token("stale_token", 60)
+
+        with patch.object(client, '_refresh_access_token', AsyncMock(return_value="new_token")):
+            result = await client.get_access_token()
+
+        assert result == "new_token"
+        assert client._background_refresh is None
+
+    @pytest.mark.asyncio
+    async def test_get_access_token_concurrent_refreshes_share_one_request(self, client, mock_redis):
+        """Test parallel callers missing the cache trigger a single token refresh."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = orjson.dumps({
+            "access_token": "new_token",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "scope": "ZohoProjects.projects.ALL",
+            "api_domain": "https://projectsapi.zoho.com"
+        })
+
+        mock_client = AsyncMock()
+        mock_client.post = AsyncMock(return_value=mock_response)
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
+            results = await asyncio.gather(*(client.get_access_token() for _ in range(5)))
+
+        assert results == ["new_token"] * 5
+        assert mock_client.post.call_count == 1
+        assert client._refresh_inflight is None
 
     @pytest.mark.asyncio
     async def test_get_access_token_force_refresh(self, client, mock_redis):
         """Test getting access token with forced refresh."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "access_token": "new_token",
             "token_type": "Bearer",
             "expires_in": 3600,
             "scope": "ZohoProjects.projects.ALL",
             "api_domain": "https://projectsapi.zoho.com"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
                 result = await client.get_access_token(force_refresh=True)
 
         assert result == "new_token"
-        mock_redis.get.assert_not_called()  # Should not check cache when force_refresh=True
+        mock_redis.get_with_ttl.assert_not_called()  # Should not check cache when force_refresh=True
 
     @pytest.mark.asyncio
     async def test_refresh_access_token_success(self, client, mock_redis):
         """Test successful token refresh."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "access_token": "new_access_token",
             "token_type": "Bearer",
             "expires_in": 3600,
             "scope": "ZohoProjects.projects.ALL",
             "api_domain": "https://projectsapi.zoho.com"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
@@ -206,14 +295,13 @@ class TestZohoOAuthClient:
 
         # Verify API call
         mock_client.post.assert_called_once_with(
-            "https://accounts.zoho.com/oauth/v2/token",
+            "/oauth/v2/token",
             data={
                 "grant_type": "refresh_token",
                 "client_id": "test_client_id",
                 "client_secret": "test_client_secret",
                 "refresh_token": "test_refresh_token",
-            },
-            timeout=30.0
+            }
         )
 
         # Verify caching
@@ -227,14 +315,13 @@ class TestZohoOAuthClient:
         mock_response = Mock()
         mock_response.status_code = 400
         mock_response.text = "Bad Request"
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "error": "invalid_grant",
             "error_description": "Invalid refresh token"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
@@ -247,9 +334,8 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_refresh_access_token_network_error(self, client, mock_redis):
         """Test token refresh with network error."""
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=httpx.ConnectError("Connection failed"))
 
             with patch('server.zoho.oauth_client.logger'):
@@ -261,17 +347,33 @@ class TestZohoOAuthClient:
         """Test token refresh with JSON parsing error."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.side_effect = ValueError("Invalid JSON")
+        mock_response.content = b"<html>Invalid JSON</html>"
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
-            with patch('server.zoho.oauth_client.logger'):
-                with pytest.raises(Exception, match="Token refresh failed: Invalid JSON"):
+            with patch('asyncio.sleep'), patch('server.zoho.oauth_client.logger'):
+                with pytest.raises(Exception, match="Token refresh failed: unexpected character"):
+                    await client._refresh_access_token()
+
+    @pytest.mark.asyncio
+    async def test_refresh_access_token_missing_field(self, client, mock_redis):
+        """Test a success response without an access token is treated as a failure."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = orjson.dumps({"expires_in": 3600})
+
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
+            mock_client.post = AsyncMock(return_value=mock_response)
+
+            with patch('asyncio.sleep'), patch('server.zoho.oauth_client.logger'):
+                with pytest.raises(Exception, match="Token refresh failed: 'access_token'"):
                     await client._refresh_access_token()
 
+        mock_redis.setex.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_cache_token_success(self, client, mock_redis):
         """Test successful token caching."""
@@ -306,18 +408,16 @@ class TestZohoOAuthClient:
         mock_response = Mock()
         mock_response.status_code = 200
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
                 result = await client.revoke_token("test_token")
 
         mock_client.post.assert_called_once_with(
-            "https://accounts.zoho.com/oauth/v2/token/revoke",
-            data={"token": "test_token"},
-            timeout=30.0
+            "/oauth/v2/token/revoke",
+            data={"token": "test_token"}
         )
 
         mock_redis.delete.assert_called_once_with("zoho:access_token")
@@ -329,9 +429,8 @@ class TestZohoOAuthClient:
         mock_response = Mock()
         mock_response.status_code = 400
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
@@ -343,9 +442,8 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_revoke_token_network_error(self, client, mock_redis):
         """Test token revocation with network error."""
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=httpx.ConnectError("Connection failed"))
 
             with patch('server.zoho.oauth_client.logger'):
@@ -358,24 +456,22 @@ class TestZohoOAuthClient:
         """Test successful token info retrieval."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "access_token": "test_token",
             "expires_in": 2400,
             "scope": "ZohoProjects.projects.ALL",
             "user_identifier": "test_user"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             result = await client.get_token_info("test_token")
 
         mock_client.post.assert_called_once_with(
-            "https://accounts.zoho.com/oauth/v2/token/info",
-            data={"access_token": "test_token"},
-            timeout=30.0
+            "/oauth/v2/token/info",
+            data={"access_token": "test_token"}
         )
 
         assert result["access_token"] == "test_token"
@@ -387,9 +483,8 @@ class TestZohoOAuthClient:
         mock_response = Mock()
         mock_response.status_code = 400
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response)
 
             with patch('server.zoho.oauth_client.logger'):
@@ -400,9 +495,8 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_get_token_info_network_error(self, client):
         """Test token info retrieval with network error."""
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=httpx.ConnectError("Connection failed"))
 
             with patch('server.zoho.oauth_client.logger'):
@@ -431,8 +525,6 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_get_token_expiry_warning_no_cached_token(self, client, mock_redis):
         """Test expiry warning when no cached token."""
-        mock_redis.get.return_value = None
-
         result = await client.get_token_expiry_warning()
 
         assert result == "No cached token found"
@@ -440,7 +532,7 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_get_token_expiry_warning_invalid_token(self, client, mock_redis):
         """Test expiry warning when token is invalid."""
-        mock_redis.get.return_value = b"cached_token"
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 3000)
 
         with patch.object(client, 'get_token_info', return_value=None):
             result = await client.get_token_expiry_warning()
@@ -450,8 +542,7 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_get_token_expiry_warning_expires_soon(self, client, mock_redis):
         """Test expiry warning when token expires soon."""
-        mock_redis.get.return_value = b"cached_token"
-        mock_redis.ttl.return_value = 7200  # 2 hours
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 7200)  # 2 hours
 
         with patch.object(client, 'get_token_info', return_value={"valid": True}):
             result = await client.get_token_expiry_warning()
@@ -461,8 +552,7 @@ class TestZohoOAuthClient:
     @pytest.mark.asyncio
     async def test_get_token_expiry_warning_not_expiring_soon(self, client, mock_redis):
         """Test expiry warning when token is not expiring soon."""
-        mock_redis.get.return_value = b"cached_token"
-        mock_redis.ttl.return_value = 86400 * 5  # 5 days
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 86400 * 5)  # 5 days
 
         with patch.object(client, 'get_token_info', return_value={"valid": True}):
             result = await client.get_token_expiry_warning()
@@ -471,15 +561,15 @@ class TestZohoOAuthClient:
 
     @pytest.mark.asyncio
     async def test_get_token_expiry_warning_error(self, client, mock_redis):
-        """Test expiry warning with error in TTL check."""
-        mock_redis.get.return_value = b"cached_token"
-        mock_redis.ttl.side_effect = Exception("Redis TTL error")
+        """Test expiry warning with error in token check."""
+        mock_redis.get_with_ttl.return_value = (b"cached_token", 3000)
 
-        with patch.object(client, 'get_token_info', return_value={"valid": True}):
+        with patch.object(client, 'get_token_info', side_effect=Exception("Token info error")):
             with patch('server.zoho.oauth_client.logger'):
                 result = await client.get_token_expiry_warning()
 
-        assert "Token expiry check failed: Redis TTL error" in result
+        assert "Token expiry check failed: Token info error" in result
+        mock_redis.ttl.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_refresh_access_token_rate_limit_retry(self, client, mock_redis):
@@ -488,22 +578,21 @@ class TestZohoOAuthClient:
         mock_response_429 = Mock()
         mock_response_429.status_code = 429
         mock_response_429.headers = {"Retry-After": "2"}
-        mock_response_429.json.return_value = {"error": "rate_limit_exceeded"}
+        mock_response_429.content = orjson.dumps({"error": "rate_limit_exceeded"})
 
         # Second response: success
         mock_response_200 = Mock()
         mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {
+        mock_response_200.content = orjson.dumps({
             "access_token": "new_access_token",
             "token_type": "Bearer",
             "expires_in": 3600,
             "scope": "ZohoProjects.projects.ALL",
             "api_domain": "https://projectsapi.zoho.com"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=[mock_response_429, mock_response_200])
 
             with patch('asyncio.sleep') as mock_sleep:
@@ -513,8 +602,9 @@ class TestZohoOAuthClient:
         # Should have made 2 calls
         assert mock_client.post.call_count == 2
 
-        # Should have slept for the retry-after period
-        mock_sleep.assert_called_once_with(2.0)
+        # Should have slept for the jittered retry-after period
+        mock_sleep.assert_called_once()
+        assert 1.8 <= mock_sleep.call_args.args[0] <= 2.2
 
         # Verify successful result
         assert result == "new_access_token"
@@ -526,32 +616,56 @@ class TestZohoOAuthClient:
         # Rate limited response without Retry-After header
         mock_response_429 = Mock()
         mock_response_429.status_code = 429
-        mock_response_429.headers = {"Retry-After": "2"}
-        mock_response_429.json.return_value = {"error": "rate_limit_exceeded"}
+        mock_response_429.headers = {}
+        mock_response_429.content = orjson.dumps({"error": "rate_limit_exceeded"})
 
         # Success response
         mock_response_200 = Mock()
         mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {
+        mock_response_200.content = orjson.dumps({
             "access_token": "new_access_token",
             "token_type": "Bearer",
             "expires_in": 3600,
             "scope": "ZohoProjects.projects.ALL",
             "api_domain": "https://projectsapi.zoho.com"
-        }
+        })
+
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
+            mock_client.post = AsyncMock(side_effect=[mock_response_429, mock_response_200])
+
+            with patch('asyncio.sleep') as mock_sleep:
+                with patch('server.zoho.oauth_client.logger'):
+                    result = await client._refresh_access_token()
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        # Should fall back to jittered exponential backoff
+        mock_sleep.assert_called_once()
+        assert 0 <= mock_sleep.call_args.args[0] <= 1.0
+        assert result == "new_access_token"
+
+    @pytest.mark.asyncio
+    async def test_refresh_access_token_rate_limit_http_date(self, client, mock_redis):
+        """Test a date-form Retry-After is honoured instead of the backoff."""
+        mock_response_429 = Mock()
+        mock_response_429.status_code = 429
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+        mock_response_429.headers = {"Retry-After": format_datetime(retry_at, usegmt=True)}
+        mock_response_429.content = orjson.dumps({"error": "rate_limit_exceeded"})
+
+        mock_response_200 = Mock()
+        mock_response_200.status_code = 200
+        mock_response_200.content = orjson.dumps({"access_token": "new_access_token", "expires_in": 3600})
+
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=[mock_response_429, mock_response_200])
 
             with patch('asyncio.sleep') as mock_sleep:
                 with patch('server.zoho.oauth_client.logger'):
                     result = await client._refresh_access_token()
 
-        # Should use Retry-After header value when provided
-        mock_sleep.assert_called_once_with(2)
         assert result == "new_access_token"
+        assert 7 <= mock_sleep.call_args.args[0] <= 11
 
     @pytest.mark.asyncio
     async def test_refresh_access_token_rate_limit_max_retries(self, client, mock_redis):
@@ -559,11 +673,10 @@ class TestZohoOAuthClient:
         mock_response_429 = Mock()
         mock_response_429.status_code = 429
         mock_response_429.headers = {"Retry-After": "60"}
-        mock_response_429.json.return_value = {"error": "rate_limit_exceeded"}
+        mock_response_429.content = orjson.dumps({"error": "rate_limit_exceeded"})
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response_429)
 
             with patch('asyncio.sleep') as mock_sleep:
@@ -577,10 +690,9 @@ class TestZohoOAuthClient:
         # Should have slept 2 times (between retries)
         assert mock_sleep.call_count == 2
 
-        # Verify Retry-After header is used: 60, 60 (capped at max_delay)
-        expected_delays = [60, 60]
+        # Verify Retry-After header is used: 60, 60 (capped at max_delay), jittered by 10%
         actual_delays = [call.args[0] for call in mock_sleep.call_args_list]
-        assert actual_delays == expected_delays
+        assert all(54 <= delay <= 66 for delay in actual_delays)
 
     @pytest.mark.asyncio
     async def test_refresh_access_token_server_error_retry(self, client, mock_redis):
@@ -589,30 +701,30 @@ class TestZohoOAuthClient:
         mock_response_500 = Mock()
         mock_response_500.status_code = 500
         mock_response_500.text = "Internal Server Error"
-        mock_response_500.json.return_value = {"error": "server_error"}
+        mock_response_500.content = orjson.dumps({"error": "server_error"})
 
         # Success response
         mock_response_200 = Mock()
         mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {
+        mock_response_200.content = orjson.dumps({
             "access_token": "new_access_token",
             "token_type": "Bearer",
             "expires_in": 3600,
             "scope": "ZohoProjects.projects.ALL",
             "api_domain": "https://projectsapi.zoho.com"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=[mock_response_500, mock_response_200])
 
             with patch('asyncio.sleep') as mock_sleep:
                 with patch('server.zoho.oauth_client.logger'):
                     result = await client._refresh_access_token()
 
-        # Should use exponential backoff for server error
-        mock_sleep.assert_called_once_with(1.0)
+        # Should use jittered exponential backoff for server error
+        mock_sleep.assert_called_once()
+        assert 0 <= mock_sleep.call_args.args[0] <= 1.0
         assert result == "new_access_token"
 
     @pytest.mark.asyncio
@@ -621,14 +733,13 @@ class TestZohoOAuthClient:
         mock_response_401 = Mock()
         mock_response_401.status_code = 401
         mock_response_401.text = "Unauthorized"
-        mock_response_401.json.return_value = {
+        mock_response_401.content = orjson.dumps({
             "error": "invalid_client",
             "error_description": "Invalid client credentials"
-        }
+        })
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(return_value=mock_response_401)
 
             with patch('server.zoho.oauth_client.logger'):
@@ -638,8 +749,42 @@ class TestZohoOAuthClient:
         # Should only make one attempt for non-retriable errors
         assert mock_client.post.call_count == 1
 
-        # Should clear cached token
+        # Should clear cached token and remember the rejection briefly
         mock_redis.delete.assert_called_once_with("zoho:access_token")
+        mock_redis.setex.assert_called_once_with(
+            "zoho:access_token:neg", 30, "401 - invalid_client: Invalid client credentials"
+        )
+
+    @pytest.mark.asyncio
+    async def test_refresh_access_token_negative_cache_hit(self, client, mock_redis):
+        """Test a recent rejection is raised without calling Zoho."""
+        mock_redis.get.return_value = b"401 - invalid_client: Invalid client credentials"
+
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
+            with pytest.raises(Exception, match="Token refresh failed: 401 - invalid_client"):
+                await client.get_access_token(force_refresh=True)
+
+        mock_redis.get.assert_called_once_with("zoho:access_token:neg")
+        mock_client.post.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refresh_access_token_server_error_not_negatively_cached(self, client, mock_redis):
+        """Test transient failures are not remembered as rejections."""
+        mock_response_503 = Mock()
+        mock_response_503.status_code = 503
+        mock_response_503.text = "Service Unavailable"
+        mock_response_503.content = orjson.dumps({"error": "server_error"})
+
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
+            mock_client.post = AsyncMock(return_value=mock_response_503)
+
+            with patch('asyncio.sleep'), patch('server.zoho.oauth_client.logger'):
+                with pytest.raises(Exception, match="Token refresh failed: 503"):
+                    await client._refresh_access_token()
+
+        mock_redis.setex.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_revoke_token_rate_limit_retry(self, client, mock_redis):
@@ -651,9 +796,8 @@ class TestZohoOAuthClient:
         mock_response_200 = Mock()
         mock_response_200.status_code = 200
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=[mock_response_429, mock_response_200])
 
             with patch('asyncio.sleep') as mock_sleep:
@@ -662,7 +806,8 @@ class TestZohoOAuthClient:
 
         # Should retry and succeed
         assert mock_client.post.call_count == 2
-        mock_sleep.assert_called_once_with(1.0)
+        mock_sleep.assert_called_once()
+        assert 54 <= mock_sleep.call_args.args[0] <= 66
         assert result is True
 
     @pytest.mark.asyncio
@@ -674,11 +819,10 @@ class TestZohoOAuthClient:
 
         mock_response_200 = Mock()
         mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {"access_token": "test_token", "expires_in": 3600}
+        mock_response_200.content = orjson.dumps({"access_token": "test_token", "expires_in": 3600})
 
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client = AsyncMock()
+        with patch.object(client, '_get_http', AsyncMock(return_value=mock_client)):
             mock_client.post = AsyncMock(side_effect=[mock_response_429, mock_response_200])
 
             with patch('asyncio.sleep') as mock_sleep:
@@ -686,7 +830,8 @@ class TestZohoOAuthClient:
 
         # Should retry and succeed
         assert mock_client.post.call_count == 2
-        mock_sleep.assert_called_once_with(1.0)
+        mock_sleep.assert_called_once()
+        assert 54 <= mock_sleep.call_args.args[0] <= 66
         assert result["access_token"] == "test_token"
 
 
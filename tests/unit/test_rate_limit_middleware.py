@@ -1,373 +1,593 @@
 """Unit tests for rate limiting middleware."""
 
+import asyncio
+import json
 import time
 from unittest.mock import AsyncMock, Mock
 
 import pytest
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
+from fastapi import Response
+from redis.exceptions import NoScriptError
 
-from server.middleware.rate_limit import RateLimitMiddleware
+from server.middleware.rate_limit import RateLimiter, RateLimitMiddleware
 
 
-class TestRateLimitMiddleware:
-    """Test rate limiting middleware."""
+def make_scope(path="/api/test", client_ip="192.168.1.100", headers=None):
+    """Create an HTTP scope for the given path and client."""
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [
+            (key.lower().encode(), value.encode())
+            for key, value in (headers or {}).items()
+        ],
+        "client": (client_ip, 50000) if client_ip else None,
+    }
 
-    @pytest.fixture
-    def app(self):
-        """Create mock FastAPI app."""
-        return Mock()
+
+async def call_middleware(middleware, scope):
+    """Run a request through the middleware and collect the response."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, body
+
+
+def make_app(body=b"OK"):
+    """Create an ASGI app returning a fixed response."""
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope)
+        await Response(content=body)(scope, receive, send)
+
+    app.calls = calls
+    return app
+
+
+class FakePipeline:
+    """Non-transactional pipeline that records queued EVALSHA commands.
+
+    Like redis.asyncio's pipeline, execute() returns one result per queued
+    command, so a script call that never reached the pipeline yields nothing.
+    Results are taken in order from a queue shared by every pipeline.
+    """
+
+    def __init__(self, results, error=None):
+        self.results = results
+        self.error = error
+        self.commands = []
+        self.executions = 0
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        self.commands.append((sha, numkeys, keys_and_args))
+        return self
+
+    async def execute(self, raise_on_error=True):
+        self.executions += 1
+        if self.error is not None:
+            raise self.error
+        results = self.results[:len(self.commands)]
+        del self.results[:len(self.commands)]
+        return results
+
+
+def make_redis_client(*results, error=None):
+    """Create a Redis client whose pipelines return the given script results."""
+    redis_client = Mock()
+    redis_client.pipes = []
+    queue = list(results)
+
+    def pipeline(transaction=True):
+        pipe = FakePipeline(queue, error)
+        redis_client.pipes.append(pipe)
+        return pipe
+
+    redis_client.pipeline.side_effect = pipeline
+    redis_client.script_load = AsyncMock(return_value="script-sha")
+    redis_client.register_script.return_value = Mock(sha="script-sha", script="return 1")
+    return redis_client
+
+
+def queued_calls(redis_client):
+    """Return the (keys, args) of every script call queued on the pipelines."""
+    calls = []
+    for pipe in redis_client.pipes:
+        for sha, numkeys, keys_and_args in pipe.commands:
+            assert sha == "script-sha"
+            calls.append((list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])))
+    return calls
+
+
+class TestRateLimiter:
+    """Test token bucket rate limiter."""
 
     @pytest.fixture
-    def middleware(self, app):
-        """Create rate limit middleware instance."""
-        return RateLimitMiddleware(
-            app=app,
+    def limiter(self):
+        """Create rate limiter instance."""
+        return RateLimiter(
             calls=5,  # 5 calls per period for testing
             period=60,  # 60 seconds
             bypass_paths=["/health", "/docs"]
         )
 
-    @pytest.fixture
-    def mock_request(self):
-        """Create mock request."""
-        request = Mock(spec=Request)
-        request.url.path = "/api/test"
-        request.headers = {}
-        request.client.host = "192.168.1.100"
-        return request
-
-    def test_middleware_initialization(self, app):
-        """Test middleware initialization."""
-        middleware = RateLimitMiddleware(
-            app=app,
+    def test_initialization(self):
+        """Test rate limiter initialization."""
+        limiter = RateLimiter(
             calls=100,
             period=60,
             bypass_paths=["/health", "/metrics"]
         )
 
-        assert middleware.calls == 100
-        assert middleware.period == 60
-        assert "/health" in middleware.bypass_paths
-        assert "/metrics" in middleware.bypass_paths
-        assert isinstance(middleware.clients, dict)
+        assert limiter.calls == 100
+        assert limiter.period == 60
+        assert limiter.capacity == 100
+        assert limiter.refill_per_sec == pytest.approx(100 / 60)
+        assert "/health" in limiter.bypass_paths
+        assert "/metrics" in limiter.bypass_paths
+        assert isinstance(limiter.clients, dict)
+
+    def test_initialization_token_bucket(self):
+        """Test explicit token bucket configuration."""
+        limiter = RateLimiter(capacity=20, refill_per_sec=2.0)
 
-    def test_middleware_initialization_default_bypass_paths(self, app):
-        """Test middleware initialization with default bypass paths."""
-        middleware = RateLimitMiddleware(app=app)
+        assert limiter.calls == 20
+        assert limiter.capacity == 20
+        assert limiter.refill_per_sec == 2.0
+        assert limiter.full_refill_time == 10.0
 
-        assert "/health" in middleware.bypass_paths
-        assert "/docs" in middleware.bypass_paths
-        assert "/openapi.json" in middleware.bypass_paths
+    def test_initialization_default_bypass_paths(self):
+        """Test rate limiter initialization with default bypass paths."""
+        limiter = RateLimiter()
 
-    def test_get_client_identifier_from_ip(self, middleware, mock_request):
+        assert "/health" in limiter.bypass_paths
+        assert "/docs" in limiter.bypass_paths
+        assert "/openapi.json" in limiter.bypass_paths
+
+    def test_get_client_identifier_from_ip(self, limiter):
         """Test client identifier extraction from IP."""
-        mock_request.client.host = "192.168.1.100"
-        mock_request.headers = {}
+        client_id = limiter.get_client_identifier(make_scope())
 
-        client_id = middleware._get_client_identifier(mock_request)
         assert client_id == "192.168.1.100"
 
-    def test_get_client_identifier_from_x_forwarded_for(self, middleware, mock_request):
-        """Test client identifier extraction from X-Forwarded-For header."""
-        mock_request.headers = {"X-Forwarded-For": "203.0.113.1, 192.168.1.100"}
-        mock_request.client.host = "192.168.1.100"
-
-        client_id = middleware._get_client_identifier(mock_request)
-        assert client_id == "203.0.113.1"
+    def test_get_client_identifier_ignores_untrusted_forwarded_for(self, limiter):
+        """Test forwarded headers are ignored without trusted proxies."""
+        request = make_scope(headers={"X-Forwarded-For": "203.0.113.1"})
 
-    def test_get_client_identifier_from_x_real_ip(self, middleware, mock_request):
-        """Test client identifier extraction from X-Real-IP header."""
-        mock_request.headers = {"X-Real-IP": "203.0.113.2"}
-        mock_request.client.host = "192.168.1.100"
+        assert limiter.get_client_identifier(request) == "192.168.1.100"
 
-        client_id = middleware._get_client_identifier(mock_request)
-        assert client_id == "203.0.113.2"
+    def test_get_client_identifier_from_trusted_proxy(self):
+        """Test client identifier extraction through a trusted proxy."""
+        limiter = RateLimiter(trusted_proxies=["192.168.1.100"])
 
-    def test_get_client_identifier_priority(self, middleware, mock_request):
-        """Test header priority for client identification."""
-        mock_request.headers = {
-            "X-Forwarded-For": "203.0.113.1",
-            "X-Real-IP": "203.0.113.2"
-        }
-        mock_request.client.host = "192.168.1.100"
+        forwarded = make_scope(headers={"X-Forwarded-For": "203.0.113.1, 192.168.1.100"})
+        real_ip = make_scope(headers={"X-Real-IP": "203.0.113.2"})
 
-        # X-Forwarded-For should take priority
-        client_id = middleware._get_client_identifier(mock_request)
-        assert client_id == "203.0.113.1"
+        assert limiter.get_client_identifier(forwarded) == "203.0.113.1"
+        assert limiter.get_client_identifier(real_ip) == "203.0.113.2"
 
-    def test_get_client_identifier_no_client(self, middleware):
+    def test_get_client_identifier_from_trusted_proxy_network(self):
+        """Test trusted proxies can be given as CIDR blocks."""
+        limiter = RateLimiter(
+            trusted_proxies=["10.0.0.0/8", "2001:db8::/32", "not-an-ip"]
+        )
+        headers = {"X-Forwarded-For": "203.0.113.1"}
+
+        assert limiter.trusted_proxies == frozenset()
+        assert len(limiter._trusted_networks) == 2
+        assert limiter.get_client_identifier(
+            make_scope(client_ip="10.1.2.3", headers=headers)
+        ) == "203.0.113.1"
+        assert limiter.get_client_identifier(
+            make_scope(client_ip="2001:db8::1", headers=headers)
+        ) == "203.0.113.1"
+        assert limiter.get_client_identifier(
+            make_scope(client_ip="172.16.0.1", headers=headers)
+        ) == "172.16.0.1"
+
+    def test_get_client_identifier_leaves_scope_untouched(self, limiter):
+        """Test resolving the identifier does not store anything on the scope."""
+        scope = make_scope()
+
+        assert limiter.get_client_identifier(scope) == "192.168.1.100"
+        assert scope == make_scope()
+
+    def test_get_client_identifier_no_client(self, limiter):
         """Test client identifier when no client info available."""
-        request = Mock(spec=Request)
-        request.url.path = "/api/test"
-        request.headers = {}
-        request.client = None
+        client_id = limiter.get_client_identifier(make_scope(client_ip=None))
 
-        client_id = middleware._get_client_identifier(mock_request)
         assert client_id == "unknown"
 
-    def test_is_rate_limited_first_request(self, middleware, mock_request):
+    def test_should_bypass(self, limiter):
+        """Test bypass path matching."""
+        assert limiter.should_bypass("/health")
+        assert limiter.should_bypass("/docs/swagger")
+        assert not limiter.should_bypass("/api/users")
+
+    def test_is_rate_limited_first_request(self, limiter):
         """Test rate limiting for first request."""
-        client_id = "192.168.1.100"
-        
-        is_limited = middleware._is_rate_limited(client_id)
-        
+        is_limited, remaining, reset_time = limiter._is_rate_limited_memory("client")
+
         assert not is_limited
-        assert client_id in middleware.clients
-        assert middleware.clients[client_id]["count"] == 1
-
-    def test_is_rate_limited_within_limit(self, middleware, mock_request):
-        """Test rate limiting within allowed calls."""
-        client_id = "192.168.1.100"
-        
-        # Make 4 requests (within limit of 5)
-        for i in range(4):
-            is_limited = middleware._is_rate_limited(client_id)
+        assert remaining == 4
+        assert reset_time > time.time()
+        assert "client" in limiter.clients
+
+    def test_is_rate_limited_exceeded(self, limiter):
+        """Test rate limiting when the bucket is empty."""
+        for _ in range(5):
+            is_limited, _, _ = limiter._is_rate_limited_memory("client")
             assert not is_limited
 
-        # Check final state
-        assert middleware.clients[client_id]["count"] == 4
-
-    def test_is_rate_limited_exceeded(self, middleware, mock_request):
-        """Test rate limiting when limit is exceeded."""
-        client_id = "192.168.1.100"
-        
-        # Make 5 requests (at limit)
-        for i in range(5):
-            is_limited = middleware._is_rate_limited(client_id)
-            assert not is_limited
+        is_limited, remaining, _ = limiter._is_rate_limited_memory("client")
 
-        # 6th request should be limited
-        is_limited = middleware._is_rate_limited(client_id)
         assert is_limited
+        assert remaining == 0
+
+    def test_is_rate_limited_refills_over_time(self, limiter):
+        """Test tokens are refilled based on elapsed time."""
+        for _ in range(5):
+            limiter._is_rate_limited_memory("client")
 
-    def test_is_rate_limited_window_reset(self, middleware, mock_request):
-        """Test rate limiting window reset."""
-        client_id = "192.168.1.100"
-        
-        # Fill up the limit
-        for i in range(5):
-            middleware._is_rate_limited(client_id)
+        # Pretend one token's worth of time has passed
+        tokens, last_refill = limiter.clients["client"]
+        limiter.clients["client"] = (tokens, last_refill - 1 / limiter.refill_per_sec)
 
-        # Simulate time passing beyond the window
-        past_time = time.time() - middleware.period - 1
-        middleware.clients[client_id]["window_start"] = past_time
+        is_limited, remaining, _ = limiter._is_rate_limited_memory("client")
 
-        # Next request should reset the window
-        is_limited = middleware._is_rate_limited(client_id)
         assert not is_limited
-        assert middleware.clients[client_id]["count"] == 1
-
-    def test_should_bypass_exact_path(self, middleware):
-        """Test bypass for exact path match."""
-        assert middleware._should_bypass(Mock(url=Mock(path="/health")))
-        assert middleware._should_bypass(Mock(url=Mock(path="/docs")))
-
-    def test_should_bypass_path_prefix(self, middleware):
-        """Test bypass for path prefix match."""
-        assert middleware._should_bypass(Mock(url=Mock(path="/docs/swagger")))
-        assert middleware._should_bypass(Mock(url=Mock(path="/health/detailed")))
-
-    def test_should_not_bypass_different_path(self, middleware):
-        """Test no bypass for different path."""
-        assert not middleware._should_bypass(Mock(url=Mock(path="/api/users")))
-        assert not middleware._should_bypass(Mock(url=Mock(path="/test")))
-
-    def test_cleanup_expired_entries(self, middleware):
-        """Test cleanup of expired client entries."""
-        # Add some client data
-        current_time = time.time()
-        expired_time = current_time - middleware.period - 1
-        
-        middleware.clients = {
-            "active_client": {
-                "count": 3,
-                "window_start": current_time - 30  # Active within window
-            },
-            "expired_client": {
-                "count": 5,
-                "window_start": expired_time  # Expired
-            },
-            "another_expired": {
-                "count": 2,
-                "window_start": expired_time - 100  # Very expired
-            }
-        }
+        assert remaining == 0
+
+    def test_clients_are_independent(self, limiter):
+        """Test each client has its own bucket."""
+        for _ in range(5):
+            limiter._is_rate_limited_memory("client_a")
 
-        middleware._cleanup_expired_entries()
+        is_limited, _, _ = limiter._is_rate_limited_memory("client_b")
 
-        # Only active client should remain
-        assert "active_client" in middleware.clients
-        assert "expired_client" not in middleware.clients
-        assert "another_expired" not in middleware.clients
+        assert not is_limited
 
-    def test_add_rate_limit_headers_normal(self, middleware):
-        """Test adding rate limit headers for normal response."""
-        response = JSONResponse(content={"test": "data"})
-        client_id = "192.168.1.100"
-        
-        # Make some requests to set up client data
-        middleware._is_rate_limited(client_id)
-        middleware._is_rate_limited(client_id)
+    def test_cleanup_expired_entries(self, limiter):
+        """Test idle clients with full buckets are evicted."""
+        now = time.monotonic()
+        limiter.clients["idle"] = (0.0, now - limiter.full_refill_time - 1)
+        limiter.clients["active"] = (2.0, now - 1)
 
-        middleware._add_rate_limit_headers(response, client_id)
+        limiter._cleanup_expired_entries(now)
 
-        assert "X-RateLimit-Limit" in response.headers
-        assert "X-RateLimit-Remaining" in response.headers
-        assert "X-RateLimit-Reset" in response.headers
+        assert "idle" not in limiter.clients
+        assert "active" in limiter.clients
 
-        assert response.headers["X-RateLimit-Limit"] == "5"
-        assert response.headers["X-RateLimit-Remaining"] == "3"  # 5 - 2 = 3
+    @pytest.mark.asyncio
+    async def test_idle_clients_evicted_in_background(self):
+        """Test idle clients are evicted by the periodic cleanup pass."""
+        limiter = RateLimiter(calls=5, period=0.05)
+
+        await limiter.is_rate_limited("client")
+        assert "client" in limiter.clients
+
+        await asyncio.sleep(0.15)
+
+        assert "client" not in limiter.clients
 
-    def test_add_rate_limit_headers_exceeded(self, middleware):
-        """Test adding rate limit headers when limit exceeded."""
-        response = JSONResponse(content={"test": "data"})
-        client_id = "192.168.1.100"
-        
-        # Exceed the limit
-        for i in range(6):
-            middleware._is_rate_limited(client_id)
+    def test_cleanup_rescheduled_on_new_event_loop(self, limiter):
+        """Test a check on a different event loop moves the cleanup to that loop."""
+        asyncio.run(limiter.is_rate_limited("client"))
+        first_handle = limiter._cleanup_handle
 
-        middleware._add_rate_limit_headers(response, client_id)
+        asyncio.run(limiter.is_rate_limited("client"))
 
+        assert first_handle.cancelled()
+        assert limiter._cleanup_handle is not first_handle
+        assert not limiter._cleanup_handle.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_cleanup(self, limiter):
+        """Test closing the limiter cancels the scheduled cleanup."""
+        await limiter.is_rate_limited("client")
+        handle = limiter._cleanup_handle
+
+        limiter.close()
+
+        assert handle.cancelled()
+        assert limiter._cleanup_handle is None
+
+    def test_recently_used_clients_move_to_end(self, limiter):
+        """Test clients are kept in least recently used order."""
+        limiter._is_rate_limited_memory("first")
+        limiter._is_rate_limited_memory("second")
+        limiter._is_rate_limited_memory("first")
+
+        assert list(limiter.clients) == ["second", "first"]
+
+    def test_rate_limited_response(self, limiter):
+        """Test the 429 response carries rate limit headers."""
+        response = limiter.rate_limited_response(time.time() + 30)
+
+        assert response.status_code == 429
         assert response.headers["X-RateLimit-Limit"] == "5"
         assert response.headers["X-RateLimit-Remaining"] == "0"
+        assert "Retry-After" in response.headers
+        assert response.headers["Content-Type"] == "application/json"
+        assert json.loads(response.body) == {
+            "error": "Rate limit exceeded",
+            "message": "Too many requests. Limit: 5 per 60 seconds",
+            "retry_after": int(response.headers["Retry-After"])
+        }
 
-    def test_add_rate_limit_headers_new_client(self, middleware):
-        """Test adding rate limit headers for new client."""
-        response = JSONResponse(content={"test": "data"})
-        client_id = "new_client"
+    @pytest.mark.asyncio
+    async def test_check(self, limiter):
+        """Test check returns headers for allowed requests and 429 once limited."""
+        error_response, headers = await limiter.check(make_scope())
 
-        middleware._add_rate_limit_headers(response, client_id)
+        assert error_response is None
+        assert dict(headers)[b"x-ratelimit-limit"] == b"5"
+        assert dict(headers)[b"x-ratelimit-remaining"] == b"4"
 
-        assert response.headers["X-RateLimit-Limit"] == "5"
-        assert response.headers["X-RateLimit-Remaining"] == "5"  # No requests yet
+        for _ in range(4):
+            await limiter.check(make_scope())
+        error_response, headers = await limiter.check(make_scope())
+
+        assert error_response.status_code == 429
+        assert headers == ()
 
     @pytest.mark.asyncio
-    async def test_dispatch_allowed_request(self, middleware, mock_request):
-        """Test dispatching allowed request."""
-        call_next = AsyncMock(return_value=JSONResponse(content={"success": True}))
+    async def test_check_disabled(self):
+        """Test a disabled limiter neither counts nor limits requests."""
+        limiter = RateLimiter(calls=0)
 
-        response = await middleware.dispatch(mock_request, call_next)
+        assert await limiter.check(make_scope()) == (None, ())
+        assert limiter.clients == {}
 
-        # Should call next middleware
-        call_next.assert_called_once_with(mock_request)
-        assert isinstance(response, JSONResponse)
-        
-        # Should have rate limit headers
-        assert "X-RateLimit-Limit" in response.headers
+    @pytest.mark.asyncio
+    async def test_check_bypass_path(self, limiter):
+        """Test bypass paths are neither counted nor given headers."""
+        assert await limiter.check(make_scope(path="/health")) == (None, ())
+        assert limiter.clients == {}
 
     @pytest.mark.asyncio
-    async def test_dispatch_rate_limited_request(self, middleware, mock_request):
-        """Test dispatching rate limited request."""
-        client_id = middleware._get_client_identifier(mock_request)
-        
-        # Exceed rate limit
-        for i in range(6):
-            middleware._is_rate_limited(client_id)
-
-        call_next = AsyncMock()
-
-        response = await middleware.dispatch(mock_request, call_next)
-
-        # Should not call next middleware
-        call_next.assert_not_called()
-        
-        # Should return 429 response
-        assert response.status_code == 429
-        
-        # Should have rate limit headers
-        assert "X-RateLimit-Limit" in response.headers
-        assert response.headers["X-RateLimit-Remaining"] == "0"
+    async def test_redis_error_falls_back_to_memory(self):
+        """Test Redis failures fall back to in-memory buckets."""
+        redis_client = make_redis_client(error=Exception("Redis unavailable"))
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
+
+        is_limited, remaining, _ = await limiter.is_rate_limited("client")
+
+        assert not is_limited
+        assert remaining == 4
+        assert "client" in limiter.clients
 
     @pytest.mark.asyncio
-    async def test_dispatch_bypass_path(self, middleware):
-        """Test dispatching request for bypass path."""
-        request = Mock(spec=Request)
-        request.url.path = "/health"
-        request.headers = {}
-        request.client.host = "192.168.1.100"
+    async def test_redis_fixed_window_counter(self):
+        """Test Redis checks count requests in the current fixed window."""
+        redis_client = make_redis_client([3, 45000])
+        limiter = RateLimiter(calls=5, period=60, redis_client=redis_client)
 
-        call_next = AsyncMock(return_value=Response(content="OK"))
+        before = time.time()
+        is_limited, remaining, reset_time = await limiter.is_rate_limited("client")
 
-        # Even if client is rate limited, bypass paths should work
-        client_id = middleware._get_client_identifier(mock_request)
-        for i in range(6):
-            middleware._is_rate_limited(client_id)
+        assert not is_limited
+        assert remaining == 2
+        assert before + 44 < reset_time < time.time() + 46
+        assert queued_calls(redis_client) == [
+            ([f"rate_limit:client:{int(before // 60)}"], [60000])
+        ]
 
-        response = await middleware.dispatch(mock_request, call_next)
+    @pytest.mark.asyncio
+    async def test_redis_fixed_window_exceeded(self):
+        """Test Redis checks limit once the window count passes the limit."""
+        redis_client = make_redis_client([6, 1000])
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
 
-        # Should call next middleware despite rate limit
-        call_next.assert_called_once_with(request)
-        assert response.content == b"OK"
+        is_limited, remaining, _ = await limiter.is_rate_limited("client")
+
+        assert is_limited
+        assert remaining == 0
 
     @pytest.mark.asyncio
-    async def test_dispatch_periodic_cleanup(self, middleware, mock_request):
-        """Test that periodic cleanup is triggered."""
-        # Add expired entries
-        expired_time = time.time() - middleware.period - 1
-        middleware.clients["expired"] = {
-            "count": 5,
-            "window_start": expired_time
-        }
+    async def test_redis_sliding_window(self):
+        """Test the opt-in sliding log runs as one script call per check."""
+        redis_client = make_redis_client([1, 0, 1_700_000_030_000])
+        limiter = RateLimiter(
+            calls=5, period=60, redis_client=redis_client, sliding_window=True
+        )
+
+        is_limited, remaining, reset_time = await limiter.is_rate_limited("client")
+
+        assert is_limited
+        assert remaining == 0
+        assert reset_time == 1_700_000_030
+        [(keys, args)] = queued_calls(redis_client)
+        assert keys == ["rate_limit:client"]
+        now_ms, period_ms, limit, member = args
+        assert (period_ms, limit) == (60000, 5)
+        assert member.startswith(f"{now_ms}-")
+
+    @pytest.mark.asyncio
+    async def test_redis_checks_are_batched(self):
+        """Test concurrent Redis checks share one pipeline round trip."""
+        redis_client = make_redis_client([1, 60000], [2, 60000], [6, 60000])
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
+
+        results = await asyncio.gather(
+            *(limiter.is_rate_limited(client) for client in ("a", "b", "c"))
+        )
+
+        assert [(limited, remaining) for limited, remaining, _ in results] == [
+            (False, 4), (False, 3), (True, 0)
+        ]
+        redis_client.pipeline.assert_called_once_with(transaction=False)
+        assert [pipe.executions for pipe in redis_client.pipes] == [1]
+        assert [keys for keys, _ in queued_calls(redis_client)] == [
+            [f"rate_limit:{client}:{int(time.time() // 60)}"] for client in ("a", "b", "c")
+        ]
 
-        call_next = AsyncMock(return_value=Response())
+    @pytest.mark.asyncio
+    async def test_redis_script_error_falls_back_per_check(self):
+        """Test one failed script in a batch only affects its own check."""
+        redis_client = make_redis_client([1, 60000], Exception("ERR script failed"))
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
 
-        # Mock cleanup check to return True
-        with Mock.patch.object(middleware, '_should_cleanup', return_value=True):
-            await middleware.dispatch(mock_request, call_next)
+        first, second = await asyncio.gather(
+            limiter.is_rate_limited("a"), limiter.is_rate_limited("b")
+        )
 
-        # Expired client should be removed
-        assert "expired" not in middleware.clients
+        assert first[:2] == (False, 4)
+        assert second[:2] == (False, 4)
+        assert list(limiter.clients) == ["b"]
 
     @pytest.mark.asyncio
-    async def test_dispatch_exception_handling(self, middleware, mock_request):
-        """Test exception handling during dispatch."""
-        call_next = AsyncMock(side_effect=Exception("Middleware error"))
+    async def test_redis_short_pipeline_result_does_not_hang(self):
+        """Test calls left without a pipeline result fail over instead of waiting."""
+        redis_client = make_redis_client([1, 60000])
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
+
+        first, second = await asyncio.wait_for(
+            asyncio.gather(limiter.is_rate_limited("a"), limiter.is_rate_limited("b")),
+            timeout=1
+        )
 
-        # Should not raise exception
-        response = await middleware.dispatch(mock_request, call_next)
+        assert first[:2] == (False, 4)
+        assert second[:2] == (False, 4)
+        assert list(limiter.clients) == ["b"]
 
-        # Should return 500 error response
-        assert response.status_code == 500
 
-    def test_should_cleanup_logic(self, middleware):
-        """Test cleanup decision logic."""
-        # Test with no requests
-        assert not middleware._should_cleanup()
+    @pytest.mark.asyncio
+    async def test_redis_script_loaded_once(self):
+        """Test the script is loaded on the first flush only, not per pipeline."""
+        redis_client = make_redis_client([1, 60000], [2, 60000])
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
 
-        # Add some clients and test cleanup intervals
-        for i in range(15):
-            middleware.clients[f"client_{i}"] = {
-                "count": 1,
-                "window_start": time.time()
-            }
+        await limiter.is_rate_limited("a")
+        await limiter.is_rate_limited("b")
 
-        # Should cleanup when there are many clients
-        assert middleware._should_cleanup()
+        redis_client.script_load.assert_awaited_once_with("return 1")
+        assert len(redis_client.pipes) == 2
 
     @pytest.mark.asyncio
-    async def test_multiple_concurrent_requests(self, middleware):
-        """Test handling multiple concurrent requests from same client."""
-        request = Mock(spec=Request)
-        request.url.path = "/api/test"
-        request.headers = {}
-        request.client.host = "192.168.1.100"
-
-        call_next = AsyncMock(return_value=Response())
-
-        # Simulate concurrent requests
-        tasks = []
-        for i in range(10):
-            task = middleware.dispatch(request, call_next)
-            tasks.append(task)
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Some should succeed, some should be rate limited
-        success_count = sum(1 for r in responses if hasattr(r, 'status_code') and r.status_code == 200)
-        rate_limited_count = sum(1 for r in responses if hasattr(r, 'status_code') and r.status_code == 429)
-
-        assert success_count > 0  # At least some should succeed
-        assert rate_limited_count > 0  # Some should be rate limited
-        assert success_count + rate_limited_count == 10
\ No newline at end of file
+    async def test_redis_noscript_reloads_and_retries_missed_calls(self):
+        """Test calls that miss a flushed script are retried after a reload."""
+        redis_client = make_redis_client(
+            [1, 60000], NoScriptError("No matching script"), [2, 60000]
+        )
+        limiter = RateLimiter(calls=5, redis_client=redis_client)
+
+        first, second = await asyncio.gather(
+            limiter.is_rate_limited("a"), limiter.is_rate_limited("b")
+        )
+
+        assert first[:2] == (False, 4)
+        assert second[:2] == (False, 3)
+        assert redis_client.script_load.await_count == 2
+        assert [len(pipe.commands) for pipe in redis_client.pipes] == [2, 1]
+        assert limiter.clients == {}
+
+class TestRateLimitMiddleware:
+    """Test rate limiting middleware."""
+
+    @pytest.fixture
+    def app(self):
+        """Create downstream ASGI app."""
+        return make_app()
+
+    @pytest.fixture
+    def middleware(self, app):
+        """Create rate limit middleware instance."""
+        return RateLimitMiddleware(
+            app=app,
+            calls=5,  # 5 calls per period for testing
+            period=60,  # 60 seconds
+            bypass_paths=["/health", "/docs"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_allowed_request_gets_rate_limit_headers(self, middleware, app):
+        """Test allowed requests reach the app with rate limit headers added."""
+        status, headers, body = await call_middleware(middleware, make_scope())
+
+        assert status == 200
+        assert body == b"OK"
+        assert headers["x-ratelimit-limit"] == "5"
+        assert headers["x-ratelimit-remaining"] == "4"
+        assert "x-ratelimit-reset" in headers
+        assert len(app.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request(self, middleware, app):
+        """Test rate limited requests are answered with 429."""
+        for _ in range(5):
+            middleware.limiter._is_rate_limited_memory("192.168.1.100")
+
+        status, headers, body = await call_middleware(middleware, make_scope())
+
+        assert status == 429
+        assert headers["x-ratelimit-remaining"] == "0"
+        assert json.loads(body)["error"] == "Rate limit exceeded"
+        assert app.calls == []
+
+    @pytest.mark.asyncio
+    async def test_bypass_path(self, middleware, app):
+        """Test bypass paths skip rate limiting."""
+        for _ in range(5):
+            middleware.limiter._is_rate_limited_memory("192.168.1.100")
+
+        status, headers, body = await call_middleware(middleware, make_scope(path="/health"))
+
+        assert status == 200
+        assert body == b"OK"
+        assert "x-ratelimit-limit" not in headers
+
+    @pytest.mark.asyncio
+    async def test_disabled_when_calls_is_zero(self, app):
+        """Test a zero limit passes every request through untouched."""
+        middleware = RateLimitMiddleware(app=app, calls=0)
+
+        status, headers, _ = await call_middleware(middleware, make_scope())
+
+        assert status == 200
+        assert "x-ratelimit-limit" not in headers
+        assert middleware.limiter.clients == {}
+
+    @pytest.mark.asyncio
+    async def test_non_http_scope_passes_through(self):
+        """Test non-HTTP scopes are forwarded untouched."""
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+
+        await RateLimitMiddleware(app=app)({"type": "lifespan"}, None, None)
+
+        assert scopes == [{"type": "lifespan"}]
+
+    @pytest.mark.asyncio
+    async def test_lifespan_shutdown_cancels_cleanup(self, middleware):
+        """Test the cleanup timer is cancelled once the app has shut down."""
+        await middleware.limiter.is_rate_limited("client")
+        handle = middleware.limiter._cleanup_handle
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "lifespan.startup.complete"})
+            assert not handle.cancelled()
+            await send({"type": "lifespan.shutdown.complete"})
+
+        async def send(message):
+            sent.append(message["type"])
+
+        middleware.app = app
+        await middleware({"type": "lifespan"}, None, send)
+
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert handle.cancelled()
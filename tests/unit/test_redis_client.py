@@ -1,6 +1,7 @@
 """Tests for Redis client module."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
@@ -95,6 +96,19 @@ class TestRedisClient:
             mock_create.assert_called_once()
             assert result == mock_redis_client
 
+    @pytest.mark.asyncio
+    async def test_ensure_connection_connects_once_under_concurrency(self, client, mock_redis_client):
+        """Test concurrent callers share a single first connect."""
+        async def mock_create_connection():
+            await asyncio.sleep(0)
+            client._client = mock_redis_client
+
+        with patch.object(client, '_create_connection', side_effect=mock_create_connection) as mock_create:
+            results = await asyncio.gather(*(client._ensure_connection() for _ in range(5)))
+
+            mock_create.assert_called_once()
+            assert all(result == mock_redis_client for result in results)
+
     @pytest.mark.asyncio
     async def test_ensure_connection_reuses_existing(self, client, mock_redis_client):
         """Test _ensure_connection reuses existing connection."""
@@ -242,6 +256,33 @@ class TestRedisClient:
 
         assert result == -2
 
+    @pytest.mark.asyncio
+    async def test_get_with_ttl_success(self, client, mock_redis_client):
+        """Test value and TTL are fetched in a single pipeline."""
+        pipe = Mock()
+        pipe.get.return_value = pipe
+        pipe.ttl.return_value = pipe
+        pipe.execute = AsyncMock(return_value=[b"value", 120])
+        mock_redis_client.pipeline = Mock(return_value=pipe)
+        client._client = mock_redis_client
+
+        result = await client.get_with_ttl("test_key")
+
+        mock_redis_client.pipeline.assert_called_once_with(transaction=False)
+        pipe.get.assert_called_once_with("test_key")
+        pipe.ttl.assert_called_once_with("test_key")
+        assert result == (b"value", 120)
+
+    @pytest.mark.asyncio
+    async def test_get_with_ttl_failure(self, client, mock_redis_client):
+        """Test get_with_ttl reports a missing key on failure."""
+        mock_redis_client.pipeline = Mock(side_effect=Exception("Redis error"))
+        client._client = mock_redis_client
+
+        result = await client.get_with_ttl("test_key")
+
+        assert result == (None, -2)
+
     @pytest.mark.asyncio
     async def test_expire_success(self, client, mock_redis_client):
         """Test successful expire operation."""
@@ -285,6 +326,32 @@ class TestRedisClient:
         mock_redis_client.incr.assert_called_once_with("test_key", 1)
         assert result == 1
 
+    @pytest.mark.asyncio
+    async def test_incr_with_ttl_success(self, client, mock_redis_client):
+        """Test incr_with_ttl runs the registered script once per call."""
+        script = AsyncMock(side_effect=[1, 2])
+        mock_redis_client.register_script = Mock(return_value=script)
+        client._client = mock_redis_client
+
+        first = await client.incr_with_ttl("test_key", 60000)
+        second = await client.incr_with_ttl("test_key", 60000)
+
+        mock_redis_client.register_script.assert_called_once()
+        script.assert_called_with(keys=["test_key"], args=[1, 60000], client=mock_redis_client)
+        assert (first, second) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_incr_with_ttl_failure(self, client, mock_redis_client):
+        """Test incr_with_ttl returns None when the script fails."""
+        mock_redis_client.register_script = Mock(
+            return_value=AsyncMock(side_effect=Exception("Redis error"))
+        )
+        client._client = mock_redis_client
+
+        result = await client.incr_with_ttl("test_key", 60000)
+
+        assert result is None
+
     @pytest.mark.asyncio
     async def test_incr_failure(self, client, mock_redis_client):
         """Test incr operation failure."""
@@ -352,11 +419,22 @@ class TestRedisClient:
     @pytest.mark.asyncio
     async def test_hgetall_success(self, client, mock_redis_client):
         """Test successful hgetall operation."""
+        mock_redis_client.hgetall.return_value = {b"field1": b"value1", b"field2": b"value2"}
+        client._client = mock_redis_client
+
+        result = await client.hgetall("test_hash")
+
+        mock_redis_client.hgetall.assert_called_once_with("test_hash")
+        assert result == {"field1": "value1", "field2": "value2"}
+
+    @pytest.mark.asyncio
+    async def test_hgetall_bytes_success(self, client, mock_redis_client):
+        """Test hgetall_bytes returns fields and values undecoded."""
         expected_result = {b"field1": b"value1", b"field2": b"value2"}
         mock_redis_client.hgetall.return_value = expected_result
         client._client = mock_redis_client
 
-        result = await client.hgetall("test_hash")
+        result = await client.hgetall_bytes("test_hash")
 
         mock_redis_client.hgetall.assert_called_once_with("test_hash")
         assert result == expected_result
@@ -0,0 +1,28 @@
+"""Tests for Zoho retry helpers."""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from server.zoho.retry import parse_retry_after
+
+
+class TestParseRetryAfter:
+    """Test parse_retry_after function."""
+
+    def test_delay_seconds(self):
+        """Test a delay-seconds value is returned as a float."""
+        assert parse_retry_after("12") == 12.0
+        assert parse_retry_after("-5") == 0.0
+
+    def test_missing_or_malformed_uses_default(self):
+        """Test missing and unparseable values fall back to the default."""
+        assert parse_retry_after(None) == 60.0
+        assert parse_retry_after("soon") == 60.0
+        assert parse_retry_after(None, default=0.0) == 0.0
+
+    def test_http_date(self):
+        """Test HTTP-date values give the seconds remaining until that time."""
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=20)
+        assert 18 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 20
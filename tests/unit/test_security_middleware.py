@@ -1,243 +1,348 @@
 """Unit tests for security middleware."""
 
+import json
 from unittest.mock import Mock
 
 import pytest
-from fastapi import Request, Response
+from fastapi import Response
 from fastapi.responses import JSONResponse
 
-from server.main import SecurityHeadersMiddleware, RequestSizeLimitMiddleware
+from server.main import _DEV_SECURITY_HEADERS_RAW, UnifiedMiddleware
 
 
-class TestSecurityHeadersMiddleware:
-    """Test security headers middleware."""
+def make_scope(
+    path="/api/test",
+    method="POST",
+    client_ip="192.168.1.100",
+    content_length=None
+):
+    """Create an HTTP scope with an optional Content-Length header."""
+    headers = []
+    if content_length is not None:
+        headers.append((b"content-length", content_length.encode()))
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": headers,
+        "client": (client_ip, 50000),
+    }
 
-    @pytest.fixture
-    def app(self):
-        """Create mock FastAPI app."""
-        return Mock()
 
-    @pytest.fixture
-    def middleware(self, app):
-        """Create security headers middleware instance."""
-        return SecurityHeadersMiddleware(app)
+async def call_middleware(middleware, scope):
+    """Run a request through the middleware and collect the response."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, body
+
+
+def make_app(response_factory=None):
+    """Create an ASGI app returning a fixed response."""
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope)
+        response = response_factory() if response_factory else Response(content="OK")
+        await response(scope, receive, send)
+
+    app.calls = calls
+    return app
+
+
+class TestSecurityHeaders:
+    """Test security header injection."""
 
     @pytest.fixture
-    def mock_request(self):
-        """Create mock request."""
-        request = Mock(spec=Request)
-        request.url.path = "/api/test"
-        return request
+    def middleware(self):
+        """Create unified middleware instance."""
+        return UnifiedMiddleware(
+            make_app(), allowed_ips=["192.168.1.0/24"], max_size=1024, rate_limit=100
+        )
 
     @pytest.mark.asyncio
-    async def test_security_headers_added(self, middleware, mock_request):
+    async def test_security_headers_added(self, middleware):
         """Test that security headers are added to response."""
-        # Mock call_next to return a basic response
-        async def mock_call_next(req):
-            response = Response(content="OK", status_code=200)
-            return response
-
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        # Check that security headers are present
-        assert "X-Content-Type-Options" in response.headers
-        assert response.headers["X-Content-Type-Options"] == "nosniff"
-        
-        assert "X-Frame-Options" in response.headers
-        assert response.headers["X-Frame-Options"] == "DENY"
-        
-        assert "X-XSS-Protection" in response.headers
-        assert response.headers["X-XSS-Protection"] == "1; mode=block"
-        
-        assert "Referrer-Policy" in response.headers
-        assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
-        
-        assert "Permissions-Policy" in response.headers
-        assert response.headers["Permissions-Policy"] == "geolocation=(), microphone=(), camera=()"
-
-    @pytest.mark.asyncio
-    async def test_csp_headers_development(self, middleware, mock_request, monkeypatch):
+        status, headers, _ = await call_middleware(middleware, make_scope())
+
+        assert status == 200
+        assert headers["x-content-type-options"] == "nosniff"
+        assert headers["x-frame-options"] == "DENY"
+        assert headers["x-xss-protection"] == "1; mode=block"
+        assert headers["referrer-policy"] == "strict-origin-when-cross-origin"
+        assert headers["permissions-policy"] == "geolocation=(), microphone=(), camera=()"
+
+    @pytest.mark.asyncio
+    async def test_csp_headers_development(self, middleware, monkeypatch):
         """Test CSP headers in development mode."""
-        # Mock settings directly in the middleware
         from server import main
-        
-        # Patch the settings import in the middleware module
+
         mock_settings = Mock()
         mock_settings.is_production = False
         monkeypatch.setattr(main, "settings", mock_settings)
 
-        async def mock_call_next(req):
-            response = Response(content="OK", status_code=200)
-            return response
+        _, headers, _ = await call_middleware(middleware, make_scope())
 
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        # Check CSP header for development
-        assert "Content-Security-Policy" in response.headers
-        csp = response.headers["Content-Security-Policy"]
+        csp = headers["content-security-policy"]
         assert "'unsafe-inline'" in csp
         assert "'unsafe-eval'" in csp
         assert "https://projectsapi.zoho.com" in csp
+        assert "strict-transport-security" not in headers
 
     @pytest.mark.asyncio
-    async def test_csp_headers_production(self, middleware, mock_request, monkeypatch):
+    async def test_csp_headers_production(self, middleware, monkeypatch):
         """Test CSP headers in production mode."""
-        # Mock settings directly in the middleware
         from server import main
-        
-        # Patch the settings import in the middleware module
+
         mock_settings = Mock()
         mock_settings.is_production = True
         monkeypatch.setattr(main, "settings", mock_settings)
 
-        async def mock_call_next(req):
-            response = Response(content="OK", status_code=200)
-            return response
+        _, headers, _ = await call_middleware(middleware, make_scope())
 
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        # Check production-specific headers
-        assert "Strict-Transport-Security" in response.headers
-        assert response.headers["Strict-Transport-Security"] == "max-age=31536000; includeSubDomains"
-        
-        assert "Content-Security-Policy" in response.headers
-        csp = response.headers["Content-Security-Policy"]
+        assert headers["strict-transport-security"] == "max-age=31536000; includeSubDomains"
+        csp = headers["content-security-policy"]
         assert "default-src 'self'" in csp
         assert "https://projectsapi.zoho.com" in csp
 
     @pytest.mark.asyncio
-    async def test_headers_preserved_on_json_response(self, middleware, mock_request):
+    async def test_headers_preserved_on_json_response(self):
         """Test that headers are added to JSON responses."""
-        async def mock_call_next(req):
-            return JSONResponse(content={"message": "success"}, status_code=200)
+        middleware = UnifiedMiddleware(
+            make_app(lambda: JSONResponse(content={"message": "success"})),
+            allowed_ips=["192.168.1.0/24"]
+        )
+
+        _, headers, body = await call_middleware(middleware, make_scope())
+
+        assert headers["content-type"] == "application/json"
+        assert "x-content-type-options" in headers
+        assert "x-frame-options" in headers
+        assert json.loads(body) == {"message": "success"}
+
+    @pytest.mark.asyncio
+    async def test_headers_added_to_error_responses(self, middleware):
+        """Test that rejected requests also carry security headers."""
+        status, headers, _ = await call_middleware(
+            middleware, make_scope(client_ip="172.16.0.1")
+        )
+
+        assert status == 403
+        assert "x-content-type-options" in headers
+
+    @pytest.mark.asyncio
+    async def test_non_http_scope_passes_through(self):
+        """Test that non-HTTP scopes are forwarded untouched."""
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+
+        middleware = UnifiedMiddleware(app, allowed_ips=[])
+        await middleware({"type": "lifespan"}, None, None)
 
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        assert scopes == [{"type": "lifespan"}]
 
-        # Check that security headers are present on JSON response
-        assert "X-Content-Type-Options" in response.headers
-        assert "X-Frame-Options" in response.headers
-        assert isinstance(response, JSONResponse)
 
+    @pytest.mark.asyncio
+    async def test_lifespan_shutdown_closes_rate_limiter(self):
+        """Test the rate limiter's cleanup timer is cancelled on shutdown."""
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "lifespan.shutdown.complete"})
+
+        async def send(message):
+            sent.append(message["type"])
+
+        middleware = UnifiedMiddleware(app, allowed_ips=[])
+        await middleware.rate_limiter.is_rate_limited("client")
+        handle = middleware.rate_limiter._cleanup_handle
+
+        await middleware({"type": "lifespan"}, None, send)
 
-class TestRequestSizeLimitMiddleware:
-    """Test request size limit middleware."""
+        assert sent == ["lifespan.shutdown.complete"]
+        assert handle.cancelled()
+
+class TestRequestSizeLimit:
+    """Test request size limiting."""
 
     @pytest.fixture
     def app(self):
-        """Create mock FastAPI app."""
-        return Mock()
+        """Create downstream ASGI app."""
+        return make_app()
 
     @pytest.fixture
     def middleware(self, app):
-        """Create request size limit middleware instance."""
-        return RequestSizeLimitMiddleware(app, max_size=1024)  # 1KB for testing
-
-    @pytest.fixture
-    def mock_request(self):
-        """Create mock request."""
-        request = Mock(spec=Request)
-        request.url.path = "/api/test"
-        request.headers = {}
-        return request
+        """Create unified middleware instance with a 1KB limit."""
+        return UnifiedMiddleware(app, allowed_ips=["192.168.1.0/24"], max_size=1024)
 
     @pytest.mark.asyncio
-    async def test_request_within_size_limit(self, middleware, mock_request):
+    async def test_request_within_size_limit(self, middleware):
         """Test request within size limit is allowed."""
-        mock_request.headers = {"Content-Length": "512"}  # 512 bytes
+        status, _, _ = await call_middleware(middleware, make_scope(content_length="512"))
 
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
-
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 200
+        assert status == 200
 
     @pytest.mark.asyncio
-    async def test_request_exceeds_size_limit(self, middleware, mock_request):
+    async def test_request_exceeds_size_limit(self, middleware, app):
         """Test request exceeding size limit is rejected."""
-        mock_request.headers = {"Content-Length": "2048"}  # 2KB > 1KB limit
-
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
-
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 413
-        assert isinstance(response, JSONResponse)
-        
-        # Check error message
-        import json
-        content = json.loads(response.body.decode())
+        status, _, body = await call_middleware(middleware, make_scope(content_length="2048"))
+
+        assert status == 413
+        content = json.loads(body)
         assert "Request Entity Too Large" in content["error"]
         assert "2048 bytes exceeds limit of 1024 bytes" in content["message"]
+        assert app.calls == []
 
     @pytest.mark.asyncio
-    async def test_request_no_content_length(self, middleware, mock_request):
+    async def test_request_no_content_length(self, middleware):
         """Test request without Content-Length header is allowed."""
-        # No Content-Length header
-        mock_request.headers = {}
+        status, _, _ = await call_middleware(middleware, make_scope())
 
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
-
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 200
+        assert status == 200
 
     @pytest.mark.asyncio
-    async def test_request_invalid_content_length(self, middleware, mock_request):
+    async def test_request_invalid_content_length(self, middleware):
         """Test request with invalid Content-Length header."""
-        mock_request.headers = {"Content-Length": "invalid"}
-
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
-
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 400
-        assert isinstance(response, JSONResponse)
-        
-        # Check error message
-        import json
-        content = json.loads(response.body.decode())
+        status, _, body = await call_middleware(middleware, make_scope(content_length="invalid"))
+
+        assert status == 400
+        content = json.loads(body)
         assert "Bad Request" in content["error"]
         assert "Invalid Content-Length header" in content["message"]
 
-    @pytest.mark.asyncio
-    async def test_middleware_initialization_with_custom_size(self, app):
-        """Test middleware initialization with custom max size."""
-        custom_size = 2048
-        middleware = RequestSizeLimitMiddleware(app, max_size=custom_size)
-        
-        assert middleware.max_size == custom_size
-
-    @pytest.mark.asyncio
-    async def test_middleware_initialization_with_default_size(self, app):
+    def test_middleware_initialization_with_default_size(self, app):
         """Test middleware initialization with default max size."""
-        middleware = RequestSizeLimitMiddleware(app)
-        
+        middleware = UnifiedMiddleware(app, allowed_ips=[])
+
         assert middleware.max_size == 1024 * 1024  # 1MB default
 
     @pytest.mark.asyncio
-    async def test_request_at_exact_limit(self, middleware, mock_request):
-        """Test request at exact size limit."""
-        mock_request.headers = {"Content-Length": "1024"}  # Exactly at limit
+    async def test_bodyless_method_skips_size_check(self, middleware):
+        """Test GET requests are not size-checked."""
+        status, _, _ = await call_middleware(
+            middleware, make_scope(method="GET", content_length="2048")
+        )
+
+        assert status == 200
 
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
+    @pytest.mark.asyncio
+    async def test_request_at_exact_limit(self, middleware):
+        """Test request at exact size limit."""
+        status, _, _ = await call_middleware(middleware, make_scope(content_length="1024"))
 
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 200
+        assert status == 200
 
     @pytest.mark.asyncio
-    async def test_request_one_byte_over_limit(self, middleware, mock_request):
+    async def test_request_one_byte_over_limit(self, middleware):
         """Test request one byte over limit."""
-        mock_request.headers = {"Content-Length": "1025"}  # 1 byte over limit
+        status, _, _ = await call_middleware(middleware, make_scope(content_length="1025"))
+
+        assert status == 413
+
+
+class TestIPAllowlistAndRateLimit:
+    """Test IP allowlisting and rate limiting."""
+
+    @pytest.fixture
+    def app(self):
+        """Create downstream ASGI app."""
+        return make_app()
+
+    @pytest.fixture
+    def middleware(self, app):
+        """Create unified middleware instance allowing 2 calls per minute."""
+        return UnifiedMiddleware(app, allowed_ips=["192.168.1.0/24"], rate_limit=2)
+
+    @pytest.mark.asyncio
+    async def test_blocked_ip_rejected(self, middleware, app):
+        """Test request from an IP outside the allowlist."""
+        status, _, body = await call_middleware(middleware, make_scope(client_ip="172.16.0.1"))
+
+        assert status == 403
+        assert json.loads(body)["error"] == "Forbidden"
+        assert app.calls == []
+
+    @pytest.mark.asyncio
+    async def test_bypass_path_skips_ip_check(self, middleware):
+        """Test bypass paths are served to any IP."""
+        status, _, _ = await call_middleware(
+            middleware, make_scope(path="/health", method="GET", client_ip="172.16.0.1")
+        )
+
+        assert status == 200
+
+    @pytest.mark.asyncio
+    async def test_public_path_skips_guards(self, middleware, app):
+        """Test public paths skip rate limiting but keep security headers."""
+        for _ in range(3):
+            status, headers, _ = await call_middleware(
+                middleware, make_scope(path="/manifest.json", method="GET", client_ip="172.16.0.1")
+            )
+            assert status == 200
+            assert "x-content-type-options" in headers
+            assert "x-ratelimit-limit" not in headers
+
+        assert middleware.rate_limiter.clients == {}
+        assert len(app.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_headers_added(self, middleware):
+        """Test rate limit state is reported on allowed responses."""
+        _, headers, _ = await call_middleware(middleware, make_scope())
+
+        assert headers["x-ratelimit-limit"] == "2"
+        assert headers["x-ratelimit-remaining"] == "1"
+        assert "x-ratelimit-reset" in headers
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_headers_not_shared_between_requests(self, middleware):
+        """Test per-request headers never leak into the shared security headers."""
+        expected = list(_DEV_SECURITY_HEADERS_RAW)
+
+        await call_middleware(middleware, make_scope())
+        _, headers, _ = await call_middleware(
+            middleware, make_scope(path="/manifest.json", method="GET")
+        )
+
+        assert _DEV_SECURITY_HEADERS_RAW == expected
+        assert "x-ratelimit-limit" not in headers
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_exceeded(self, middleware, app):
+        """Test requests over the limit are rejected with 429."""
+        for _ in range(2):
+            status, _, _ = await call_middleware(middleware, make_scope())
+            assert status == 200
+
+        status, headers, body = await call_middleware(middleware, make_scope())
+
+        assert status == 429
+        assert headers["x-ratelimit-remaining"] == "0"
+        assert "retry-after" in headers
+        assert json.loads(body)["error"] == "Rate limit exceeded"
+        assert len(app.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_disabled(self, app):
+        """Test a zero rate limit lets every request through without headers."""
+        middleware = UnifiedMiddleware(app, allowed_ips=["192.168.1.0/24"], rate_limit=0)
 
-        async def mock_call_next(req):
-            return Response(content="OK", status_code=200)
+        for _ in range(3):
+            status, headers, _ = await call_middleware(middleware, make_scope())
+            assert status == 200
+            assert "x-ratelimit-limit" not in headers
 
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        
-        assert response.status_code == 413
\ No newline at end of file
+        assert middleware.rate_limiter.clients == {}
+        assert len(app.calls) == 3
@@ -81,7 +81,7 @@ class TestTaskHandler:
     @pytest.fixture
     def handler(self):
         """Create TaskHandler instance with mocked API client."""
-        with patch('server.handlers.tasks.ZohoAPIClient'):
+        with patch('server.handlers.tasks.get_zoho_client'):
             handler = TaskHandler()
             handler.api_client = AsyncMock()
             return handler
@@ -360,14 +360,15 @@ class TestTaskHandler:
             ]
         }
 
-        handler.api_client.get.side_effect = [mock_task_response, mock_comments_response]
+        handler.api_client.get_many.return_value = [mock_task_response, mock_comments_response]
 
         result = await handler.get_task_detail("task123")
 
-        # Verify API calls
-        assert handler.api_client.get.call_count == 2
-        handler.api_client.get.assert_any_call("/tasks/task123/")
-        handler.api_client.get.assert_any_call("/tasks/task123/comments/")
+        # Verify the task and its comments are fetched in one batch
+        handler.api_client.get_many.assert_called_once()
+        (task_call, comments_call), = handler.api_client.get_many.call_args[0]
+        assert task_call[0].endswith("/tasks/task123/")
+        assert comments_call[0].endswith("/tasks/task123/comments/")
 
         # Verify result
         assert result["id"] == "task123"
@@ -391,7 +392,7 @@ class TestTaskHandler:
             }
         }
 
-        handler.api_client.get.side_effect = [mock_task_response, Exception("Comments API Error")]
+        handler.api_client.get_many.return_value = [mock_task_response, Exception("Comments API Error")]
 
         result = await handler.get_task_detail("task123")
 
@@ -401,7 +402,7 @@ class TestTaskHandler:
     @pytest.mark.asyncio
     async def test_get_task_detail_api_error(self, handler):
         """Test task detail retrieval with API error."""
-        handler.api_client.get.side_effect = Exception("API Error")
+        handler.api_client.get_many.return_value = [Exception("API Error"), {"comments": []}]
 
         with pytest.raises(Exception, match="API Error"):
             await handler.get_task_detail("task123")